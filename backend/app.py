@@ -1,13 +1,13 @@
 # app.py
 
+import asyncio
 import os
 from fastapi import FastAPI, Form, HTTPException, UploadFile, File
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 from state import create_initial_state
-from orchestration_agent import OrchestrationAgent
-from coordinate_agent import CoordinateAgent
+from workflow import run_step
 
 load_dotenv()
 app = FastAPI(title="Agent Runner API")
@@ -39,24 +39,16 @@ async def run_agents(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Could not open image_path: {e}")
 
-    # initialize state
-    state = create_initial_state(image_data, query)
+    # initialize state (preparing the screenshot off the event loop)
+    state = await asyncio.to_thread(create_initial_state, image_data, query)
 
-    # 1) orchestration agent
+    # orchestration agent, then coordinate agent
     try:
-        orch = OrchestrationAgent()
-        task, description = orch.generate_tasks(state)
+        state, _ = await run_step(state, speak_task=False)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Orchestration error: {e}")
-    state["current_task"] = task
-    state["task_description"] = description
-
-    # 2) coordinate agent
-    try:
-        coord = CoordinateAgent()
-        x, y = coord.generate_coordinates(state)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Coordinate error: {e}")
+        raise HTTPException(status_code=500, detail=f"Workflow error: {e}")
+    task, description = state["current_task"], state["task_description"]
+    x, y = state["coordinates"] or (0, 0)
 
     return JSONResponse({
         "task": task,
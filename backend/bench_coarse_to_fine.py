@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-pass vs coarse-to-fine coordinate localization.
+
+For every task, locates the target with COORDINATE_MODE=single and
+COORDINATE_MODE=coarse_to_fine and reports latency, model calls, input
+tokens (as billed) and estimated image tokens. Give the expected point of
+each task with --expect to also report the pixel error. The response cache
+is bypassed (requires ANTHROPIC_API_KEY).
+
+Usage:
+    python bench_coarse_to_fine.py <image_path> --task "..." [--expect X,Y] [--task ... --expect ...]
+
+Example:
+    python bench_coarse_to_fine.py img.png --task "Click the Compose button" --expect 120,245
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import math
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+import coordinate_agent
+from coordinate_agent import CoordinateAgent
+from image_processing import estimate_image_tokens
+from state import create_initial_state
+
+
+class RecordingLLM:
+    """Wraps the structured output runnable to record billed input tokens and image tokens per call."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.calls = []
+
+    async def ainvoke(self, messages):
+        image = Image.open(io.BytesIO(base64.b64decode(messages[-1].content[1]["data"])))
+        response = await self.llm.ainvoke(messages)
+        usage = getattr(response.get("raw"), "usage_metadata", None) or {}
+        self.calls.append((usage.get("input_tokens", 0), estimate_image_tokens(*image.size)))
+        return response
+
+
+async def locate(agent: CoordinateAgent, state) -> tuple:
+    """Locate one task; returns ((x, y), seconds, calls, input tokens, image tokens)."""
+    recorder = RecordingLLM(agent.llm)
+    agent.llm = recorder
+    try:
+        start = time.perf_counter()
+        coordinates = await agent.agenerate_coordinates(state)
+        elapsed = time.perf_counter() - start
+    finally:
+        agent.llm = recorder.llm
+    return (
+        coordinates,
+        elapsed,
+        len(recorder.calls),
+        sum(tokens for tokens, _ in recorder.calls),
+        sum(image_tokens for _, image_tokens in recorder.calls),
+    )
+
+
+async def run_benchmark(image_data: bytes, tasks: list, expected: list) -> None:
+    """Locate every task in both modes and print one row per task and mode."""
+    agents = {mode: CoordinateAgent(mode=mode) for mode in ("single", "coarse_to_fine")}
+    print(f"{'mode':>15} {'s':>6} {'calls':>5} {'in tok':>7} {'img tok':>8} {'xy':>11} {'err px':>7}  task")
+    for task, target in zip(tasks, expected):
+        state = create_initial_state(image_data, "Benchmark")
+        state["current_task"] = task
+        for mode, agent in agents.items():
+            (x, y), seconds, calls, tokens, image_tokens = await locate(agent, state)
+            error = f"{math.dist((x, y), target):.0f}" if target else "-"
+            print(f"{mode:>15} {seconds:>6.2f} {calls:>5} {tokens:>7} {image_tokens:>8} {f'{x},{y}':>11} {error:>7}  {task}")
+
+
+def main():
+    """Parse arguments and benchmark both localization modes."""
+    parser = argparse.ArgumentParser(description="Benchmark single-pass vs coarse-to-fine localization")
+    parser.add_argument("image_path")
+    parser.add_argument("--task", action="append", required=True, help="Task text (repeatable)")
+    parser.add_argument("--expect", action="append", default=[], help="Expected X,Y for the task at the same position")
+    args = parser.parse_args()
+
+    image_path = Path(args.image_path)
+    if not image_path.exists():
+        print(f"❌ Image file not found: {image_path}")
+        sys.exit(1)
+
+    expected = [tuple(int(v) for v in point.split(",")) for point in args.expect]
+    expected += [None] * (len(args.task) - len(expected))
+
+    # Every run must reach the model
+    coordinate_agent.response_cache = None
+    asyncio.run(run_benchmark(image_path.read_bytes(), args.task, expected))
+
+
+if __name__ == "__main__":
+    main()
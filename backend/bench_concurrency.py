@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for the step endpoints of a running backend.
+
+Drives N sessions in parallel (each one /initialize followed by a number of
+/update_screenshot calls) for several values of N, and probes /health while
+they run. With a non-blocking server, throughput grows with N and /health
+stays fast; with a blocking one, throughput stays flat and /health stalls.
+
+Usage:
+    python bench_concurrency.py <image_path> <user_query> [--url URL] [--levels 1,2,4,8] [--steps 2]
+
+Example:
+    python main.py &
+    python bench_concurrency.py img.png "Send an email on gmail" --levels 1,4,8
+"""
+
+import argparse
+import asyncio
+import base64
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+import httpx
+
+
+async def run_session(client: httpx.AsyncClient, image_base64: str, user_query: str, steps: int) -> List[float]:
+    """
+    Run one session and return the latency of every step in seconds.
+
+    Args:
+        client: HTTP client pointed at the backend
+        image_base64: Screenshot to send on every step
+        user_query: Query used to initialize the session
+        steps: Number of /update_screenshot calls after /initialize
+
+    Returns:
+        List[float]: Per-step latencies
+    """
+    latencies = []
+
+    start = time.perf_counter()
+    response = await client.post("/initialize", json={
+        "user_query": user_query,
+        "screenshot_base64": image_base64
+    })
+    response.raise_for_status()
+    latencies.append(time.perf_counter() - start)
+    session_id = response.json()["session_id"]
+
+    for _ in range(steps):
+        start = time.perf_counter()
+        response = await client.post("/update_screenshot", json={
+            "screenshot_base64": image_base64,
+            "session_id": session_id
+        })
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        if response.json()["is_completed"]:
+            break
+
+    await client.post("/reset", params={"session_id": session_id})
+    return latencies
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> List[float]:
+    """Poll /health until stopped and return its latencies."""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+async def run_level(url: str, image_base64: str, user_query: str, concurrency: int, steps: int) -> dict:
+    """Run `concurrency` sessions in parallel and summarize the results."""
+    async with httpx.AsyncClient(base_url=url, timeout=300) as client:
+        stop = asyncio.Event()
+        health_task = asyncio.create_task(probe_health(client, stop))
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            run_session(client, image_base64, user_query, steps)
+            for _ in range(concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        health_latencies = await health_task
+
+    step_latencies = [latency for session in results for latency in session]
+    return {
+        "concurrency": concurrency,
+        "steps": len(step_latencies),
+        "elapsed": elapsed,
+        "throughput": len(step_latencies) / elapsed,
+        "step_p50": statistics.median(step_latencies),
+        "health_max": max(health_latencies) if health_latencies else 0.0,
+    }
+
+
+def main():
+    """Parse arguments and run the benchmark for every concurrency level."""
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for the step endpoints")
+    parser.add_argument("image_path")
+    parser.add_argument("user_query")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--levels", default="1,2,4,8", help="Comma-separated session counts")
+    parser.add_argument("--steps", type=int, default=2, help="/update_screenshot calls per session")
+    args = parser.parse_args()
+
+    if not Path(args.image_path).exists():
+        print(f"❌ Image file not found: {args.image_path}")
+        sys.exit(1)
+    image_base64 = base64.b64encode(Path(args.image_path).read_bytes()).decode('utf-8')
+
+    print(f"{'sessions':>8} {'steps':>6} {'elapsed s':>10} {'steps/s':>8} {'p50 s':>7} {'/health max s':>14}")
+    for level in [int(value) for value in args.levels.split(",")]:
+        result = asyncio.run(run_level(args.url, image_base64, args.user_query, level, args.steps))
+        print(
+            f"{result['concurrency']:>8} {result['steps']:>6} {result['elapsed']:>10.2f} "
+            f"{result['throughput']:>8.2f} {result['step_p50']:>7.2f} {result['health_max']:>14.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark tail latency of model calls with and without hedged requests.
+
+Calls a stand-in model whose latency is mostly around --median seconds with
+a share of --stall-rate calls stalling for --stall seconds (like a slow
+provider replica), through CallPolicy with hedging off and on. Reports
+p50/p95/p99 call latency and the requests sent per call, which is the extra
+spend hedging costs.
+
+Usage:
+    python bench_hedging.py [--calls 400] [--median 0.2] [--stall 2.0] [--stall-rate 0.03]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from call_policy import CallPolicy
+
+
+class TailLatencyModel:
+    """Stand-in model with a long latency tail; counts the requests it receives."""
+
+    def __init__(self, median: float, stall: float, stall_rate: float):
+        self.median = median
+        self.stall = stall
+        self.stall_rate = stall_rate
+        self.requests = 0
+
+    async def ainvoke(self, messages):
+        self.requests += 1
+        delay = self.stall if random.random() < self.stall_rate else random.lognormvariate(0, 0.25) * self.median
+        await asyncio.sleep(delay)
+        return "ok"
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Value at the given fraction of the sorted values."""
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+async def run(policy: CallPolicy, model: TailLatencyModel, calls: int, concurrency: int) -> list:
+    """Make the calls, `concurrency` at a time; returns each call's latency in seconds."""
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            start = time.perf_counter()
+            await policy.ainvoke(model, [], "bench", "fast")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(call() for _ in range(calls)))
+    return latencies
+
+
+def main():
+    """Parse arguments and compare plain calls with hedged calls."""
+    parser = argparse.ArgumentParser(description="Benchmark tail latency with and without hedged requests")
+    parser.add_argument("--calls", type=int, default=400, help="Measured calls per configuration")
+    parser.add_argument("--concurrency", type=int, default=16, help="Calls in flight at once")
+    parser.add_argument("--median", type=float, default=0.2, help="Typical call latency in seconds")
+    parser.add_argument("--stall", type=float, default=2.0, help="Latency of a stalled call in seconds")
+    parser.add_argument("--stall-rate", type=float, default=0.03, help="Share of calls that stall")
+    parser.add_argument("--budget", type=float, default=0.1, help="Largest share of calls that may be hedged")
+    args = parser.parse_args()
+
+    for hedge in (False, True):
+        random.seed(7)
+        policy = CallPolicy(timeout=30, max_retries=0, hedge=hedge, hedge_min_samples=20, hedge_budget=args.budget)
+        model = TailLatencyModel(args.median, args.stall, args.stall_rate)
+        # Warm up the latency window the hedge delay is derived from
+        asyncio.run(run(policy, model, 50, args.concurrency))
+        model.requests = 0
+        latencies = asyncio.run(run(policy, model, args.calls, args.concurrency))
+        print(
+            f"hedge={'on ' if hedge else 'off'}  "
+            f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms  "
+            f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms  "
+            f"mean {statistics.mean(latencies) * 1000:7.1f} ms  "
+            f"requests/call {model.requests / args.calls:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark bounded session history against the previous unbounded lists.
+
+Simulates a long session without screenshots or model calls: every step
+records one completed task and two chat entries, the way the agents and
+update_screenshot do. Reports the time spent appending, the memory held by
+the histories at the end and the size of the progress text sent in the
+orchestration prompt.
+
+Usage:
+    python bench_history.py [--steps 1000] [--window 10]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from history import History, chat_label, render_progress
+
+
+def unbounded_session(steps: int) -> tuple:
+    """Run a session with growing lists rebuilt on every step; returns (tasks, chat)."""
+    tasks, chat = [], []
+    for step in range(steps):
+        chat = chat + [{"role": "orchestration_agent", "content": f"Generated task: Step {step} with description: Screen {step}"}]
+        chat = chat + [{"role": "coordinate_agent", "content": f"Generated coordinates ({step}, {step}) for task: Step {step}"}]
+        tasks = tasks + [f"Step {step}"]
+    return tasks, chat
+
+
+def bounded_session(steps: int, window: int) -> tuple:
+    """Run a session with bounded histories; returns (tasks, chat)."""
+    tasks, chat = History(capacity=window), History(capacity=2 * window)
+    for step in range(steps):
+        chat = chat.append({"role": "orchestration_agent", "content": f"Generated task: Step {step} with description: Screen {step}"}, chat_label)
+        chat = chat.append({"role": "coordinate_agent", "content": f"Generated coordinates ({step}, {step}) for task: Step {step}"}, chat_label)
+        tasks = tasks.append(f"Step {step}")
+    return tasks, chat
+
+
+def measure(name: str, run) -> None:
+    """Run one session and print time, retained memory and progress text size."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    tasks, chat = run()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if isinstance(tasks, History):
+        progress = render_progress(tasks)
+    else:
+        progress = "\n".join(f"- {task}" for task in tasks)
+    print(f"{name:>10} {elapsed * 1000:>9.1f} {retained / 1024:>11.1f} {len(chat):>6} {len(progress):>10}")
+
+
+def main():
+    """Parse arguments and compare both history implementations."""
+    parser = argparse.ArgumentParser(description="Benchmark bounded vs unbounded session history")
+    parser.add_argument("--steps", type=int, default=1000, help="Steps per simulated session")
+    parser.add_argument("--window", type=int, default=10, help="Tasks kept verbatim (HISTORY_WINDOW)")
+    args = parser.parse_args()
+
+    print(f"{args.steps} steps, window {args.window}")
+    print(f"{'history':>10} {'append ms':>9} {'retained KB':>11} {'chat':>6} {'prompt chr':>10}")
+    measure("unbounded", lambda: unbounded_session(args.steps))
+    measure("bounded", lambda: bounded_session(args.steps, args.window))
+
+
+if __name__ == "__main__":
+    main()
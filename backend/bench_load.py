@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Offline load benchmark for the step endpoints.
+
+Starts the backend in a subprocess with the fake LLM and TTS backends from
+fake_backends.py (fixed latency and payload size, no API keys), then drives N
+sessions in parallel, each one /initialize followed by a number of
+/update_screenshot calls, for several values of N. Sessions cycle through
+the bundled img.png and imgg.png plus synthetic 1080p and 4K frames, so
+consecutive steps always see a new screenshot. Every level gets a fresh
+server, so caches and memory start from the same point.
+
+Reports throughput, p50/p95/p99 step latency and the server's peak RSS per
+level. With zero fake latency the numbers are the server's own overhead.
+
+Usage:
+    python bench_load.py [--levels 1,4,16] [--steps 3] [--llm-latency 0] [--tts-latency 0]
+                         [--payload-chars 200] [--audio-kb 32] [--step-mode pipeline]
+"""
+
+import argparse
+import asyncio
+import base64
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+from bench_upload import RESOLUTIONS, synthetic_frame
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+
+def load_frames() -> List[str]:
+    """Base64 screenshots: the bundled images plus synthetic 1080p and 4K frames."""
+    frames = [(BACKEND_DIR / name).read_bytes() for name in ("img.png", "imgg.png")]
+    frames += [synthetic_frame(size) for size in RESOLUTIONS.values()]
+    return [base64.b64encode(frame).decode("utf-8") for frame in frames]
+
+
+def free_port() -> int:
+    """Pick a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def process_memory_mb(pid: int, field: str) -> Optional[float]:
+    """Read VmRSS (current) or VmHWM (peak) of a process in MB, or None where /proc is unavailable."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the backend on the fake backends (the subprocess side of the benchmark)."""
+    import uvicorn
+    from fake_backends import use_fake_backends
+    import main
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with use_fake_backends(
+        llm_latency=args.llm_latency,
+        tts_latency=args.tts_latency,
+        payload_chars=args.payload_chars,
+        audio_bytes=args.audio_kb * 1024,
+    ):
+        uvicorn.run(main.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def start_server(args: argparse.Namespace, port: int) -> subprocess.Popen:
+    """Start a server subprocess on the fake backends and wait until /health answers."""
+    command = [
+        sys.executable, str(BACKEND_DIR / "bench_load.py"), "--serve", "--port", str(port),
+        "--llm-latency", str(args.llm_latency), "--tts-latency", str(args.tts_latency),
+        "--payload-chars", str(args.payload_chars), "--audio-kb", str(args.audio_kb),
+    ]
+    env = dict(os.environ, STEP_MODE=args.step_mode)
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not start within 60 s")
+
+
+async def run_session(client: httpx.AsyncClient, frames: List[str], index: int, steps: int) -> tuple:
+    """
+    Run one session and return (latencies in seconds, failed requests).
+
+    Args:
+        client: HTTP client pointed at the server
+        frames: Base64 screenshots to cycle through
+        index: Session number; picks the starting frame and makes the query unique
+        steps: Number of /update_screenshot calls after /initialize
+    """
+    latencies, failures = [], 0
+
+    start = time.perf_counter()
+    response = await client.post("/initialize", json={
+        "user_query": f"Send an email to contact {index}",
+        "screenshot_base64": frames[index % len(frames)],
+    })
+    latencies.append(time.perf_counter() - start)
+    if response.status_code != 200:
+        return latencies, 1
+    session_id = response.json()["session_id"]
+
+    for step in range(1, steps + 1):
+        start = time.perf_counter()
+        response = await client.post("/update_screenshot", json={
+            "screenshot_base64": frames[(index + step) % len(frames)],
+            "session_id": session_id,
+        })
+        latencies.append(time.perf_counter() - start)
+        failures += response.status_code != 200
+
+    await client.post("/reset", params={"session_id": session_id})
+    return latencies, failures
+
+
+async def drive(port: int, frames: List[str], concurrency: int, steps: int) -> tuple:
+    """Run `concurrency` sessions in parallel; returns (latencies, failures, elapsed seconds)."""
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300, limits=limits) as client:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[run_session(client, frames, index, steps) for index in range(concurrency)])
+        elapsed = time.perf_counter() - start
+    latencies = [latency for session_latencies, _ in results for latency in session_latencies]
+    return latencies, sum(failures for _, failures in results), elapsed
+
+
+def percentiles(latencies: List[float]) -> tuple:
+    """p50, p95 and p99 of the latencies, in ms."""
+    if len(latencies) < 2:
+        value = latencies[0] * 1000 if latencies else 0.0
+        return value, value, value
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cuts[49] * 1000, cuts[94] * 1000, cuts[98] * 1000
+
+
+def format_mb(value: Optional[float]) -> str:
+    return f"{value:.0f}" if value is not None else "-"
+
+
+def main():
+    """Parse arguments and run the load benchmark for every concurrency level."""
+    parser = argparse.ArgumentParser(description="Offline load benchmark with fake LLM and TTS backends")
+    parser.add_argument("--levels", default="1,4,16", help="Comma-separated session counts")
+    parser.add_argument("--steps", type=int, default=3, help="/update_screenshot calls per session")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds per fake model call")
+    parser.add_argument("--tts-latency", type=float, default=0.0, help="Seconds before the first fake audio chunk")
+    parser.add_argument("--payload-chars", type=int, default=200, help="Length of the fake task descriptions")
+    parser.add_argument("--audio-kb", type=int, default=32, help="Size of every fake audio clip")
+    parser.add_argument("--step-mode", default="pipeline", choices=["pipeline", "fused", "plan"])
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    # Per-request client logs would drown the table
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    frames = load_frames()
+    print(
+        f"{'sessions':>8} {'requests':>8} {'failed':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'idle MB':>8} {'peak MB':>8}"
+    )
+    for level in [int(value) for value in args.levels.split(",")]:
+        port = free_port()
+        server = start_server(args, port)
+        try:
+            idle_mb = process_memory_mb(server.pid, "VmRSS")
+            latencies, failures, elapsed = asyncio.run(drive(port, frames, level, args.steps))
+            peak_mb = process_memory_mb(server.pid, "VmHWM")
+        finally:
+            server.terminate()
+            server.wait()
+        p50, p95, p99 = percentiles(latencies)
+        print(
+            f"{level:>8} {len(latencies):>8} {failures:>6} {len(latencies) / elapsed:>8.1f} {p50:>8.1f} "
+            f"{p95:>8.1f} {p99:>8.1f} {format_mb(idle_mb):>8} {format_mb(peak_mb):>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
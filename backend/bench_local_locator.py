@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the local locator fast path against the coordinate agent.
+
+For each task, reports whether the local locators (OCR / template matching)
+resolved it, their latency and coordinates. With --live, the coordinate
+agent is also called for every task so hit coordinates can be compared with
+the LLM's and fallback latency is visible (requires ANTHROPIC_API_KEY).
+
+Usage:
+    python bench_local_locator.py <image_path> --task "Click the 'Compose' button" [--task ...] [--live]
+
+Example:
+    LOCAL_LOCATOR_TEMPLATES=templates/ python bench_local_locator.py img.png \\
+        --task "Click the 'Compose' button" --task "Click on the search bar"
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+from image_processing import prepare_screenshot
+from local_locator import local_locator
+from state import create_initial_state
+
+
+async def llm_coordinates(state) -> tuple:
+    """Locate the task with the coordinate agent; returns ((x, y), seconds)."""
+    from coordinate_agent import get_coordinate_agent
+
+    start = time.perf_counter()
+    coordinates = await get_coordinate_agent().agenerate_coordinates(state)
+    return coordinates, time.perf_counter() - start
+
+
+def main():
+    """Parse arguments and run every task through the local locators."""
+    parser = argparse.ArgumentParser(description="Benchmark the local locator fast path")
+    parser.add_argument("image_path")
+    parser.add_argument("--task", action="append", required=True, help="Task text (repeatable)")
+    parser.add_argument("--live", action="store_true", help="Also call the coordinate agent for every task")
+    args = parser.parse_args()
+
+    image_path = Path(args.image_path)
+    if not image_path.exists():
+        print(f"❌ Image file not found: {image_path}")
+        sys.exit(1)
+    if not local_locator.enabled:
+        print("⚠️  No local locator available (install pytesseract + tesseract, or OpenCV with LOCAL_LOCATOR_TEMPLATES)")
+
+    image_data = image_path.read_bytes()
+    image = prepare_screenshot(image_data)
+    print(f"{'source':>9} {'local ms':>9} {'local xy':>12} {'llm s':>6} {'llm xy':>12}  task")
+    for task in args.task:
+        match, local_ms = local_locator.locate(image, task)
+        local_xy = f"{match.x},{match.y}" if match else "-"
+        llm_s, llm_xy = "-", "-"
+        if args.live:
+            state = create_initial_state(image_data, "Benchmark")
+            state["current_task"] = task
+            (x, y), seconds = asyncio.run(llm_coordinates(state))
+            llm_s, llm_xy = f"{seconds:.2f}", f"{x},{y}"
+        source = match.source if match else "llm"
+        print(f"{source:>9} {local_ms:>9.1f} {local_xy:>12} {llm_s:>6} {llm_xy:>12}  {task}")
+
+    stats = local_locator.stats()
+    print(f"\nHit rate: {stats['hit_rate']:.0%} of {stats['attempts']} tasks, avg {stats['avg_ms']:.1f} ms per attempt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark screenshot preprocessing settings.
+
+For every preset, reports the encoded size, preprocessing time and estimated
+image tokens. With --live, also sends the prepared image to the coordinate
+agent's model and reports the real latency and input tokens (requires
+ANTHROPIC_API_KEY).
+
+Usage:
+    python bench_preprocessing.py <image_path> [--live --task "Click on the search bar"] [--upscale 2]
+
+Example:
+    python bench_preprocessing.py img.png --upscale 2
+"""
+
+import argparse
+import asyncio
+import io
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+from image_processing import ImageSettings, estimate_image_tokens, prepare_screenshot
+from state import create_initial_state
+
+PRESETS = {
+    "original": ImageSettings(max_long_edge=None, max_pixels=None),
+    "1568-png": ImageSettings(max_long_edge=1568, max_pixels=1_150_000, format="png"),
+    "1280-jpeg": ImageSettings(max_long_edge=1280, max_pixels=None, format="jpeg", quality=85),
+    "1024-webp": ImageSettings(max_long_edge=1024, max_pixels=None, format="webp", quality=80),
+    "768-jpeg": ImageSettings(max_long_edge=768, max_pixels=None, format="jpeg", quality=75),
+}
+
+
+def upscale(image_data: bytes, factor: int) -> bytes:
+    """Upscale a screenshot to simulate a HiDPI / 4K capture."""
+    image = Image.open(io.BytesIO(image_data))
+    buffer = io.BytesIO()
+    image.resize((image.width * factor, image.height * factor)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def live_call(agent, state, prepared) -> dict:
+    """Send one prepared image to the coordinate model and collect latency and usage."""
+    start = time.perf_counter()
+    response = await agent.llm.ainvoke(agent._build_messages(state, prepared))
+    latency = time.perf_counter() - start
+    usage = getattr(response.get("raw"), "usage_metadata", None) or {}
+    x, y = prepared.to_original(*agent._coordinates_from_response(response))
+    return {"latency": latency, "input_tokens": usage.get("input_tokens", 0), "coordinates": (x, y)}
+
+
+async def run_presets(image_data: bytes, agent=None, state=None) -> None:
+    """Prepare the screenshot with every preset and print one row per preset."""
+    for name, settings in PRESETS.items():
+        start = time.perf_counter()
+        prepared = prepare_screenshot(image_data, settings)
+        prep_ms = (time.perf_counter() - start) * 1000
+        line = (
+            f"{name:>10} {f'{prepared.width}x{prepared.height}':>11} {len(prepared.data):>10} "
+            f"{prep_ms:>8.1f} {estimate_image_tokens(prepared.width, prepared.height):>10}"
+        )
+        if agent:
+            result = await live_call(agent, state, prepared)
+            line += f" {result['latency']:>10.2f} {result['input_tokens']:>12} {str(result['coordinates']):>14}"
+        print(line)
+
+
+def main():
+    """Parse arguments and benchmark every preset."""
+    parser = argparse.ArgumentParser(description="Benchmark screenshot preprocessing settings")
+    parser.add_argument("image_path")
+    parser.add_argument("--upscale", type=int, default=1, help="Upscale factor to simulate HiDPI captures")
+    parser.add_argument("--live", action="store_true", help="Also call the coordinate model")
+    parser.add_argument("--task", default="Click on the search bar")
+    args = parser.parse_args()
+
+    if not Path(args.image_path).exists():
+        print(f"❌ Image file not found: {args.image_path}")
+        sys.exit(1)
+    image_data = Path(args.image_path).read_bytes()
+    if args.upscale > 1:
+        image_data = upscale(image_data, args.upscale)
+
+    agent, state = None, None
+    if args.live:
+        from coordinate_agent import get_coordinate_agent
+        agent = get_coordinate_agent()
+        state = create_initial_state(image_data, "Benchmark")
+        state["current_task"] = args.task
+
+    header = f"{'preset':>10} {'size':>11} {'bytes':>10} {'prep ms':>8} {'est tokens':>10}"
+    if agent:
+        header += f" {'latency s':>10} {'input tokens':>12} {'coordinates':>14}"
+    print(header)
+    asyncio.run(run_presets(image_data, agent, state))
+
+
+if __name__ == "__main__":
+    main()
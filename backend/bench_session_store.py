@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark session memory with and without the session database.
+
+Creates a number of idle sessions that each finished one step on a 1080p
+screenshot (a few distinct frames shared between them, as when many users
+start from the same app), then reports the memory the session store
+accounts for, the disk used by the database, and the time to
+load every session back after a restart.
+
+Usage:
+    python bench_session_store.py [--sessions 200] [--frames 4]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from bench_upload import RESOLUTIONS, synthetic_frame
+from session_store import SessionDatabase, SessionStore
+from state import create_initial_state
+
+
+def fill_store(store: SessionStore, frames: list, sessions: int) -> tuple:
+    """Create sessions on the given frames and save one finished step each; returns (ids, save ms)."""
+    session_ids, save_seconds = [], 0.0
+    for index in range(sessions):
+        state = create_initial_state(frames[index % len(frames)], "Benchmark")
+        session = store.create(state)
+        state = state.copy()
+        state["current_task"] = "Click OK"
+        start = time.perf_counter()
+        store.save(session, state)
+        save_seconds += time.perf_counter() - start
+        session_ids.append(session.session_id)
+    return session_ids, save_seconds * 1000
+
+
+def directory_bytes(directory: str) -> int:
+    """Total size of the files under a directory."""
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names
+    )
+
+
+def main():
+    """Parse arguments and compare in-memory sessions with database-backed ones."""
+    parser = argparse.ArgumentParser(description="Benchmark session memory with and without the session database")
+    parser.add_argument("--sessions", type=int, default=200, help="Number of idle sessions")
+    parser.add_argument("--frames", type=int, default=4, help="Distinct screenshots shared by the sessions")
+    args = parser.parse_args()
+
+    # Every rendered frame has its own noise, so the frames are distinct
+    frames = [synthetic_frame(RESOLUTIONS["1080p"]) for _ in range(args.frames)]
+    unlimited = {"max_sessions": args.sessions, "max_memory_bytes": 1 << 40}
+
+    memory_store = SessionStore(**unlimited)
+    fill_store(memory_store, frames, args.sessions)
+    print(f"in memory:   {memory_store.stats()['memory_bytes'] / 1e6:8.1f} MB held")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.db")
+        database_store = SessionStore(**unlimited, database=SessionDatabase(path))
+        session_ids, save_ms = fill_store(database_store, frames, args.sessions)
+        stats = database_store.stats()
+        print(
+            f"with db:     {stats['memory_bytes'] / 1e6:8.1f} MB held, "
+            f"{directory_bytes(directory) / 1e6:.1f} MB on disk "
+            f"for {stats['stored_sessions']} sessions, "
+            f"{save_ms / args.sessions:.2f} ms per save"
+        )
+
+        restarted = SessionStore(**unlimited, database=SessionDatabase(path))
+        start = time.perf_counter()
+        loaded = sum(restarted.get(session_id) is not None for session_id in session_ids)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"restart:     {loaded} sessions loaded in {load_ms:.0f} ms ({load_ms / max(loaded, 1):.2f} ms each)")
+
+
+if __name__ == "__main__":
+    main()
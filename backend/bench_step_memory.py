@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-step screenshot memory and CPU cost.
+
+Runs one workflow step (screenshot update, orchestration, coordinates) with
+stand-in models so only local work is measured, and compares:
+
+- shared: the screenshot is prepared and base64 encoded once in the state
+  and reused by both agents (current behavior)
+- per-agent: no prepared payload in the state, so each agent prepares and
+  encodes the screenshot itself (previous behavior)
+
+Reports, for 1080p and 4K frames, the wall time of the step, the image
+bytes read, encoded and base64 encoded by screenshot preparation (the
+transient allocations this change removes), and the peak traced Python
+memory. No API keys are used and the response cache is disabled.
+
+Usage:
+    python bench_step_memory.py [image_path] [--runs 5]
+
+Example:
+    python bench_step_memory.py img.png
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import statistics
+import time
+import tracemalloc
+
+from PIL import Image
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "bench-key")
+
+import coordinate_agent
+import orchestration_agent
+import state as state_module
+from bench_upload import RESOLUTIONS, synthetic_frame
+from coordinate_agent import CoordinateAgent, Coordinates
+from orchestration_agent import OrchestrationAgent, Task_and_Description
+from image_processing import prepare_screenshot
+from state import create_initial_state, update_screenshot
+
+# Image bytes handled by prepare_screenshot since the last reset
+processed_bytes = [0]
+
+
+def counted_prepare(image_data, *args, **kwargs):
+    """prepare_screenshot wrapper that counts the bytes it reads and produces."""
+    prepared = prepare_screenshot(image_data, *args, **kwargs)
+    processed_bytes[0] += len(image_data) + len(prepared.data_base64)
+    if prepared.data is not image_data:
+        processed_bytes[0] += len(prepared.data)
+    return prepared
+
+
+class StubLLM:
+    """Structured output stand-in that returns a fixed response without a network call."""
+
+    def __init__(self, response):
+        self.response = response
+
+    async def ainvoke(self, messages):
+        return self.response
+
+
+async def run_step(state, orchestrator, locator, image_data: bytes) -> None:
+    """Run one step the way /update_screenshot does, without TTS."""
+    state = update_screenshot(state, image_data)
+    task, description = await orchestrator.agenerate_tasks(state)
+    state["current_task"], state["task_description"] = task, description
+    await locator.agenerate_coordinates(state)
+
+
+def measure(previous_frame: bytes, frame: bytes, shared: bool, runs: int) -> tuple:
+    """
+    Time one step repeatedly.
+
+    Args:
+        previous_frame: Screenshot the session was started with
+        frame: New screenshot sent for the step
+        shared: Whether the agents reuse the state's prepared payload
+        runs: Number of steps
+
+    Returns:
+        tuple: (median step seconds, image MB processed per step, peak traced MB)
+    """
+    # Without a shared payload in the state, each agent prepares the screenshot itself
+    original_prepare_or_none = state_module._prepare_or_none
+    if not shared:
+        state_module._prepare_or_none = lambda image_data: None
+    orchestrator = OrchestrationAgent()
+    orchestrator.llm = StubLLM(Task_and_Description(task="Click the button", description="Bench"))
+    locator = CoordinateAgent()
+    locator.llm = StubLLM({"raw": None, "parsed": Coordinates(x=10, y=20), "parsing_error": None})
+    state = create_initial_state(previous_frame, "Bench query")
+    state["current_task"] = "Open the page"
+
+    durations = []
+    peak = 0
+    processed_bytes[0] = 0
+    try:
+        for _ in range(runs):
+            tracemalloc.start()
+            start = time.perf_counter()
+            asyncio.run(run_step(state, orchestrator, locator, frame))
+            durations.append(time.perf_counter() - start)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    finally:
+        state_module._prepare_or_none = original_prepare_or_none
+    megabyte = 1024 * 1024
+    return statistics.median(durations), processed_bytes[0] / runs / megabyte, peak / megabyte
+
+
+def main():
+    """Parse arguments and benchmark both modes at each resolution."""
+    parser = argparse.ArgumentParser(description="Benchmark per-step screenshot memory")
+    parser.add_argument("image_path", nargs="?", help="Screenshot to resize to each resolution (synthetic if omitted)")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Measure local work only, counting every screenshot preparation
+    orchestration_agent.response_cache = None
+    coordinate_agent.response_cache = None
+    for module in (orchestration_agent, coordinate_agent, state_module):
+        module.prepare_screenshot = counted_prepare
+
+    source = Image.open(args.image_path).convert("RGB") if args.image_path else None
+    print(f"{'frame':>6} {'mode':>10} {'step ms':>9} {'image MB':>9} {'peak MB':>8}")
+    for label, size in RESOLUTIONS.items():
+        if source is None:
+            frame = synthetic_frame(size)
+        else:
+            buffer = io.BytesIO()
+            source.resize(size).save(buffer, format="PNG")
+            frame = buffer.getvalue()
+        previous_frame = synthetic_frame((size[0] // 2, size[1] // 2))
+
+        for mode in ("per-agent", "shared"):
+            duration, processed, peak = measure(previous_frame, frame, mode == "shared", args.runs)
+            print(f"{label:>6} {mode:>10} {duration * 1000:>9.1f} {processed:>9.1f} {peak:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
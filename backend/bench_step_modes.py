@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the two-agent pipeline against the fused single-call step mode.
+
+Runs the first step for a screenshot and query in each STEP_MODE and reports
+the median latency and the input/output tokens per step. The response cache
+is bypassed so every run calls the model (requires ANTHROPIC_API_KEY).
+
+Usage:
+    python bench_step_modes.py <image_path> <user_query> [--runs 3]
+
+Example:
+    python bench_step_modes.py img.png "Send an email to john@example.com"
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from coordinate_agent import get_coordinate_agent
+from fused_agent import Task_Description_and_Coordinates, get_fused_agent
+from orchestration_agent import Task_and_Description, get_orchestration_agent
+from state import create_initial_state
+
+
+def usage_of(response: dict) -> tuple:
+    """Return (input tokens, output tokens) from an include_raw structured output response."""
+    usage = getattr(response.get("raw"), "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+
+async def pipeline_step(state) -> tuple:
+    """Orchestration call followed by a coordinate call; returns (task, (x, y), tokens in, tokens out)."""
+    orchestrator = get_orchestration_agent()
+    locator = get_coordinate_agent()
+    image = state["prepared_image"]
+
+    planner = orchestrator.chat_model.with_structured_output(Task_and_Description, include_raw=True)
+    planned = await planner.ainvoke(orchestrator._build_messages(state, image))
+    state = state.copy()
+    state["current_task"] = planned["parsed"].task
+    state["task_description"] = planned["parsed"].description
+
+    located = await locator.llm.ainvoke(locator._build_messages(state, image))
+    coordinates = image.to_original(*locator._coordinates_from_response(located))
+
+    tokens_in, tokens_out = (a + b for a, b in zip(usage_of(planned), usage_of(located)))
+    return state["current_task"], coordinates, tokens_in, tokens_out
+
+
+async def fused_step(state) -> tuple:
+    """One fused call; returns (task, (x, y), tokens in, tokens out)."""
+    agent = get_fused_agent()
+    image = state["prepared_image"]
+
+    runnable = agent.chat_model.with_structured_output(Task_Description_and_Coordinates, include_raw=True)
+    response = await runnable.ainvoke(agent._build_messages(state, image))
+    parsed = response["parsed"]
+    return (parsed.task, image.to_original(parsed.x, parsed.y), *usage_of(response))
+
+
+async def run_mode(step, state, runs: int) -> list:
+    """Run one step function repeatedly and collect (latency, task, coordinates, tokens in, tokens out)."""
+    results = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        task, coordinates, tokens_in, tokens_out = await step(state)
+        results.append((time.perf_counter() - start, task, coordinates, tokens_in, tokens_out))
+    return results
+
+
+async def run_benchmark(state, runs: int) -> None:
+    """Benchmark both modes and print one row per mode."""
+    print(f"{'mode':>9} {'p50 s':>7} {'in tok':>7} {'out tok':>8}  last result")
+    for mode, step in (("pipeline", pipeline_step), ("fused", fused_step)):
+        results = await run_mode(step, state, runs)
+        latency, task, coordinates, tokens_in, tokens_out = results[-1]
+        print(
+            f"{mode:>9} {statistics.median(r[0] for r in results):>7.2f} "
+            f"{statistics.median(r[3] for r in results):>7.0f} {statistics.median(r[4] for r in results):>8.0f}  "
+            f"{coordinates} {task}"
+        )
+
+
+def main():
+    """Parse arguments and benchmark both step modes."""
+    parser = argparse.ArgumentParser(description="Benchmark pipeline vs fused step mode")
+    parser.add_argument("image_path")
+    parser.add_argument("user_query")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    image_path = Path(args.image_path)
+    if not image_path.exists():
+        print(f"❌ Image file not found: {image_path}")
+        sys.exit(1)
+
+    state = create_initial_state(image_path.read_bytes(), args.user_query)
+    asyncio.run(run_benchmark(state, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark buffered vs streaming text-to-speech on a running backend.
+
+Measures time-to-first-byte and total time for /tts/generate (the whole clip,
+base64 encoded, in one JSON response) and /tts/stream (MP3 chunks forwarded
+as they are synthesized). Each request uses a unique suffix so the audio
+cache is bypassed unless --cached is given.
+
+Usage:
+    python bench_tts.py [--url URL] [--runs 3] [--text "..."] [--cached]
+
+Example:
+    python main.py &
+    python bench_tts.py --runs 5
+"""
+
+import argparse
+import statistics
+import time
+
+import httpx
+
+
+def measure(client: httpx.Client, path: str, text: str) -> tuple:
+    """
+    Request audio from one endpoint and time it.
+
+    Args:
+        client: HTTP client pointed at the backend
+        path: Endpoint path
+        text: Text to synthesize
+
+    Returns:
+        tuple: (time to first byte, total time, response bytes)
+    """
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    with client.stream("POST", path, data={"text": text}) as response:
+        response.raise_for_status()
+        for chunk in response.iter_bytes():
+            if first_byte is None and chunk:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+    return first_byte or 0.0, time.perf_counter() - start, size
+
+
+def main():
+    """Parse arguments and benchmark both endpoints."""
+    parser = argparse.ArgumentParser(description="Benchmark buffered vs streaming TTS")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--text", default="Click on the search bar and type gmail dot com, then press enter.")
+    parser.add_argument("--cached", action="store_true", help="Reuse the same text so the audio cache is hit")
+    args = parser.parse_args()
+
+    print(f"{'endpoint':>14} {'ttfb p50 s':>11} {'total p50 s':>12} {'bytes':>9}")
+    with httpx.Client(base_url=args.url, timeout=120) as client:
+        for path in ("/tts/generate", "/tts/stream"):
+            results = []
+            for run in range(args.runs):
+                text = args.text if args.cached else f"{args.text} ({path} run {run} {time.time()})"
+                results.append(measure(client, path, text))
+            print(
+                f"{path:>14} {statistics.median(r[0] for r in results):>11.3f} "
+                f"{statistics.median(r[1] for r in results):>12.3f} {results[-1][2]:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark screenshot upload formats.
+
+Posts the same frame to an endpoint that parses it the way /initialize does
+(JSON + base64), the way /initialize/upload does (multipart) and the way
+/initialize/raw does (octet-stream), and reports the request size, the median
+time to parse the request into image bytes, the median request time and the
+peak memory traced over the whole in-process request (client encoding
+included). Agents are not called.
+
+Usage:
+    python bench_upload.py [image_path] [--runs 10]
+
+Example:
+    python bench_upload.py img.png
+"""
+
+import argparse
+import base64
+import io
+import statistics
+import time
+import tracemalloc
+
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+from main import InitialRequest, decode_screenshot
+
+# 1080p and 4K captures, as sent by the Electron client
+RESOLUTIONS = {"1080p": (1920, 1080), "4k": (3840, 2160)}
+
+# Parse times recorded by the endpoints below
+parse_seconds = []
+
+bench_app = FastAPI()
+
+
+@bench_app.post("/json")
+async def parse_json(request: Request):
+    """Parse a JSON body and decode its base64 screenshot, like /initialize."""
+    start = time.perf_counter()
+    payload = InitialRequest.model_validate_json(await request.body())
+    image_data = await decode_screenshot(payload.screenshot_base64)
+    parse_seconds.append(time.perf_counter() - start)
+    return {"bytes": len(image_data)}
+
+
+@bench_app.post("/upload")
+async def parse_upload(user_query: str = Form(...), screenshot: UploadFile = File(...)):
+    """Read a multipart screenshot, like /initialize/upload (form parsing happens before the body runs)."""
+    start = time.perf_counter()
+    image_data = await screenshot.read()
+    parse_seconds.append(time.perf_counter() - start)
+    return {"bytes": len(image_data)}
+
+
+@bench_app.post("/raw")
+async def parse_raw(request: Request, user_query: str):
+    """Read a raw octet-stream body, like /initialize/raw."""
+    start = time.perf_counter()
+    image_data = await request.body()
+    parse_seconds.append(time.perf_counter() - start)
+    return {"bytes": len(image_data)}
+
+
+def synthetic_frame(size: tuple) -> bytes:
+    """Render a screenshot-like PNG: flat panels with noisy "text" rows."""
+    width, height = size
+    image = Image.new("RGB", size, (245, 245, 245))
+    noise = Image.effect_noise((width // 2, 12), 90).convert("RGB")
+    for top in range(40, height - 40, 36):
+        image.paste(noise, (40, top))
+    image.paste((30, 90, 200), (0, 0, width, 32))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def request_kwargs(variant: str, image_data: bytes) -> dict:
+    """Build the TestClient arguments for one upload variant."""
+    if variant == "json":
+        body = {"user_query": "Benchmark", "screenshot_base64": base64.b64encode(image_data).decode("utf-8")}
+        return {"json": body}
+    if variant == "upload":
+        return {"data": {"user_query": "Benchmark"}, "files": {"screenshot": ("screen.png", image_data, "image/png")}}
+    return {
+        "params": {"user_query": "Benchmark"},
+        "content": image_data,
+        "headers": {"Content-Type": "application/octet-stream"},
+    }
+
+
+def measure(client: TestClient, variant: str, image_data: bytes, runs: int) -> tuple:
+    """
+    Post one frame repeatedly with one variant.
+
+    Args:
+        client: Test client for the benchmark app
+        variant: "json", "upload" or "raw"
+        image_data: Encoded screenshot
+        runs: Number of requests
+
+    Returns:
+        tuple: (median parse seconds, median request seconds, peak traced MB)
+    """
+    parse_seconds.clear()
+    totals = []
+    peak = 0
+    for _ in range(runs):
+        kwargs = request_kwargs(variant, image_data)
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = client.post(f"/{variant}", **kwargs)
+        totals.append(time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        response.raise_for_status()
+    return statistics.median(parse_seconds), statistics.median(totals), peak / (1024 * 1024)
+
+
+def main():
+    """Parse arguments and benchmark each variant at each resolution."""
+    parser = argparse.ArgumentParser(description="Benchmark screenshot upload formats")
+    parser.add_argument("image_path", nargs="?", help="Screenshot to resize to each resolution (synthetic if omitted)")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    source = Image.open(args.image_path).convert("RGB") if args.image_path else None
+    client = TestClient(bench_app)
+
+    print(f"{'frame':>6} {'variant':>7} {'png KB':>8} {'body KB':>8} {'parse ms':>9} {'request ms':>11} {'peak MB':>8}")
+    for label, size in RESOLUTIONS.items():
+        if source is None:
+            image_data = synthetic_frame(size)
+        else:
+            buffer = io.BytesIO()
+            source.resize(size).save(buffer, format="PNG")
+            image_data = buffer.getvalue()
+
+        for variant in ("json", "upload", "raw"):
+            body_size = len(image_data) * 4 / 3 if variant == "json" else len(image_data)
+            parse, total, peak = measure(client, variant, image_data, args.runs)
+            print(
+                f"{label:>6} {variant:>7} {len(image_data) / 1024:>8.0f} {body_size / 1024:>8.0f} "
+                f"{parse * 1000:>9.2f} {total * 1000:>11.2f} {peak:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark the overhead of the compiled step workflow.
+
+Runs workflow steps with instant agent and TTS stand-ins, so only the graph
+and checkpointing cost is measured, with WORKFLOW_CHECKPOINTER=memory and
+without checkpoints, for 1080p and 4K screenshots.
+
+Usage:
+    python bench_workflow.py [--steps 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "bench-key")
+
+import workflow
+from bench_upload import RESOLUTIONS, synthetic_frame
+from state import create_initial_state
+
+
+async def instant_orchestration(state):
+    state = state.copy()
+    state["current_task"] = "Click OK"
+    state["task_description"] = "Dialog"
+    return state
+
+
+async def instant_coordinates(state):
+    state = state.copy()
+    state["coordinates"] = (10, 20)
+    return state
+
+
+async def instant_audio(text, voice_id=workflow.DEFAULT_VOICE_ID):
+    return None
+
+
+async def run_steps(state, steps: int) -> list:
+    """Run `steps` workflow steps on one thread and return their durations in ms."""
+    durations = []
+    for _ in range(steps):
+        start = time.perf_counter()
+        await workflow.run_step(state, "bench-thread")
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def main():
+    """Parse arguments and measure per-step workflow overhead."""
+    parser = argparse.ArgumentParser(description="Benchmark the step workflow overhead")
+    parser.add_argument("--steps", type=int, default=50, help="Steps per configuration")
+    args = parser.parse_args()
+
+    workflow.aorchestration_agent_node = instant_orchestration
+    workflow.acoordinate_agent_node = instant_coordinates
+    workflow.generate_audio_for_text = instant_audio
+    memory_saver = workflow.checkpointer or workflow._env_checkpointer()
+
+    print(f"{'resolution':>10} {'checkpointer':>12} {'p50 ms':>8} {'max ms':>8}")
+    for name, size in RESOLUTIONS.items():
+        state = create_initial_state(synthetic_frame(size), "Benchmark")
+        for label, saver in (("none", None), ("memory", memory_saver)):
+            workflow.configure_checkpointer(saver)
+            durations = asyncio.run(run_steps(state, args.steps))
+            print(f"{name:>10} {label:>12} {statistics.median(durations):>8.2f} {max(durations):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Content-addressed caches with an in-memory LRU tier and an optional SQLite tier.
+
+Keys are digests of everything a result depends on (screenshot bytes, prompt
+inputs, model), so identical calls made by retries, reconnects or repeated
+demo flows are answered locally instead of paying for another round trip.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+from dotenv import load_dotenv
+from metrics import CACHE_LOOKUPS
+
+# Load environment variables from .env file
+load_dotenv()
+
+
+def cache_key(*parts: Union[str, bytes, None]) -> str:
+    """
+    Build a cache key from the inputs a cached value depends on.
+
+    Args:
+        parts: Strings or bytes identifying the computation, in a fixed order
+
+    Returns:
+        str: Hex SHA-256 digest of the parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        # Length prefix so ("ab", "c") and ("a", "bc") never collide
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class TieredCache:
+    """
+    Byte-value cache with an in-memory LRU tier and an optional on-disk tier.
+
+    Both tiers are bounded by total value size; the least recently used
+    entries are evicted first. Disk hits are promoted to memory.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_memory_bytes: int = 16 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.name = name
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a value, checking memory first and then disk.
+
+        Args:
+            key: Cache key from cache_key()
+
+        Returns:
+            Optional[bytes]: Cached value, or None on a miss
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._counters["hits"] += 1
+                self._counters["memory_hits"] += 1
+                CACHE_LOOKUPS.inc(cache=self.name, result="memory_hit")
+                return value
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value = bytes(row[0])
+                    self._db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._store_memory_locked(key, value)
+                    self._counters["hits"] += 1
+                    self._counters["disk_hits"] += 1
+                    CACHE_LOOKUPS.inc(cache=self.name, result="disk_hit")
+                    return value
+
+            self._counters["misses"] += 1
+            CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        """
+        Store a value in every tier.
+
+        Args:
+            key: Cache key from cache_key()
+            value: Value to cache
+        """
+        with self._lock:
+            self._store_memory_locked(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, value, len(value), time.time()),
+                )
+                self._evict_disk_locked()
+                self._db.commit()
+
+    async def aget(self, key: str) -> Optional[bytes]:
+        """
+        Async version of get; with a disk tier, the lookup runs in a worker
+        thread so SQLite reads do not block the event loop.
+
+        Args:
+            key: Cache key from cache_key()
+
+        Returns:
+            Optional[bytes]: Cached value, or None on a miss
+        """
+        if self._db is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: bytes) -> None:
+        """
+        Async version of set; with a disk tier, the write runs in a worker thread.
+
+        Args:
+            key: Cache key from cache_key()
+            value: Value to cache
+        """
+        if self._db is None:
+            self.set(key, value)
+            return
+        await asyncio.to_thread(self.set, key, value)
+
+    def get_json(self, key: str) -> Any:
+        """Look up a JSON-encoded value; returns None on a miss."""
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value."""
+        self.set(key, json.dumps(value).encode("utf-8"))
+
+    async def aget_json(self, key: str) -> Any:
+        """Async version of get_json."""
+        value = await self.aget(key)
+        return json.loads(value) if value is not None else None
+
+    async def aset_json(self, key: str, value: Any) -> None:
+        """Async version of set_json."""
+        await self.aset(key, json.dumps(value).encode("utf-8"))
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current size of each tier."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+            if self._db is not None:
+                count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+                stats["disk_entries"] = count
+                stats["disk_bytes"] = size
+            return stats
+
+    def _store_memory_locked(self, key: str, value: bytes) -> None:
+        """Insert into the memory tier and evict LRU entries over the byte budget."""
+        if len(value) > self.max_memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = value
+        self._memory_bytes += len(value)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters["evictions"] += 1
+
+    def _evict_disk_locked(self) -> None:
+        """Delete the least recently used disk entries until under the byte budget."""
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if total <= self.max_disk_bytes:
+            return
+        excess = total - self.max_disk_bytes
+        freed = 0
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        self._counters["evictions"] += len(doomed)
+
+
+def _env_cache(prefix: str, default_memory_mb: int) -> Optional[TieredCache]:
+    """Build a cache from <prefix>_* environment variables, or None if disabled."""
+    if os.getenv(f"{prefix}_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    return TieredCache(
+        name=prefix.lower(),
+        max_memory_bytes=int(os.getenv(f"{prefix}_MEMORY_MB", str(default_memory_mb))) * 1024 * 1024,
+        disk_path=os.getenv(f"{prefix}_PATH") or None,
+        max_disk_bytes=int(os.getenv(f"{prefix}_DISK_MB", "256")) * 1024 * 1024,
+    )
+
+
+# Cache for orchestration / coordinate agent results
+response_cache = _env_cache("RESPONSE_CACHE", default_memory_mb=16)
+
+# Cache for synthesized speech, keyed by text, voice and model
+audio_cache = _env_cache("TTS_CACHE", default_memory_mb=64)
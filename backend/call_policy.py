@@ -0,0 +1,289 @@
+"""
+Deadlines, retries and hedged requests for model calls.
+
+Every model call made through ModelTiers goes through the shared CallPolicy:
+
+- Deadline: an attempt that takes longer than LLM_CALL_TIMEOUT_SECONDS is
+  cancelled (async) or aborted by the client's request timeout (sync).
+- Retries: timeouts, connection errors, rate limits and server errors are
+  retried up to LLM_MAX_RETRIES times after a jittered exponential backoff.
+  Other errors (bad requests, parsing failures) are raised immediately.
+- Hedging (async calls, LLM_HEDGE=true): when an attempt is still running
+  after the p95 latency of recent calls of the same agent and tier, an
+  identical duplicate request is sent. The first answer wins and the other
+  request is cancelled. At most LLM_HEDGE_BUDGET of the calls are hedged, so
+  the extra spend stays bounded. A cancelled request never reports its
+  usage, so its tokens are billed but missing from the usage accounting:
+  with hedging on, token and cost totals (and session budgets) under-report
+  by up to one call's tokens per hedged call that got an answer (outcome
+  "won" or "lost" in llm_hedges_total).
+
+The agents' chat models are built with the SDK's own retries disabled and
+LLM_CALL_TIMEOUT_SECONDS as their request timeout, so this policy is the only
+retry budget.
+
+awarm_up_model() pings the API through a client of its own, so startup checks
+the key and connectivity without reaching into the chat models' private clients.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import anthropic
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage
+
+from metrics import Counter, register
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LLM_CALL_TIMEOUT_SECONDS = float(os.getenv("LLM_CALL_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BACKOFF_SECONDS = float(os.getenv("LLM_RETRY_BACKOFF_SECONDS", "0.5"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() in ("1", "true", "yes")
+# Successful calls of an agent and tier needed before their p95 is trusted as the hedge delay
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# Largest share of calls that may be hedged
+LLM_HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.1"))
+
+# Recent latencies kept per agent and tier for the hedge delay
+LATENCY_WINDOW = 200
+
+# Options for the agents' chat models: the SDK's own retries are off, so CallPolicy is the only retry budget
+CLIENT_OPTIONS = {"default_request_timeout": LLM_CALL_TIMEOUT_SECONDS, "max_retries": 0}
+
+# HTTP statuses worth another attempt: timeout, conflict, rate limit, overloaded and server errors
+RETRYABLE_STATUS = (408, 409, 429)
+
+LLM_RETRIES = register(Counter("llm_retries_total", "Model call attempts retried, by agent, tier and reason.", ("agent", "tier", "reason")))
+LLM_HEDGES = register(Counter(
+    "llm_hedges_total", "Hedged duplicate requests by agent, tier and outcome (won, lost, failed).", ("agent", "tier", "outcome")
+))
+LLM_DEADLINES_EXCEEDED = register(
+    Counter("llm_deadlines_exceeded_total", "Model call attempts cancelled at their deadline.", ("agent", "tier"))
+)
+
+
+# Client for the startup ping, created on first use
+_warm_up_client: Optional[anthropic.AsyncAnthropic] = None
+
+
+async def awarm_up_model(model: str) -> None:
+    """
+    Count the tokens of a one-word prompt for a model, which checks the API key
+    and resolves and connects to the API before the first user arrives.
+
+    Args:
+        model: Model the agent calls
+    """
+    global _warm_up_client
+    if _warm_up_client is None:
+        _warm_up_client = anthropic.AsyncAnthropic(timeout=LLM_CALL_TIMEOUT_SECONDS, max_retries=0)
+    await _warm_up_client.messages.count_tokens(model=model, messages=[{"role": "user", "content": "ping"}])
+
+
+def retry_reason(error: BaseException) -> Optional[str]:
+    """
+    Classify an error of a model call attempt.
+
+    Args:
+        error: Exception raised by the attempt
+
+    Returns:
+        Optional[str]: Reason to retry ("timeout", "connection", "status_<code>"), or None if retrying cannot help
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or type(error).__name__ == "APITimeoutError":
+        return "timeout"
+    if type(error).__name__ == "APIConnectionError":
+        return "connection"
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and (status in RETRYABLE_STATUS or status >= 500):
+        return f"status_{status}"
+    return None
+
+
+class CallPolicy:
+    """
+    Deadline, retry and hedging policy for model calls, with the recent
+    latencies per agent and tier that the hedge delay is derived from.
+    """
+
+    def __init__(
+        self,
+        timeout: float = LLM_CALL_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff: float = LLM_RETRY_BACKOFF_SECONDS,
+        hedge: bool = LLM_HEDGE,
+        hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        hedge_budget: float = LLM_HEDGE_BUDGET,
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_budget = hedge_budget
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+        self._counters = {"calls": 0, "retries": 0, "deadlines_exceeded": 0, "hedges": 0, "hedges_won": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _observe(self, agent: str, tier: str, elapsed: float) -> None:
+        with self._lock:
+            self._latencies.setdefault((agent, tier), deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+
+    def hedge_delay(self, agent: str, tier: str) -> Optional[float]:
+        """
+        Seconds to wait before hedging a call, or None if it must not be hedged.
+
+        Calls are hedged after the p95 latency of the agent and tier's recent
+        calls, once there are enough of them and the hedge budget allows it.
+        """
+        if not self.hedge:
+            return None
+        with self._lock:
+            latencies = sorted(self._latencies.get((agent, tier), ()))
+            over_budget = self._counters["hedges"] >= self.hedge_budget * max(self._counters["calls"], 1)
+        if over_budget or len(latencies) < max(self.hedge_min_samples, 1):
+            return None
+        return latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)]
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full jitter: uniform between 0 and the exponential backoff of the attempt."""
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def _should_retry(self, error: BaseException, attempt: int, agent: str, tier: str) -> bool:
+        reason = retry_reason(error)
+        if reason is None or attempt >= self.max_retries:
+            return False
+        LLM_RETRIES.inc(agent=agent, tier=tier, reason=reason)
+        self._count("retries")
+        logger.debug("%s (%s): attempt %d failed (%s), retrying", agent, tier, attempt + 1, reason)
+        return True
+
+    def invoke(self, runnable: Any, messages: List[BaseMessage], agent: str, tier: str) -> Any:
+        """
+        Call a model with retries. The deadline is the chat model's request
+        timeout; sync calls are never hedged, because a losing thread cannot be cancelled.
+
+        Args:
+            runnable: Structured output runnable to call
+            messages: Prompt
+            agent: Agent name for metrics and latency tracking
+            tier: Model tier for metrics and latency tracking
+
+        Returns:
+            The runnable's answer
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = runnable.invoke(messages)
+            except Exception as e:
+                if retry_reason(e) == "timeout":
+                    LLM_DEADLINES_EXCEEDED.inc(agent=agent, tier=tier)
+                    self._count("deadlines_exceeded")
+                if not self._should_retry(e, attempt, agent, tier):
+                    raise
+                time.sleep(self._backoff_delay(attempt))
+                attempt += 1
+                continue
+            self._observe(agent, tier, time.perf_counter() - start)
+            return response
+
+    async def _ahedged(self, runnable: Any, messages: List[BaseMessage], agent: str, tier: str) -> Any:
+        """One attempt: the request, plus a duplicate if it outlives the hedge delay. First answer wins."""
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(runnable.ainvoke(messages))
+        tasks = [primary]
+        try:
+            delay = self.hedge_delay(agent, tier)
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self._count("hedges")
+                    tasks.append(asyncio.ensure_future(runnable.ainvoke(messages)))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    if len(tasks) > 1:
+                        won = task is not primary
+                        LLM_HEDGES.inc(agent=agent, tier=tier, outcome="won" if won else "lost")
+                        if won:
+                            self._count("hedges_won")
+                    self._observe(agent, tier, time.perf_counter() - start)
+                    return task.result()
+            if len(tasks) > 1:
+                LLM_HEDGES.inc(agent=agent, tier=tier, outcome="failed")
+            raise error
+        finally:
+            # Cancel whichever request lost (or both, at the deadline)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def ainvoke(self, runnable: Any, messages: List[BaseMessage], agent: str, tier: str) -> Any:
+        """
+        Call a model with a deadline per attempt, retries and optional hedging.
+
+        Args:
+            runnable: Structured output runnable to call
+            messages: Prompt
+            agent: Agent name for metrics and latency tracking
+            tier: Model tier for metrics and latency tracking
+
+        Returns:
+            The first answer that arrives
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                return await asyncio.wait_for(self._ahedged(runnable, messages, agent, tier), self.timeout)
+            except asyncio.TimeoutError as e:
+                LLM_DEADLINES_EXCEEDED.inc(agent=agent, tier=tier)
+                self._count("deadlines_exceeded")
+                logger.warning("%s (%s): no answer within %.1fs", agent, tier, self.timeout)
+                if not self._should_retry(e, attempt, agent, tier):
+                    raise
+            except Exception as e:
+                if not self._should_retry(e, attempt, agent, tier):
+                    raise
+            await asyncio.sleep(self._backoff_delay(attempt))
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls, retries, deadlines exceeded and hedges since startup, with the current hedge delays."""
+        with self._lock:
+            stats = dict(self._counters)
+            keys = list(self._latencies)
+        stats["hedge_rate"] = stats["hedges"] / stats["calls"] if stats["calls"] else 0.0
+        stats["hedge_delays_ms"] = {
+            f"{agent}/{tier}": round(delay * 1000, 1)
+            for agent, tier in keys
+            if (delay := self.hedge_delay(agent, tier)) is not None
+        }
+        return stats
+
+
+# Global policy instance shared by every agent
+call_policy = CallPolicy()
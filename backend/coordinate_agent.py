@@ -1,11 +1,21 @@
-import base64
+import asyncio
 import os
 import re
-from typing import Tuple
+import threading
+import time
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
 from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from state import AgentState
+from image_processing import DEFAULT_IMAGE_SETTINGS, ImageSettings, PreparedImage, prepare_screenshot
+from cache import cache_key, response_cache
+from history import chat_label
+from local_locator import LocatorMatch, local_locator
+from metrics import COORDINATE_PARSE_FALLBACKS, LOCATOR_RESOLUTIONS, LOCATOR_SECONDS
+from call_policy import CLIENT_OPTIONS, awarm_up_model
+from model_tiers import ModelTiers
+from prompt_cache import prompt_cache_usage
 from pydantic import BaseModel, Field
 
 
@@ -13,9 +23,47 @@ class Coordinates(BaseModel):
     x: int = Field(..., description="The x coordinate to click/interact with. Must be an integer.")
     y: int = Field(..., description="The y coordinate to click/interact with. Must be an integer.")
 
+
+class Located_Element(BaseModel):
+    visible: bool = Field(..., description="Whether the UI element needed for the task is visible on the screenshot.")
+    x: int = Field(..., description="The x coordinate to click/interact with. Must be an integer. 0 if not visible.")
+    y: int = Field(..., description="The y coordinate to click/interact with. Must be an integer. 0 if not visible.")
+
 # Load environment variables from .env file
 load_dotenv()
 
+# "single": one pass on the prepared screenshot
+# "coarse_to_fine": a pass on a heavily downscaled screenshot picks the region,
+#                   then a pass on a full-resolution crop around it refines the point
+COORDINATE_MODE = os.getenv("COORDINATE_MODE", "single").lower()
+COARSE_MAX_EDGE = int(os.getenv("COARSE_MAX_EDGE", "768"))
+FINE_CROP_SIZE = int(os.getenv("FINE_CROP_SIZE", "512"))
+
+# Instructions are constant across calls;
+# the task, its context and the screenshot follow in the user message
+COORDINATE_SYSTEM_PROMPT = """You are an AI coordinate generation agent that analyzes screenshots and specific tasks to determine precise coordinates for UI interactions.
+
+Your job is to:
+1. Analyze the provided screenshot to identify UI elements
+2. Understand the specific task, given with its context in the user message
+3. Locate the exact UI element that needs to be interacted with for this task
+4. Provide the precise x and y coordinates for the center of that UI element
+
+Guidelines:
+- Look for the specific UI element mentioned in the task (button, field, link, etc.)
+- Return coordinates for the CENTER of the target element
+- Coordinates should be precise enough for a mouse click or touch interaction
+- If multiple similar elements exist, choose the most logical one based on the task context
+- Consider typical UI patterns and user expectations
+
+IMPORTANT: You must return the x and y coordinates as separate integer fields. Example format:
+x: 1198
+y: 252"""
+
+LOCATE_SYSTEM_PROMPT = COORDINATE_SYSTEM_PROMPT + """
+
+The task comes from a plan made on an earlier screenshot. If the UI element it needs is NOT visible on this screenshot (for example, the screen is not what the plan expected), set visible to false."""
+
 
 class CoordinateAgent:
     """
@@ -23,14 +71,37 @@ class CoordinateAgent:
     precise coordinates for UI interaction.
     """
     
-    def __init__(self, model_name: str = "claude-sonnet-4-20250514"):
+    def __init__(self, model_name: Optional[str] = None, mode: Optional[str] = None, tier: Optional[str] = None):
         # Verify Anthropic API key is available
         if not os.getenv("ANTHROPIC_API_KEY"):
             raise ValueError("ANTHROPIC_API_KEY environment variable is required. Please add it to your .env file.")
         
-        self.llm = ChatAnthropic(model=model_name).with_structured_output(Coordinates, include_raw=True)
+        self.tiers = ModelTiers("coordinate", tier, model_name)
+        self.chat_model = ChatAnthropic(model=self.tiers.model, callbacks=[prompt_cache_usage("coordinate")], **CLIENT_OPTIONS)
+        self.llm = self.chat_model.with_structured_output(Coordinates, include_raw=True)
+        self.locator = self.chat_model.with_structured_output(Located_Element)
+        
+        # Stronger model for answers of a cheaper tier that fail validation
+        self.escalation_model = self.escalation_llm = self.escalation_locator = None
+        if self.tiers.escalation_model:
+            self.escalation_model = ChatAnthropic(model=self.tiers.escalation_model, callbacks=[prompt_cache_usage("coordinate")], **CLIENT_OPTIONS)
+            self.escalation_llm = self.escalation_model.with_structured_output(Coordinates, include_raw=True)
+            self.escalation_locator = self.escalation_model.with_structured_output(Located_Element)
+        
+        self.mode = mode or COORDINATE_MODE
+        self.coarse_settings = ImageSettings(
+            max_long_edge=COARSE_MAX_EDGE,
+            max_pixels=None,
+            format=DEFAULT_IMAGE_SETTINGS.format,
+            quality=DEFAULT_IMAGE_SETTINGS.quality,
+        )
+        self.fine_crop_size = FINE_CROP_SIZE
         # self.llm = ChatGoogleGenerativeAI(model=model_name).with_structured_output(Coordinates, include_raw=True)
 
+    async def awarm_up(self) -> None:
+        """Check the API key and connect to the Anthropic API ahead of the first request."""
+        await awarm_up_model(self.chat_model.model)
+
     def _parse_coordinates_from_text(self, text: str) -> Tuple[int, int]:
         """
         Parse coordinates from text content when structured output fails.
@@ -56,95 +127,418 @@ class CoordinateAgent:
         # If no pattern matches, return center of screen as fallback
         return (640, 360)
 
-    def generate_coordinates(self, state: AgentState) -> Tuple[int, int]:
+    def _build_request(self, state: AgentState, image: PreparedImage, note: str = "") -> HumanMessage:
         """
-        Generate coordinates based on the current task and screenshot.
+        Build the per-step part of a prompt: the task, its context and the screenshot.
         
         Args:
             state: Current agent state containing task and screenshot
+            image: Preprocessed screenshot to attach
+            note: Extra instructions about this particular image
             
         Returns:
-            Tuple[int, int]: (x, y) coordinates for the action
+            HumanMessage: Message with the dynamic inputs and the screenshot
         """
-        if not state["screenshot_image"] or not state["current_task"]:
-            return (0, 0)
-        
-        # Convert image bytes to base64 for the LLM
-        image_base64 = base64.b64encode(state["screenshot_image"]).decode('utf-8')
-        
         # Create the message with multimodal content
-        message = HumanMessage(
+        return HumanMessage(
             content=[
                 {
                     "type": "text",
-                    "text": f"""You are an AI coordinate generation agent that analyzes screenshots and specific tasks to determine precise coordinates for UI interactions.
-
-Your job is to:
-1. Analyze the provided screenshot to identify UI elements
-2. Understand the specific task: "{state["current_task"]}"
-3. Locate the exact UI element that needs to be interacted with for this task
-4. Provide the precise x and y coordinates for the center of that UI element
+                    "text": f"""Current task to locate: "{state["current_task"]}"
 
-Task Context: {state.get("task_description", "No additional context")}
-
-Guidelines:
-- Look for the specific UI element mentioned in the task (button, field, link, etc.)
-- Return coordinates for the CENTER of the target element
-- Coordinates should be precise enough for a mouse click or touch interaction
-- If multiple similar elements exist, choose the most logical one based on the task context
-- Consider typical UI patterns and user expectations
-
-Current task to locate: "{state["current_task"]}"
-
-IMPORTANT: You must return the x and y coordinates as separate integer fields. Example format:
-x: 1198
-y: 252"""
+Task Context: {state.get("task_description", "No additional context")}{note}"""
                 },
                 {
                     "type": "image",
                     "source_type": "base64",
-                    "data": image_base64,
-                    "mime_type": "image/png"
+                    "data": image.data_base64,
+                    "mime_type": image.mime_type
                 }
             ]
         )
+
+    def _build_messages(self, state: AgentState, image: PreparedImage) -> List[BaseMessage]:
+        """
+        Build the coordinate prompt: cached instructions, then the per-step inputs.
+        
+        Args:
+            state: Current agent state containing task and screenshot
+            image: Preprocessed screenshot to attach
+            
+        Returns:
+            List[BaseMessage]: System prompt and user message
+        """
+        return [SystemMessage(content=COORDINATE_SYSTEM_PROMPT), self._build_request(state, image)]
+        
+    def _coordinates_from_response(self, response: dict) -> Tuple[int, int]:
+        """
+        Extract coordinates from a structured output response (with include_raw=True).
+        
+        Args:
+            response: Dict with "raw", "parsed" and "parsing_error" keys
+            
+        Returns:
+            Tuple[int, int]: (x, y) coordinates for the action
+        """
+        # Check if we got a parsing error
+        if response.get("parsing_error"):
+            print(f"Parsing error occurred: {response['parsing_error']}")
+            COORDINATE_PARSE_FALLBACKS.inc(reason="parsing_error")
+            # Try to parse coordinates from raw content
+            raw_content = str(response["raw"].content) if response.get("raw") else ""
+            return self._parse_coordinates_from_text(raw_content)
+        
+        # Check if we got parsed coordinates
+        if response.get("parsed"):
+            parsed = response["parsed"]
+            return (parsed.x, parsed.y)
+        
+        # If no parsed result, try to extract from raw content
+        if response.get("raw"):
+            COORDINATE_PARSE_FALLBACKS.inc(reason="unparsed")
+            raw_content = str(response["raw"].content)
+            return self._parse_coordinates_from_text(raw_content)
+            
+        # Fallback - shouldn't reach here with include_raw=True
+        return (640, 360)
+
+    @staticmethod
+    def _rejection(response: dict, image: PreparedImage) -> Optional[str]:
+        """
+        Check a coordinate answer before accepting it from a cheaper model tier.
+        
+        Args:
+            response: Structured output response (with include_raw=True)
+            image: Screenshot the coordinates refer to
+            
+        Returns:
+            Optional[str]: Why the answer should be escalated, or None to accept it
+        """
+        # Unparsed answers end in text parsing, and in the (640, 360) fallback without numbers
+        if response.get("parsing_error") or not response.get("parsed"):
+            return "parsing_error"
+        if not image.contains(response["parsed"].x, response["parsed"].y):
+            return "out_of_bounds"
+        return None
+
+    @staticmethod
+    def _locate_rejection(response: Located_Element, image: PreparedImage) -> Optional[str]:
+        """Why a visible element's location should be escalated, or None to accept it."""
+        if response.visible and not image.contains(response.x, response.y):
+            return "out_of_bounds"
+        return None
+
+    def _coordinates_from_error(self, e: Exception) -> Tuple[int, int]:
+        """Recover coordinates from a failed model call, falling back to the screen center."""
+        print(f"Error generating coordinates: {e}")
+        COORDINATE_PARSE_FALLBACKS.inc(reason="call_error")
+        # Try to extract coordinates from error message if it contains them
+        error_str = str(e)
+        if "1198, 252" in error_str or "x=" in error_str.lower():
+            return self._parse_coordinates_from_text(error_str)
+        return (640, 360)
+
+    def _cache_key(self, state: AgentState, image: PreparedImage) -> str:
+        """Key identifying a coordinate call by everything its answer depends on."""
+        return cache_key(
+            "coordinates",
+            self.chat_model.model,
+            COORDINATE_SYSTEM_PROMPT,
+            repr(DEFAULT_IMAGE_SETTINGS),
+            image.digest,
+            state["current_task"],
+            state.get("task_description"),
+        )
+
+    def generate_coordinates(self, state: AgentState) -> Tuple[int, int]:
+        """
+        Generate coordinates based on the current task and screenshot.
+        
+        Args:
+            state: Current agent state containing task and screenshot
+            
+        Returns:
+            Tuple[int, int]: (x, y) coordinates for the action
+        
+        Raises:
+            ValueError: In coarse_to_fine mode, which only agenerate_coordinates supports
+        """
+        if self.mode == "coarse_to_fine":
+            raise ValueError("coarse_to_fine mode is only supported by agenerate_coordinates")
+        if not state["screenshot_image"] or not state["current_task"]:
+            return (0, 0)
+        
+        # Reuse the screenshot prepared once for this step
+        image = state.get("prepared_image") or prepare_screenshot(state["screenshot_image"])
+        
+        # Identical calls are answered from the response cache
+        key = self._cache_key(state, image)
+        cached = response_cache.get_json(key) if response_cache else None
+        if cached:
+            return tuple(cached)
+        
+        # Generate response with error handling, then map back to screen space
+        try:
+            response = self.tiers.invoke(
+                self.llm, self.escalation_llm, self._build_messages(state, image),
+                lambda response: self._rejection(response, image),
+            )
+        except Exception as e:
+            return image.to_original(*self._coordinates_from_error(e))
+        
+        coordinates = image.to_original(*self._coordinates_from_response(response))
+        # Only cache clean structured answers, never text-parsing fallbacks
+        if response_cache and response.get("parsed") and not response.get("parsing_error"):
+            response_cache.set_json(key, list(coordinates))
+        return coordinates
+
+    async def agenerate_coordinates(self, state: AgentState) -> Tuple[int, int]:
+        """
+        Async version of generate_coordinates that does not block the event loop.
+        
+        Args:
+            state: Current agent state containing task and screenshot
+            
+        Returns:
+            Tuple[int, int]: (x, y) coordinates for the action
+        """
+        if not state["screenshot_image"] or not state["current_task"]:
+            return (0, 0)
+        if self.mode == "coarse_to_fine":
+            return await self.agenerate_coordinates_coarse_to_fine(state)
+        
+        # Reuse the screenshot prepared once for this step (prepared off the event loop otherwise)
+        image = state.get("prepared_image") or await asyncio.to_thread(prepare_screenshot, state["screenshot_image"])
         
-        # Generate response with error handling
+        # Identical calls are answered from the response cache
+        key = self._cache_key(state, image)
+        cached = await response_cache.aget_json(key) if response_cache else None
+        if cached:
+            return tuple(cached)
+        
+        # Generate response with error handling, then map back to screen space
         try:
-            response = self.llm.invoke([message])
+            response = await self.tiers.ainvoke(
+                self.llm, self.escalation_llm, self._build_messages(state, image),
+                lambda response: self._rejection(response, image),
+            )
+        except Exception as e:
+            return image.to_original(*self._coordinates_from_error(e))
+        
+        coordinates = image.to_original(*self._coordinates_from_response(response))
+        # Only cache clean structured answers, never text-parsing fallbacks
+        if response_cache and response.get("parsed") and not response.get("parsing_error"):
+            await response_cache.aset_json(key, list(coordinates))
+        return coordinates
+
+
+    def _build_refine_messages(self, state: AgentState, image: PreparedImage) -> List[BaseMessage]:
+        """
+        Build the second-stage prompt for a full-resolution crop around the coarse answer.
+        
+        Args:
+            state: Current agent state containing task and screenshot
+            image: Cropped screenshot to attach
             
-            # Check if we got a parsing error
-            if response.get("parsing_error"):
-                print(f"Parsing error occurred: {response['parsing_error']}")
-                # Try to parse coordinates from raw content
-                raw_content = str(response["raw"].content) if response.get("raw") else ""
-                return self._parse_coordinates_from_text(raw_content)
+        Returns:
+            List[BaseMessage]: System prompt and user message with the crop
+        """
+        note = f"""
+
+This image is a {image.width}x{image.height} crop of the screen around where the element was found on a low-resolution view. Return the precise coordinates of the center of the element WITHIN THIS CROP."""
+        return [SystemMessage(content=COORDINATE_SYSTEM_PROMPT), self._build_request(state, image, note)]
+
+    def _fine_crop(self, x: int, y: int, width: int, height: int) -> Tuple[int, int, int, int]:
+        """Crop box of fine_crop_size around (x, y), shifted to stay inside the screenshot."""
+        left = min(max(x - self.fine_crop_size // 2, 0), max(width - self.fine_crop_size, 0))
+        top = min(max(y - self.fine_crop_size // 2, 0), max(height - self.fine_crop_size, 0))
+        return (left, top, min(left + self.fine_crop_size, width), min(top + self.fine_crop_size, height))
+
+    def _coarse_to_fine_cache_key(self, state: AgentState, image: PreparedImage) -> str:
+        """Key identifying a two-stage location by everything its answer depends on."""
+        return cache_key(
+            "coarse_to_fine",
+            repr(self.coarse_settings),
+            self.fine_crop_size,
+            self._cache_key(state, image),
+        )
+
+    @staticmethod
+    def _is_clean(response: dict) -> bool:
+        """Whether a structured output response parsed without falling back to text parsing."""
+        return bool(response.get("parsed")) and not response.get("parsing_error")
+
+    async def agenerate_coordinates_coarse_to_fine(self, state: AgentState) -> Tuple[int, int]:
+        """
+        Locate the task in two cheap passes: a heavily downscaled screenshot to
+        find the region, then a full-resolution crop around it for the exact point.
+        
+        Args:
+            state: Current agent state containing task and screenshot
             
-            # Check if we got parsed coordinates
-            if response.get("parsed"):
-                parsed = response["parsed"]
-                return (parsed.x, parsed.y)
+        Returns:
+            Tuple[int, int]: (x, y) coordinates for the action
+        """
+        coarse = await asyncio.to_thread(prepare_screenshot, state["screenshot_image"], self.coarse_settings)
+        
+        # Identical calls are answered from the response cache
+        key = self._coarse_to_fine_cache_key(state, coarse)
+        cached = await response_cache.aget_json(key) if response_cache else None
+        if cached:
+            return tuple(cached)
+        
+        # Stage 1: find the region on the downscaled screenshot
+        try:
+            response = await self.tiers.ainvoke(
+                self.llm, self.escalation_llm, self._build_messages(state, coarse),
+                lambda response: self._rejection(response, coarse),
+            )
+        except Exception as e:
+            return coarse.to_original(*self._coordinates_from_error(e))
+        coarse_point = coarse.to_original(*self._coordinates_from_response(response))
+        if coarse.scale >= 1.0 or not self._is_clean(response):
+            # Already full resolution, or no reliable region to zoom into
+            return coarse_point
+        
+        # Stage 2: refine on a full-resolution crop around it
+        fine = await asyncio.to_thread(
+            prepare_screenshot,
+            state["screenshot_image"],
+            DEFAULT_IMAGE_SETTINGS,
+            self._fine_crop(*coarse_point, coarse.original_width, coarse.original_height),
+        )
+        try:
+            response = await self.tiers.ainvoke(
+                self.llm, self.escalation_llm, self._build_refine_messages(state, fine),
+                lambda response: self._rejection(response, fine),
+            )
+        except Exception as e:
+            print(f"Error refining coordinates, using coarse point: {e}")
+            return coarse_point
+        if not self._is_clean(response):
+            return coarse_point
+        
+        coordinates = fine.to_original(response["parsed"].x, response["parsed"].y)
+        if response_cache:
+            await response_cache.aset_json(key, list(coordinates))
+        return coordinates
+
+    def _build_locate_messages(self, state: AgentState, image: PreparedImage) -> List[BaseMessage]:
+        """
+        Build the prompt for a planned task, which also asks whether its element is visible.
+        
+        Args:
+            state: Current agent state containing task and screenshot
+            image: Preprocessed screenshot to attach
             
-            # If no parsed result, try to extract from raw content
-            if response.get("raw"):
-                raw_content = str(response["raw"].content)
-                return self._parse_coordinates_from_text(raw_content)
-                
-            # Fallback - shouldn't reach here with include_raw=True
-            return (640, 360)
+        Returns:
+            List[BaseMessage]: System prompt and user message
+        """
+        return [SystemMessage(content=LOCATE_SYSTEM_PROMPT), self._build_request(state, image)]
+
+    def _locate_cache_key(self, state: AgentState, image: PreparedImage) -> str:
+        """Key identifying a planned task location call by everything its answer depends on."""
+        return cache_key("located", LOCATE_SYSTEM_PROMPT, self._cache_key(state, image))
+
+    async def alocate_element(self, state: AgentState) -> Tuple[bool, Tuple[int, int]]:
+        """
+        Locate the current planned task's element and report whether it is on screen.
+        
+        A failed model call falls back to the default point, like
+        agenerate_coordinates, so the step still produces coordinates.
+        
+        Args:
+            state: Current agent state containing task and screenshot
             
+        Returns:
+            Tuple[bool, Tuple[int, int]]: Whether the element is visible, and its (x, y)
+        """
+        # Reuse the screenshot prepared once for this step (prepared off the event loop otherwise)
+        image = state.get("prepared_image") or await asyncio.to_thread(prepare_screenshot, state["screenshot_image"])
+        
+        # Identical calls are answered from the response cache
+        key = self._locate_cache_key(state, image)
+        cached = await response_cache.aget_json(key) if response_cache else None
+        if cached:
+            visible, x, y = cached
+            return (visible, (x, y))
+        
+        try:
+            response = await self.tiers.ainvoke(
+                self.locator, self.escalation_locator, self._build_locate_messages(state, image),
+                lambda response: self._locate_rejection(response, image),
+            )
         except Exception as e:
-            print(f"Error generating coordinates: {e}")
-            # Try to extract coordinates from error message if it contains them
-            error_str = str(e)
-            if "1198, 252" in error_str or "x=" in error_str.lower():
-                return self._parse_coordinates_from_text(error_str)
-            return (640, 360)
+            return (True, image.to_original(*self._coordinates_from_error(e)))
+        coordinates = image.to_original(response.x, response.y)
+        
+        if response_cache:
+            await response_cache.aset_json(key, [response.visible, *coordinates])
+        return (response.visible, coordinates)
+
+# Process-wide agent instance, shared so its HTTP connection pool is reused
+_shared_agent: Optional[CoordinateAgent] = None
+_shared_agent_lock = threading.Lock()
+
+
+def get_coordinate_agent() -> CoordinateAgent:
+    """
+    Return the process-wide CoordinateAgent, creating it on first use.
+    
+    The underlying ChatAnthropic client is thread-safe and keeps its
+    connections alive, so every request shares one instance.
+    
+    Returns:
+        CoordinateAgent: Shared agent instance
+    """
+    global _shared_agent
+    if _shared_agent is None:
+        with _shared_agent_lock:
+            if _shared_agent is None:
+                _shared_agent = CoordinateAgent()
+    return _shared_agent
+
+
+def _apply_coordinates(state: AgentState, x: int, y: int) -> AgentState:
+    """Return a copy of the state with the generated coordinates recorded."""
+    updated_state = state.copy()
+    updated_state["coordinates"] = (x, y)
+    
+    # Add to chat history
+    updated_state["chat_history"] = state["chat_history"].append({
+        "role": "coordinate_agent",
+        "content": f"Generated coordinates ({x}, {y}) for task: {state['current_task']}"
+    }, chat_label)
+    
+    return updated_state
+
+
+def _record_locator(state: AgentState, source: str, label: Optional[str], local_ms: float, total_ms: float) -> AgentState:
+    """Record which locator resolved this step and how long it took, on the state and in metrics."""
+    state["locator"] = {
+        "source": source,
+        "label": label,
+        "local_ms": round(local_ms, 1),
+        "total_ms": round(total_ms, 1),
+    }
+    LOCATOR_RESOLUTIONS.inc(source=source)
+    LOCATOR_SECONDS.observe(local_ms / 1000, stage="local", source=source)
+    LOCATOR_SECONDS.observe(total_ms / 1000, stage="total", source=source)
+    return state
+
+
+async def _alocal_match(state: AgentState) -> Tuple[Optional[LocatorMatch], float]:
+    """Run the local locators on the step's prepared screenshot off the event loop, if any are available."""
+    if not local_locator.enabled or not state["screenshot_image"]:
+        return None, 0.0
+    image = state.get("prepared_image") or await asyncio.to_thread(prepare_screenshot, state["screenshot_image"])
+    return await asyncio.to_thread(local_locator.locate, image, state["current_task"])
 
 
 def coordinate_agent_node(state: AgentState) -> AgentState:
     """
-    LangGraph node that runs the coordinate agent to generate coordinates.
+    LangGraph node that locates the current task, trying the local locators
+    before the coordinate agent.
     
     Args:
         state: Current agent state
@@ -152,17 +546,69 @@ def coordinate_agent_node(state: AgentState) -> AgentState:
     Returns:
         AgentState: Updated state with generated coordinates
     """
-    agent = CoordinateAgent()
+    start = time.perf_counter()
+    image = state.get("prepared_image")
+    if image is None and local_locator.enabled and state["screenshot_image"]:
+        image = prepare_screenshot(state["screenshot_image"])
+    match, local_ms = local_locator.locate(image, state["current_task"])
+    if match:
+        updated_state = _apply_coordinates(state, match.x, match.y)
+        return _record_locator(updated_state, match.source, match.label, local_ms, (time.perf_counter() - start) * 1000)
+    
+    agent = get_coordinate_agent()
     x, y = agent.generate_coordinates(state)
+    updated_state = _apply_coordinates(state, x, y)
+    return _record_locator(updated_state, "llm", None, local_ms, (time.perf_counter() - start) * 1000)
+
+
+async def acoordinate_agent_node(state: AgentState) -> AgentState:
+    """
+    Async LangGraph node that locates the current task, trying the local
+    locators before the coordinate agent.
     
-    # Update state with generated coordinates
-    updated_state = state.copy()
-    updated_state["coordinates"] = (x, y)
+    Args:
+        state: Current agent state
+        
+    Returns:
+        AgentState: Updated state with generated coordinates
+    """
+    start = time.perf_counter()
+    match, local_ms = await _alocal_match(state)
+    if match:
+        updated_state = _apply_coordinates(state, match.x, match.y)
+        return _record_locator(updated_state, match.source, match.label, local_ms, (time.perf_counter() - start) * 1000)
     
-    # Add to chat history
-    updated_state["chat_history"].append({
-        "role": "coordinate_agent",
-        "content": f"Generated coordinates ({x}, {y}) for task: {state['current_task']}"
-    })
+    agent = get_coordinate_agent()
+    x, y = await agent.agenerate_coordinates(state)
+    updated_state = _apply_coordinates(state, x, y)
+    return _record_locator(updated_state, "llm", None, local_ms, (time.perf_counter() - start) * 1000)
+
+
+def _apply_located(state: AgentState, visible: bool, x: int, y: int) -> AgentState:
+    """Return a copy of the state with the planned task's location and visibility recorded."""
+    updated_state = _apply_coordinates(state, x, y)
+    updated_state["target_visible"] = visible
+    return updated_state
+
+
+async def alocate_agent_node(state: AgentState) -> AgentState:
+    """
+    Async LangGraph node that locates a planned task and checks that it is still on screen.
+    A local match also proves the target is visible.
+    
+    Args:
+        state: Current agent state
+        
+    Returns:
+        AgentState: Updated state with coordinates and target_visible
+    """
+    start = time.perf_counter()
+    match, local_ms = await _alocal_match(state)
+    if match:
+        updated_state = _apply_located(state, True, match.x, match.y)
+        return _record_locator(updated_state, match.source, match.label, local_ms, (time.perf_counter() - start) * 1000)
     
-    return updated_state
\ No newline at end of file
+    agent = get_coordinate_agent()
+    visible, (x, y) = await agent.alocate_element(state)
+    updated_state = _apply_located(state, visible, x, y)
+    return _record_locator(updated_state, "llm", None, local_ms, (time.perf_counter() - start) * 1000)
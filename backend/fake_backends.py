@@ -0,0 +1,224 @@
+"""
+Deterministic stand-ins for the Anthropic and ElevenLabs backends.
+
+use_fake_backends() swaps the structured-output models of the shared agents
+and the TTS service's async ElevenLabs client for local fakes with a fixed
+latency and payload size. Everything else (request parsing, screenshot
+preparation, caches, the step workflow, the session store) runs for real, so
+the server's own overhead can be measured and tested without API keys.
+"""
+
+import asyncio
+import os
+import time
+import zlib
+from contextlib import contextmanager
+from typing import AsyncIterator, List
+
+from langchain_core.messages import AIMessage, BaseMessage
+
+from usage import CallUsage, image_bytes, record_call
+
+# Rough token counts for the usage the fakes report
+CHARS_PER_TOKEN = 4
+TOKENS_PER_IMAGE = 1600
+
+# Tasks handed out by the fake orchestration and plan models
+FAKE_TASKS = [
+    "Click the 'Compose' button",
+    "Click the 'To' field and type the recipient",
+    "Click the 'Subject' field and type a subject",
+    "Click the message body and type the message",
+    "Click the 'Send' button",
+]
+
+
+def _request_text(messages: List[BaseMessage]) -> str:
+    """Text of the per-step user message, which the fake answers are derived from."""
+    content = messages[-1].content
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+class FakeStructuredModel:
+    """
+    Stand-in for `chat_model.with_structured_output(schema)`.
+
+    Answers after `latency` seconds with an instance of the schema derived
+    from a checksum of the request, so identical requests get identical
+    answers. Task descriptions are padded to `payload_chars`. Each call's
+    usage is recorded under `agent`, with tokens estimated from the prompt
+    and answer sizes.
+    """
+
+    def __init__(
+        self,
+        schema,
+        latency: float = 0.0,
+        payload_chars: int = 200,
+        include_raw: bool = False,
+        agent: str = "fake",
+        model: str = "",
+    ):
+        self.schema = schema
+        self.latency = latency
+        self.payload_chars = payload_chars
+        self.include_raw = include_raw
+        self.agent = agent
+        self.model = model
+        self.calls = 0
+
+    def _respond(self, messages: List[BaseMessage]):
+        self.calls += 1
+        checksum = zlib.crc32(_request_text(messages).encode("utf-8"))
+        task = FAKE_TASKS[checksum % len(FAKE_TASKS)]
+        description = ("The screen shows the mail client. " * (self.payload_chars // 34 + 1))[:self.payload_chars]
+        values = {
+            "task": task,
+            "description": description,
+            "x": 50 + checksum % 500,
+            "y": 50 + (checksum >> 16) % 300,
+            "visible": True,
+            "steps": [{"task": step, "description": description} for step in FAKE_TASKS],
+        }
+        fields = self.schema.model_fields
+        parsed = self.schema(**{name: value for name, value in values.items() if name in fields})
+
+        sent = image_bytes(messages)
+        prompt_chars = sum(len(str(message.content)) for message in messages) - sent * 4 // 3
+        record_call(CallUsage(
+            agent=self.agent,
+            model=self.model,
+            input_tokens=prompt_chars // CHARS_PER_TOKEN + (TOKENS_PER_IMAGE if sent else 0),
+            output_tokens=len(parsed.model_dump_json()) // CHARS_PER_TOKEN,
+            image_bytes=sent,
+            latency_ms=self.latency * 1000,
+        ))
+        if self.include_raw:
+            return {"raw": AIMessage(content=parsed.model_dump_json()), "parsed": parsed, "parsing_error": None}
+        return parsed
+
+    def invoke(self, messages: List[BaseMessage], config=None, **kwargs):
+        time.sleep(self.latency)
+        return self._respond(messages)
+
+    async def ainvoke(self, messages: List[BaseMessage], config=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return self._respond(messages)
+
+
+class _FakeTextToSpeech:
+    """Stand-in for the `text_to_speech` resource of AsyncElevenLabs."""
+
+    def __init__(self, latency: float, audio_bytes: int, chunk_bytes: int):
+        self.latency = latency
+        self.audio_bytes = audio_bytes
+        self.chunk_bytes = chunk_bytes
+        self.calls = 0
+
+    async def _chunks(self, text: str) -> AsyncIterator[bytes]:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        # MPEG frame sync bytes followed by a filler derived from the text
+        clip = (b"\xff\xf3" + text.encode("utf-8")) * (self.audio_bytes // (len(text) + 2) + 1)
+        clip = clip[:self.audio_bytes]
+        for start in range(0, len(clip), self.chunk_bytes):
+            yield clip[start:start + self.chunk_bytes]
+
+    def convert(self, voice_id: str, text: str, model_id: str = None, **kwargs) -> AsyncIterator[bytes]:
+        return self._chunks(text)
+
+    def stream(self, voice_id: str, text: str, model_id: str = None, **kwargs) -> AsyncIterator[bytes]:
+        return self._chunks(text)
+
+
+class FakeAsyncElevenLabs:
+    """
+    Stand-in for the AsyncElevenLabs client.
+
+    Every clip starts after `latency` seconds and is `audio_bytes` long,
+    delivered in `chunk_bytes` chunks.
+    """
+
+    def __init__(self, latency: float = 0.0, audio_bytes: int = 32 * 1024, chunk_bytes: int = 4096):
+        self.text_to_speech = _FakeTextToSpeech(latency, audio_bytes, chunk_bytes)
+
+
+async def _skip_warm_up() -> None:
+    """Replacement for awarm_up(): there is no provider connection to open."""
+
+
+@contextmanager
+def use_fake_backends(
+    llm_latency: float = 0.0,
+    tts_latency: float = 0.0,
+    payload_chars: int = 200,
+    audio_bytes: int = 32 * 1024,
+):
+    """
+    Run the shared agents and the TTS service against the fakes.
+
+    Args:
+        llm_latency: Seconds every model call takes
+        tts_latency: Seconds before the first audio chunk of every clip
+        payload_chars: Length of the task descriptions the models return
+        audio_bytes: Size of every synthesized clip
+
+    Yields:
+        dict: The fake models ("orchestration", "plan", "coordinate", "locate", "fused") and the fake "tts" client
+    """
+    # The agents refuse to start without a key, although it is never sent anywhere
+    os.environ.setdefault("ANTHROPIC_API_KEY", "fake-key")
+    from coordinate_agent import Coordinates, Located_Element, get_coordinate_agent
+    from fused_agent import Task_Description_and_Coordinates, get_fused_agent
+    from orchestration_agent import Plan, Task_and_Description, get_orchestration_agent
+    from tts_service import tts_service
+
+    orchestration, coordinate, fused = get_orchestration_agent(), get_coordinate_agent(), get_fused_agent()
+
+    def fake(agent, name, schema, include_raw=False, chat_model=None):
+        model = (chat_model or agent.chat_model).model
+        return FakeStructuredModel(schema, llm_latency, payload_chars, include_raw, name, model)
+
+    replacements = [
+        (orchestration, "llm", fake(orchestration, "orchestration", Task_and_Description)),
+        (orchestration, "planner", fake(orchestration, "orchestration", Plan)),
+        (coordinate, "llm", fake(coordinate, "coordinate", Coordinates, include_raw=True)),
+        (coordinate, "locator", fake(coordinate, "coordinate", Located_Element)),
+        (fused, "llm", fake(fused, "fused", Task_Description_and_Coordinates)),
+        (tts_service, "async_client", FakeAsyncElevenLabs(tts_latency, audio_bytes)),
+    ]
+    # Agents on a cheaper tier escalate to a second model, which is faked as well
+    escalations = [
+        (orchestration, "escalation_llm", "orchestration", Task_and_Description, False),
+        (orchestration, "escalation_planner", "orchestration", Plan, False),
+        (coordinate, "escalation_llm", "coordinate", Coordinates, True),
+        (coordinate, "escalation_locator", "coordinate", Located_Element, False),
+        (fused, "escalation_llm", "fused", Task_Description_and_Coordinates, False),
+    ]
+    replacements += [
+        (agent, attribute, fake(agent, name, schema, include_raw, agent.escalation_model))
+        for agent, attribute, name, schema, include_raw in escalations
+        if agent.escalation_model is not None
+    ]
+    replacements += [(agent, "awarm_up", _skip_warm_up) for agent in (orchestration, coordinate, fused)]
+
+    originals = [(target, name, target.__dict__.get(name)) for target, name, _ in replacements]
+    for target, name, value in replacements:
+        setattr(target, name, value)
+    try:
+        yield {
+            "orchestration": orchestration.llm,
+            "plan": orchestration.planner,
+            "coordinate": coordinate.llm,
+            "locate": coordinate.locator,
+            "fused": fused.llm,
+            "tts": tts_service.async_client,
+        }
+    finally:
+        for target, name, value in originals:
+            if value is None and name == "awarm_up":
+                delattr(target, name)
+            else:
+                setattr(target, name, value)
@@ -0,0 +1,128 @@
+"""
+Shared fixtures for the test scripts: synthetic screenshots, agent states and
+stand-in structured output runnables.
+
+The ElevenLabs stand-in lives in fake_backends (FakeAsyncElevenLabs), next to
+the fake models the server runs on without API keys.
+"""
+
+import base64
+import io
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from state import AgentState, create_initial_state
+
+
+def make_screenshot(size: Tuple[int, int] = (640, 400), color=(240, 240, 240), image_format: str = "PNG") -> bytes:
+    """Encode a solid-color screenshot."""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def make_screenshot_base64(color, size: Tuple[int, int] = (640, 400)) -> str:
+    """Encode a solid-color PNG screenshot as base64."""
+    return base64.b64encode(make_screenshot(size, color)).decode("utf-8")
+
+
+def make_step_screenshot(shade: int, size: Tuple[int, int] = (320, 200)) -> bytes:
+    """Encode a distinct screenshot per shade (color plus a white stripe), so every update is a real screen change."""
+    width, height = size
+    stripe = width // 16
+    buffer = io.BytesIO()
+    image = Image.new("RGB", size, (shade, 255 - shade, 128))
+    image.paste((255, 255, 255), (shade, 0, shade + stripe, height))
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_state(
+    task: Optional[str] = None,
+    query: str = "Test query",
+    size: Tuple[int, int] = (640, 400),
+    color=(240, 240, 240),
+    description: Optional[str] = None,
+    screenshot: Optional[bytes] = None,
+) -> AgentState:
+    """
+    Create an initial agent state for a synthetic screenshot.
+
+    Args:
+        task: Current task, if the state should already have one
+        query: The user's request
+        size: Size of the solid-color screenshot
+        color: Color of the solid-color screenshot
+        description: Task description, if the state should already have one
+        screenshot: Screenshot bytes to use instead of a solid-color one
+
+    Returns:
+        AgentState: State holding the screenshot (prepared and fingerprinted)
+    """
+    state = create_initial_state(screenshot if screenshot is not None else make_screenshot(size, color), query)
+    state["current_task"] = task
+    state["task_description"] = description
+    return state
+
+
+def _image_size(messages) -> Optional[Tuple[int, int]]:
+    """Size of the image in the last message, if it has one."""
+    content = messages[-1].content if messages else None
+    if not isinstance(content, list):
+        return None
+    for part in content:
+        if isinstance(part, dict) and part.get("type") == "image":
+            return Image.open(io.BytesIO(base64.b64decode(part["data"]))).size
+    return None
+
+
+class ScriptedLLM:
+    """
+    Stand-in structured output runnable that returns (or raises) scripted
+    answers in order, counts calls and records the size of each image it saw.
+    """
+
+    def __init__(self, *answers, include_raw: bool = False):
+        """
+        Args:
+            answers: Answers in call order; exceptions are raised instead of returned
+            include_raw: Wrap answers like `with_structured_output(..., include_raw=True)`
+        """
+        self.answers = list(answers)
+        self.include_raw = include_raw
+        self.calls = 0
+        self.image_sizes = []
+
+    def _next(self, messages):
+        self.calls += 1
+        size = _image_size(messages)
+        if size:
+            self.image_sizes.append(size)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        if self.include_raw:
+            return {"raw": None, "parsed": answer, "parsing_error": None}
+        return answer
+
+    def invoke(self, messages):
+        return self._next(messages)
+
+    async def ainvoke(self, messages):
+        return self._next(messages)
+
+
+class CountingLLM:
+    """Stand-in structured output runnable that always gives the same answer and counts invocations."""
+
+    def __init__(self, response):
+        self.response = response
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return self.response
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
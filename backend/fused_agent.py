@@ -0,0 +1,215 @@
+import asyncio
+import os
+import threading
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from langchain_anthropic import ChatAnthropic
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from state import AgentState
+from image_processing import DEFAULT_IMAGE_SETTINGS, PreparedImage, prepare_screenshot
+from cache import cache_key, response_cache
+from history import chat_label, render_progress
+from call_policy import CLIENT_OPTIONS, awarm_up_model
+from model_tiers import ModelTiers
+from prompt_cache import prompt_cache_usage
+from pydantic import BaseModel, Field
+
+
+class Task_Description_and_Coordinates(BaseModel):
+    task: str = Field(..., description="The task to be executed")
+    description: str = Field(..., description="Detailed description of the current state of the interface")
+    x: int = Field(..., description="The x coordinate of the center of the UI element to interact with for the task. Must be an integer.")
+    y: int = Field(..., description="The y coordinate of the center of the UI element to interact with for the task. Must be an integer.")
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Instructions are constant across calls;
+# the user query, progress and screenshot follow in the user message
+FUSED_SYSTEM_PROMPT = """You are an AI agent that analyzes screenshots and user requests, decides the next actionable task, and locates the UI element for that task.
+
+Your job is to:
+1. Analyze the provided screenshot to understand the current state of the interface, and provide a detailed description of the current state of the interface.
+2. Understand what the user wants to accomplish, given as the user request.
+3. Decide the next specific, actionable task from the user's current state. You MUST generate **ONE** task from the current state.
+4. Locate the exact UI element that needs to be interacted with for this task, and provide the precise x and y coordinates for the center of that element.
+
+The tasks already completed are listed after the user request.
+
+Guidelines:
+- Be specific about UI elements (buttons, fields, menus, etc.)
+- task should be atomic and actionable
+- Focus on what needs to be clicked, typed, or interacted with
+- Return coordinates for the CENTER of the target element, in screenshot pixels
+- If multiple similar elements exist, choose the most logical one based on the task
+
+Example:
+User query: "I want to send an email to someone on gmail, how can i do this?"
+Screeenshot: [screenshot of a browser window]
+
+Task: "Click on the search bar and type 'gmail.com' and press enter"
+Description: "The user is currently on the home page of the browser, they want to send an email to someone on gmail.com"
+x: 1198
+y: 252"""
+
+
+class FusedAgent:
+    """
+    Agent that plans the next task and locates its UI element in a single
+    multimodal call, instead of the orchestration agent followed by the
+    coordinate agent. Halves the vision calls (and screenshot uploads) per step.
+    """
+
+    def __init__(self, model_name: Optional[str] = None, tier: Optional[str] = None):
+        # Verify Anthropic API key is available
+        if not os.getenv("ANTHROPIC_API_KEY"):
+            raise ValueError("ANTHROPIC_API_KEY environment variable is required. Please add it to your .env file.")
+
+        self.tiers = ModelTiers("fused", tier, model_name)
+        self.chat_model = ChatAnthropic(model=self.tiers.model, callbacks=[prompt_cache_usage("fused")], **CLIENT_OPTIONS)
+        self.llm = self.chat_model.with_structured_output(Task_Description_and_Coordinates)
+
+        # Stronger model for answers of a cheaper tier that fail validation
+        self.escalation_model = self.escalation_llm = None
+        if self.tiers.escalation_model:
+            self.escalation_model = ChatAnthropic(model=self.tiers.escalation_model, callbacks=[prompt_cache_usage("fused")], **CLIENT_OPTIONS)
+            self.escalation_llm = self.escalation_model.with_structured_output(Task_Description_and_Coordinates)
+
+    async def awarm_up(self) -> None:
+        """Check the API key and connect to the Anthropic API ahead of the first request."""
+        await awarm_up_model(self.chat_model.model)
+
+    def _build_messages(self, state: AgentState, image: PreparedImage) -> List[BaseMessage]:
+        """
+        Build the prompt asking for the next task and its coordinates: cached
+        instructions, then the user query, progress and screenshot.
+
+        Args:
+            state: Current agent state containing screenshot, user query and task history
+            image: Preprocessed screenshot to attach
+
+        Returns:
+            List[BaseMessage]: System prompt and user message
+        """
+        # Create the message with multimodal content
+        request = HumanMessage(
+            content=[
+                {
+                    "type": "text",
+                    "text": f"""User request: "{state["user_query"]}"
+
+Tasks already completed:
+{render_progress(state["task_history"])}"""
+                },
+                {
+                    "type": "image",
+                    "source_type": "base64",
+                    "data": image.data_base64,
+                    "mime_type": image.mime_type
+                }
+            ]
+        )
+        return [SystemMessage(content=FUSED_SYSTEM_PROMPT), request]
+
+    def _cache_key(self, state: AgentState, image: PreparedImage) -> str:
+        """Key identifying a fused step call by everything its answer depends on."""
+        return cache_key(
+            "fused",
+            self.chat_model.model,
+            FUSED_SYSTEM_PROMPT,
+            repr(DEFAULT_IMAGE_SETTINGS),
+            image.digest,
+            state["user_query"],
+            render_progress(state["task_history"]),
+        )
+
+    @staticmethod
+    def _rejection(response: Task_Description_and_Coordinates, image: PreparedImage) -> Optional[str]:
+        """Why a fused answer should be escalated, or None to accept it."""
+        if not response.task.strip():
+            return "empty_task"
+        if not image.contains(response.x, response.y):
+            return "out_of_bounds"
+        return None
+
+    async def agenerate_step(self, state: AgentState) -> Tuple[str, str, Tuple[int, int]]:
+        """
+        Generate the next task, its description and its coordinates in one call.
+
+        Args:
+            state: Current agent state containing screenshot and user query
+
+        Returns:
+            Tuple[str, str, Tuple[int, int]]: Task, description and (x, y) in screen space
+        """
+        # Reuse the screenshot prepared once for this step (prepared off the event loop otherwise)
+        image = state.get("prepared_image") or await asyncio.to_thread(prepare_screenshot, state["screenshot_image"])
+
+        # Identical calls are answered from the response cache
+        key = self._cache_key(state, image)
+        cached = await response_cache.aget_json(key) if response_cache else None
+        if cached:
+            task, description, x, y = cached
+            return (task, description, (x, y))
+
+        # Generate response, then map coordinates back to screen space
+        response = await self.tiers.ainvoke(
+            self.llm, self.escalation_llm, self._build_messages(state, image),
+            lambda response: self._rejection(response, image),
+        )
+        coordinates = image.to_original(response.x, response.y)
+
+        if response_cache:
+            await response_cache.aset_json(key, [response.task, response.description, *coordinates])
+        return (response.task, response.description, coordinates)
+
+
+# Process-wide agent instance, shared so its HTTP connection pool is reused
+_shared_agent: Optional[FusedAgent] = None
+_shared_agent_lock = threading.Lock()
+
+
+def get_fused_agent() -> FusedAgent:
+    """
+    Return the process-wide FusedAgent, creating it on first use.
+
+    Returns:
+        FusedAgent: Shared agent instance
+    """
+    global _shared_agent
+    if _shared_agent is None:
+        with _shared_agent_lock:
+            if _shared_agent is None:
+                _shared_agent = FusedAgent()
+    return _shared_agent
+
+
+def _apply_step(state: AgentState, task: str, description: str, x: int, y: int) -> AgentState:
+    """Return a copy of the state with the generated task and coordinates recorded."""
+    updated_state = state.copy()
+    updated_state["current_task"] = task
+    updated_state["task_description"] = description
+    updated_state["coordinates"] = (x, y)
+
+    # Add to chat history
+    updated_state["chat_history"] = state["chat_history"].append({
+        "role": "fused_agent",
+        "content": f"Generated task: {task} with description: {description} at coordinates ({x}, {y})"
+    }, chat_label)
+
+    return updated_state
+
+
+async def afused_agent_node(state: AgentState) -> AgentState:
+    """
+    Async LangGraph node that runs the fused agent to generate the task and its coordinates.
+
+    Args:
+        state: Current agent state
+
+    Returns:
+        AgentState: Updated state with task, description and coordinates
+    """
+    agent = get_fused_agent()
+    task, description, (x, y) = await agent.agenerate_step(state)
+    return _apply_step(state, task, description, x, y)
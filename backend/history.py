@@ -0,0 +1,124 @@
+"""
+Bounded, immutable session history.
+
+A History keeps the most recent entries of a session (a ring buffer of
+`capacity` entries) and folds older ones into a short rolling summary, so the
+memory held per session and the history sent in prompts stay flat however
+long a workflow runs.
+
+Histories are never modified in place. `append` returns a new History that
+shares every entry and the summary with the previous one. Earlier state
+objects that point at the old History keep seeing exactly what they saw
+before, and an append never copies more than `capacity` references.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Recent steps kept verbatim per session; older ones are folded into the summary
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "10"))
+
+# Folded entries named in the summary, most recent last
+SUMMARY_RECENT_ITEMS = 3
+
+
+@dataclass(frozen=True)
+class History:
+    """
+    The last `capacity` entries of a session plus a summary of older ones.
+
+    Attributes:
+        entries: Most recent entries, oldest first (at most capacity)
+        capacity: Maximum number of entries kept verbatim
+        folded: Number of older entries folded into the summary
+        folded_recent: Short labels of the most recently folded entries
+    """
+    entries: Tuple[Any, ...] = ()
+    capacity: int = HISTORY_WINDOW
+    folded: int = 0
+    folded_recent: Tuple[str, ...] = ()
+
+    def append(self, entry: Any, label: Optional[Callable[[Any], str]] = None) -> "History":
+        """
+        Return a new History with the entry added, folding the oldest entry if full.
+
+        Args:
+            entry: Entry to add
+            label: Turns an entry into a short summary label (defaults to str)
+
+        Returns:
+            History: New history sharing all unchanged entries with this one
+        """
+        entries = self.entries + (entry,)
+        if len(entries) <= self.capacity:
+            return History(entries, self.capacity, self.folded, self.folded_recent)
+
+        oldest, entries = entries[0], entries[1:]
+        folded_recent = (self.folded_recent + ((label or str)(oldest),))[-SUMMARY_RECENT_ITEMS:]
+        return History(entries, self.capacity, self.folded + 1, folded_recent)
+
+    @property
+    def total(self) -> int:
+        """Number of entries ever appended, including folded ones."""
+        return self.folded + len(self.entries)
+
+    @property
+    def summary(self) -> str:
+        """Short description of the folded entries, or an empty string if none were folded."""
+        if not self.folded:
+            return ""
+        return f"{self.folded} earlier steps completed, most recently: " + "; ".join(self.folded_recent)
+
+    def to_dict(self) -> dict:
+        """JSON-serializable form of the history (entries must be JSON-serializable)."""
+        return {
+            "entries": list(self.entries),
+            "capacity": self.capacity,
+            "folded": self.folded,
+            "folded_recent": list(self.folded_recent),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "History":
+        """Rebuild a history saved with to_dict()."""
+        return cls(
+            tuple(data["entries"]),
+            data["capacity"],
+            data["folded"],
+            tuple(data["folded_recent"]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.entries)
+
+    def __getitem__(self, index: int) -> Any:
+        return self.entries[index]
+
+
+def chat_label(entry: dict) -> str:
+    """Summary label for a chat history entry."""
+    return str(entry.get("content", ""))[:80]
+
+
+def render_progress(task_history: History) -> str:
+    """
+    Describe the tasks completed so far for an orchestration prompt.
+
+    Args:
+        task_history: Completed tasks of the session
+
+    Returns:
+        str: Summary line (if anything was folded) followed by the recent tasks, or "None"
+    """
+    lines = [task_history.summary] if task_history.summary else []
+    lines += [f"- {task}" for task in task_history]
+    return "\n".join(lines) or "None"
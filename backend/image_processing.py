@@ -0,0 +1,315 @@
+"""
+Screenshot preprocessing for the vision agents.
+
+Screenshots are resized to a target long edge / pixel budget and re-encoded
+as JPEG before they are sent to the LLM, which cuts image tokens and upload
+time for 4K and HiDPI captures. The scale factor and crop offset are recorded
+so coordinates returned by the model can be mapped back to the original
+screen space.
+"""
+
+import base64
+import hashlib
+import io
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+from PIL import Image
+
+# Load environment variables from .env file
+load_dotenv()
+
+# MIME types for the encodings the Anthropic API accepts
+MIME_TYPES = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp",
+    "GIF": "image/gif",
+}
+
+
+@dataclass(frozen=True)
+class ImageSettings:
+    """
+    How screenshots are prepared before being sent to the LLM.
+
+    Attributes:
+        max_long_edge: Longest side in pixels after resizing (None to disable)
+        max_pixels: Pixel budget (width * height) after resizing (None to disable)
+        format: "auto" keeps the source format unless the image is resized
+            or cropped (then JPEG at `quality`), or one of "png", "jpeg",
+            "webp" to always re-encode
+        quality: Quality for lossy formats (1-100)
+    """
+    max_long_edge: Optional[int] = 1568
+    max_pixels: Optional[int] = 1_150_000
+    format: str = "auto"
+    quality: int = 85
+
+    @classmethod
+    def from_env(cls) -> "ImageSettings":
+        """Build settings from SCREENSHOT_* environment variables."""
+        max_long_edge = int(os.getenv("SCREENSHOT_MAX_EDGE", "1568"))
+        max_pixels = int(os.getenv("SCREENSHOT_MAX_PIXELS", "1150000"))
+        return cls(
+            max_long_edge=max_long_edge or None,
+            max_pixels=max_pixels or None,
+            format=os.getenv("SCREENSHOT_FORMAT", "auto").lower(),
+            quality=int(os.getenv("SCREENSHOT_QUALITY", "85")),
+        )
+
+
+@dataclass(frozen=True)
+class PreparedImage:
+    """
+    An encoded screenshot ready to send to the LLM, plus the geometry needed
+    to map coordinates in it back to the original screenshot.
+
+    The base64 payload and the digest of the original screenshot are computed
+    once, so every agent (and cache key) in a step can reuse them.
+    """
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_width: int
+    original_height: int
+    data_base64: str
+    digest: str
+    scale: float = 1.0
+    offset_x: int = 0
+    offset_y: int = 0
+
+    def to_original(self, x: int, y: int) -> Tuple[int, int]:
+        """
+        Map a point in this image back to original screenshot coordinates.
+
+        Args:
+            x: X coordinate in the prepared image
+            y: Y coordinate in the prepared image
+
+        Returns:
+            Tuple[int, int]: (x, y) in the original screenshot
+        """
+        original_x = self.offset_x + round(x / self.scale)
+        original_y = self.offset_y + round(y / self.scale)
+        return (
+            min(max(original_x, 0), self.original_width - 1),
+            min(max(original_y, 0), self.original_height - 1),
+        )
+
+    def contains(self, x: int, y: int) -> bool:
+        """Whether a point given in this image's coordinates lies inside it."""
+        return 0 <= x < self.width and 0 <= y < self.height
+
+
+def target_scale(width: int, height: int, settings: ImageSettings) -> float:
+    """
+    Compute the downscale factor that satisfies both the long edge and pixel budget.
+
+    Args:
+        width: Source width in pixels
+        height: Source height in pixels
+        settings: Preprocessing settings
+
+    Returns:
+        float: Scale factor in (0, 1]; 1.0 means no resizing
+    """
+    scale = 1.0
+    if settings.max_long_edge:
+        scale = min(scale, settings.max_long_edge / max(width, height))
+    if settings.max_pixels:
+        scale = min(scale, (settings.max_pixels / (width * height)) ** 0.5)
+    return scale
+
+
+def prepare_screenshot(
+    image_data: bytes,
+    settings: Optional[ImageSettings] = None,
+    crop: Optional[Tuple[int, int, int, int]] = None,
+) -> PreparedImage:
+    """
+    Resize, crop and re-encode a screenshot for an LLM call.
+
+    Args:
+        image_data: Raw screenshot bytes in any format Pillow can read
+        settings: Preprocessing settings (defaults to the environment settings)
+        crop: Optional (left, top, right, bottom) box in original coordinates
+
+    Returns:
+        PreparedImage: Encoded image with its base64 payload, the original's
+            digest, and its scale factor and crop offset
+    """
+    settings = settings or DEFAULT_IMAGE_SETTINGS
+    digest = hashlib.sha256(image_data).hexdigest()
+    image = Image.open(io.BytesIO(image_data))
+    original_width, original_height = image.size
+    source_format = image.format
+
+    offset_x, offset_y = 0, 0
+    if crop:
+        left, top, right, bottom = crop
+        left, top = max(left, 0), max(top, 0)
+        right, bottom = min(right, original_width), min(bottom, original_height)
+        image = image.crop((left, top, right, bottom))
+        offset_x, offset_y = left, top
+
+    scale = target_scale(image.width, image.height, settings)
+    if scale < 1.0:
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+
+    output_format = settings.format.upper()
+    if output_format == "AUTO":
+        # Pass the upload through untouched when nothing needs to change
+        if scale >= 1.0 and not crop and source_format in MIME_TYPES:
+            return PreparedImage(
+                data=image_data,
+                mime_type=MIME_TYPES[source_format],
+                width=original_width,
+                height=original_height,
+                original_width=original_width,
+                original_height=original_height,
+                data_base64=base64.b64encode(image_data).decode("ascii"),
+                digest=digest,
+            )
+        output_format = "JPEG"
+
+    if output_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    save_options = {"quality": settings.quality} if output_format in ("JPEG", "WEBP") else {}
+    image.save(buffer, format=output_format, **save_options)
+    data = buffer.getvalue()
+
+    return PreparedImage(
+        data=data,
+        mime_type=MIME_TYPES[output_format],
+        width=image.width,
+        height=image.height,
+        original_width=original_width,
+        original_height=original_height,
+        data_base64=base64.b64encode(data).decode("ascii"),
+        digest=digest,
+        scale=min(scale, 1.0),
+        offset_x=offset_x,
+        offset_y=offset_y,
+    )
+
+
+@dataclass(frozen=True)
+class ScreenFingerprint:
+    """
+    Compact signature of a screenshot used to detect visually identical frames.
+
+    Attributes:
+        phash: 64-bit difference hash of the whole frame
+        thumbnail: Grayscale thumbnail pixels (FINGERPRINT_SIZE) for region diffs
+        width: Original screenshot width
+        height: Original screenshot height
+    """
+    phash: int
+    thumbnail: bytes
+    width: int
+    height: int
+
+
+# Thumbnail size used for region diffs
+FINGERPRINT_SIZE = (64, 36)
+
+
+def screen_fingerprint(image_data: bytes) -> ScreenFingerprint:
+    """
+    Compute the perceptual hash and region thumbnail of a screenshot.
+
+    Args:
+        image_data: Raw screenshot bytes
+
+    Returns:
+        ScreenFingerprint: Signature for comparing frames
+    """
+    image = Image.open(io.BytesIO(image_data))
+    width, height = image.size
+    # Decoding at reduced size is much faster for JPEG sources
+    image.draft("L", (FINGERPRINT_SIZE[0] * 4, FINGERPRINT_SIZE[1] * 4))
+    thumbnail = image.convert("L").resize(FINGERPRINT_SIZE, Image.BILINEAR)
+
+    # Difference hash: one bit per horizontally adjacent pixel pair
+    pixels = thumbnail.resize((9, 8), Image.BILINEAR).tobytes()
+    phash = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            phash = (phash << 1) | (left > right)
+
+    return ScreenFingerprint(phash=phash, thumbnail=thumbnail.tobytes(), width=width, height=height)
+
+
+def max_region_difference(first: ScreenFingerprint, second: ScreenFingerprint) -> float:
+    """
+    Largest absolute difference of any pixel of two thumbnails.
+
+    Each thumbnail pixel averages a block of about 30x30 screen pixels on a
+    1920x1080 capture, so this is the smallest region a change is measured
+    over; a worst-tile mean would dilute a checkbox or a typed word until it
+    looks like compression noise.
+
+    Args:
+        first: Fingerprint of one frame
+        second: Fingerprint of the other frame
+
+    Returns:
+        float: Difference in [0, 1]; 0 means the thumbnails are identical
+    """
+    return max(abs(a - b) for a, b in zip(first.thumbnail, second.thumbnail)) / 255
+
+
+def screens_match(
+    previous: Optional[ScreenFingerprint],
+    current: ScreenFingerprint,
+    hash_threshold: Optional[int] = None,
+    region_threshold: Optional[float] = None,
+) -> bool:
+    """
+    Decide whether two frames are visually the same screen.
+
+    Both the whole-frame hash distance and the worst thumbnail pixel
+    difference must be within their thresholds, so a small local change (a
+    dialog, a toggled checkbox, typed text) still counts as a new screen while
+    compression noise does not.
+
+    Args:
+        previous: Fingerprint of the frame the last step was computed on
+        current: Fingerprint of the new frame
+        hash_threshold: Max differing hash bits (defaults to SCREEN_CHANGE_HASH_THRESHOLD)
+        region_threshold: Max thumbnail pixel difference (defaults to SCREEN_CHANGE_REGION_THRESHOLD)
+
+    Returns:
+        bool: True if the frames match
+    """
+    if previous is None or (previous.width, previous.height) != (current.width, current.height):
+        return False
+    hash_threshold = SCREEN_CHANGE_HASH_THRESHOLD if hash_threshold is None else hash_threshold
+    region_threshold = SCREEN_CHANGE_REGION_THRESHOLD if region_threshold is None else region_threshold
+    if hash_threshold < 0 or region_threshold < 0:
+        return False
+    if bin(previous.phash ^ current.phash).count("1") > hash_threshold:
+        return False
+    return max_region_difference(previous, current) <= region_threshold
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Approximate Anthropic image tokens for an image of the given size."""
+    return round(width * height / 750)
+
+
+# Settings used when callers do not pass their own
+DEFAULT_IMAGE_SETTINGS = ImageSettings.from_env()
+
+# Change detection thresholds; negative values disable change detection
+SCREEN_CHANGE_HASH_THRESHOLD = int(os.getenv("SCREEN_CHANGE_HASH_THRESHOLD", "2"))
+SCREEN_CHANGE_REGION_THRESHOLD = float(os.getenv("SCREEN_CHANGE_REGION_THRESHOLD", "0.02"))
@@ -0,0 +1,324 @@
+"""
+Local fast path for locating UI elements without a vision LLM call.
+
+Many tasks name a visible label ("Click the 'Compose' button") or a common
+widget ("Click on the search bar"). Those can often be resolved on the
+screenshot with text recognition or template matching in tens of
+milliseconds. The locators here run before the coordinate agent, on the
+step's downscaled prepared screenshot; a confident match is mapped back to
+screen coordinates and used directly, anything else falls back to the LLM.
+
+Both backends are optional: OCR needs `pytesseract` (and the tesseract
+binary), template matching needs `opencv-python-headless`. Missing backends
+are skipped.
+"""
+
+import io
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from PIL import Image
+
+from image_processing import PreparedImage
+
+try:
+    import pytesseract
+except ImportError:
+    pytesseract = None
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Quoted labels in a task: 'Compose', "Sign in", ‘Send’, “Next”
+# (apostrophes inside words, as in "user's", do not open or close a label)
+QUOTED_LABEL_PATTERN = re.compile(r"(?<!\w)['\"‘“]([^'\"‘’“”]{1,60})['\"’”](?!\w)")
+
+
+@dataclass(frozen=True)
+class LocatorMatch:
+    """
+    A confident local match for a task's target.
+
+    Attributes:
+        x: X coordinate of the target's center (in the original screenshot once returned by LocatorChain)
+        y: Y coordinate of the target's center (in the original screenshot once returned by LocatorChain)
+        confidence: Backend confidence in [0, 1]
+        source: Name of the locator that found it
+        label: The label or widget that was matched
+    """
+    x: int
+    y: int
+    confidence: float
+    source: str
+    label: str
+
+
+def quoted_labels(task: str) -> List[str]:
+    """
+    Extract quoted UI labels from a task.
+
+    Args:
+        task: Task text from the orchestration agent
+
+    Returns:
+        List[str]: Labels in the order they appear
+    """
+    return [label.strip() for label in QUOTED_LABEL_PATTERN.findall(task or "") if label.strip()]
+
+
+def _words(text: str) -> List[str]:
+    """Lowercase words of a label or OCR token, without punctuation."""
+    return re.findall(r"[a-z0-9@]+", text.lower())
+
+
+class OcrLocator:
+    """Finds quoted labels among the words recognized on the screenshot."""
+
+    name = "ocr"
+
+    def __init__(self, min_confidence: float = 0.8):
+        self.min_confidence = min_confidence
+
+    @staticmethod
+    def available() -> bool:
+        """Whether pytesseract and the tesseract binary are installed."""
+        if pytesseract is None:
+            return False
+        try:
+            pytesseract.get_tesseract_version()
+            return True
+        except Exception:
+            return False
+
+    def locate(self, image: Image.Image, task: str, scale: float = 1.0) -> Optional[LocatorMatch]:
+        """
+        Locate the first quoted label in the task that appears exactly once on screen.
+
+        Args:
+            image: Decoded screenshot
+            task: Task text
+            scale: Size of the image relative to the screen (labels are read at any scale)
+
+        Returns:
+            Optional[LocatorMatch]: Match, or None if no label is confidently found
+        """
+        labels = quoted_labels(task)
+        if not labels:
+            return None
+
+        data = pytesseract.image_to_data(image, output_type=pytesseract.Output.DICT)
+        lines: Dict[Tuple[int, int, int], List[dict]] = {}
+        for i, text in enumerate(data["text"]):
+            confidence = float(data["conf"][i])
+            if not text.strip() or confidence < 0:
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append({
+                "words": _words(text),
+                "confidence": confidence / 100,
+                "box": (data["left"][i], data["top"][i], data["width"][i], data["height"][i]),
+            })
+
+        for label in labels:
+            target = _words(label)
+            if not target:
+                continue
+            matches = [match for line in lines.values() for match in self._find_in_line(line, target)]
+            # Ambiguous labels (e.g. two "Send" buttons) are left to the LLM
+            if len(matches) == 1 and matches[0][0] >= self.min_confidence:
+                confidence, (left, top, right, bottom) = matches[0]
+                return LocatorMatch(
+                    x=(left + right) // 2,
+                    y=(top + bottom) // 2,
+                    confidence=confidence,
+                    source=self.name,
+                    label=label,
+                )
+        return None
+
+    @staticmethod
+    def _find_in_line(line: List[dict], target: List[str]) -> List[Tuple[float, Tuple[int, int, int, int]]]:
+        """Return (confidence, box) for every run of OCR tokens in a line that spells the target words."""
+        tokens = [(word, token) for token in line for word in token["words"]]
+        found = []
+        for start in range(len(tokens) - len(target) + 1):
+            run = tokens[start:start + len(target)]
+            if [word for word, _ in run] != target:
+                continue
+            boxes = [token["box"] for _, token in run]
+            found.append((
+                min(token["confidence"] for _, token in run),
+                (
+                    min(left for left, _, _, _ in boxes),
+                    min(top for _, top, _, _ in boxes),
+                    max(left + width for left, _, width, _ in boxes),
+                    max(top + height for _, top, _, height in boxes),
+                ),
+            ))
+        return found
+
+
+class TemplateLocator:
+    """
+    Finds known widgets by template matching.
+
+    Templates are image files in a directory, named after the widget they
+    show with underscores for spaces (search_bar.png matches tasks that
+    mention "search bar").
+    """
+
+    name = "template"
+
+    def __init__(self, template_dir: Optional[str], min_confidence: float = 0.9):
+        self.min_confidence = min_confidence
+        self.templates: Dict[str, "np.ndarray"] = {}
+        if cv2 is None or not template_dir or not Path(template_dir).is_dir():
+            return
+        for path in sorted(Path(template_dir).iterdir()):
+            template = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+            if template is not None:
+                self.templates[path.stem.replace("_", " ").lower()] = template
+
+    def available(self) -> bool:
+        """Whether OpenCV is installed and at least one template was loaded."""
+        return cv2 is not None and bool(self.templates)
+
+    def locate(self, image: Image.Image, task: str, scale: float = 1.0) -> Optional[LocatorMatch]:
+        """
+        Locate a known widget mentioned in the task.
+
+        Args:
+            image: Decoded screenshot
+            task: Task text
+            scale: Size of the image relative to the screen; templates are resized to match
+
+        Returns:
+            Optional[LocatorMatch]: Best match above the confidence threshold, or None
+        """
+        mentioned = [widget for widget in self.templates if widget in (task or "").lower()]
+        if not mentioned:
+            return None
+
+        screen = np.asarray(image.convert("L"))
+        best = None
+        for widget in mentioned:
+            template = self.templates[widget]
+            if scale < 1.0:
+                # Templates are captured at screen resolution
+                size = (max(1, round(template.shape[1] * scale)), max(1, round(template.shape[0] * scale)))
+                template = cv2.resize(template, size, interpolation=cv2.INTER_AREA)
+            if template.shape[0] > screen.shape[0] or template.shape[1] > screen.shape[1]:
+                continue
+            scores = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (left, top) = cv2.minMaxLoc(scores)
+            if score >= self.min_confidence and (best is None or score > best.confidence):
+                best = LocatorMatch(
+                    x=left + template.shape[1] // 2,
+                    y=top + template.shape[0] // 2,
+                    confidence=float(score),
+                    source=self.name,
+                    label=widget,
+                )
+        return best
+
+
+class LocatorChain:
+    """
+    Runs local locators in order and keeps hit-rate and latency counters.
+
+    Locators whose dependencies are missing are dropped at construction.
+    """
+
+    def __init__(self, locators: List):
+        self.locators = [locator for locator in locators if locator.available()]
+        self._lock = threading.Lock()
+        self._counters = {"attempts": 0, "hits": 0, "misses": 0, "errors": 0, "total_ms": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any locator is available."""
+        return bool(self.locators)
+
+    def locate(self, image: Optional[PreparedImage], task: str) -> Tuple[Optional[LocatorMatch], float]:
+        """
+        Try every locator on a prepared screenshot until one finds the task's target.
+
+        The locators run on the downscaled image sent to the LLM, which is much
+        cheaper to scan than a full-resolution capture.
+
+        Args:
+            image: Prepared screenshot of the step
+            task: Task text
+
+        Returns:
+            Tuple[Optional[LocatorMatch], float]: Match in original screenshot
+                coordinates (None to fall back to the LLM) and the time spent in milliseconds
+        """
+        if not self.locators or image is None or not task:
+            return None, 0.0
+
+        start = time.perf_counter()
+        match = None
+        failed = False
+        try:
+            decoded = Image.open(io.BytesIO(image.data))
+            for locator in self.locators:
+                match = locator.locate(decoded, task, image.scale)
+                if match:
+                    x, y = image.to_original(match.x, match.y)
+                    match = replace(match, x=x, y=y)
+                    break
+        except Exception as e:
+            logger.warning("Local locator error: %s", e)
+            failed = True
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._counters["attempts"] += 1
+            self._counters["total_ms"] += elapsed_ms
+            if failed:
+                self._counters["errors"] += 1
+            self._counters["hits" if match else "misses"] += 1
+        return match, elapsed_ms
+
+    def stats(self) -> dict:
+        """Return hit rate and average latency across all attempts."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats["locators"] = [locator.name for locator in self.locators]
+        stats["hit_rate"] = stats["hits"] / stats["attempts"] if stats["attempts"] else 0.0
+        stats["avg_ms"] = stats["total_ms"] / stats["attempts"] if stats["attempts"] else 0.0
+        return stats
+
+
+def _env_locator_chain() -> LocatorChain:
+    """Build the locator chain from LOCAL_LOCATOR_* environment variables."""
+    names = [name.strip() for name in os.getenv("LOCAL_LOCATOR", "ocr,template").lower().split(",")]
+    min_confidence = float(os.getenv("LOCAL_LOCATOR_MIN_CONFIDENCE", "0.8"))
+    builders = {
+        "ocr": lambda: OcrLocator(min_confidence=min_confidence),
+        "template": lambda: TemplateLocator(
+            os.getenv("LOCAL_LOCATOR_TEMPLATES"),
+            min_confidence=float(os.getenv("LOCAL_LOCATOR_TEMPLATE_CONFIDENCE", "0.9")),
+        ),
+    }
+    return LocatorChain([builders[name]() for name in names if name in builders])
+
+
+# Global locator chain instance ("LOCAL_LOCATOR=off" disables every locator)
+local_locator = _env_locator_chain()
@@ -4,18 +4,83 @@ FastAPI server for the AI agent backend.
 Provides endpoints for the frontend to interact with the AI agents.
 """
 
+import asyncio
 import base64
-from typing import Optional
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+import json
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 from state import create_initial_state, update_screenshot, AgentState
-from orchestration_agent import orchestration_agent_node
-from coordinate_agent import coordinate_agent_node
+from orchestration_agent import get_orchestration_agent
+from coordinate_agent import get_coordinate_agent
+from fused_agent import get_fused_agent
+from session_store import Session, session_store
+from local_locator import local_locator
+import metrics
+from metrics import timed
+from prompt_cache import prompt_cache_stats
+from model_tiers import model_tier_stats
+from call_policy import call_policy
 from tts_service import tts_service
+from usage import SESSION_COST_BUDGET_USD, SESSION_TOKEN_BUDGET, add_step_usage, over_budget, track_step_usage
+from workflow import COMPLETION_MESSAGE, DEFAULT_VOICE_ID, STEP_RESULT, discard_checkpoints, run_step, stream_step
 
-app = FastAPI(title="AI Agent Backend", version="1.0.0")
+logger = logging.getLogger(__name__)
+
+# Fixed phrases that are synthesized at startup
+PREWARM_PHRASES = [COMPLETION_MESSAGE] + [
+    phrase.strip() for phrase in os.getenv("TTS_PREWARM_PHRASES", "").split("|") if phrase.strip()
+]
+
+# Graph nodes whose updates carry the task, the coordinates and the audio, for the streaming endpoints
+TASK_NODES = ("orchestrate", "fused", "advance", "plan")
+COORDINATE_NODES = ("fused", "locate")
+AUDIO_NODES = ("speak", "announce_completion")
+
+# Startup never waits longer than this for a provider connection
+WARM_UP_TIMEOUT_SECONDS = 10
+
+# "pipeline": orchestration agent then coordinate agent (two vision calls per step)
+# "fused": one vision call returns the task, description and coordinates together
+# "plan": plan every remaining task once, then only locate the next planned task
+#         per screenshot, replanning when its element is not on screen
+STEP_MODE = os.getenv("STEP_MODE", "pipeline").lower()
+
+
+async def warm_up_agents() -> None:
+    """Create the shared agents and open their API connections before the first user arrives."""
+    agent_getters = (get_fused_agent,) if STEP_MODE == "fused" else (get_orchestration_agent, get_coordinate_agent)
+    for get_agent in agent_getters:
+        try:
+            await asyncio.wait_for(get_agent().awarm_up(), timeout=WARM_UP_TIMEOUT_SECONDS)
+        except Exception as e:
+            logger.warning(f"Agent warm-up skipped: {e!r}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up long-lived agents and pre-synthesize fixed phrases at startup, and expire idle sessions in the background."""
+    expiry = asyncio.create_task(session_store.run_expiry(on_discard=discard_checkpoints))
+    await asyncio.gather(
+        warm_up_agents(),
+        asyncio.wait_for(
+            tts_service.prewarm(PREWARM_PHRASES, voice_id=DEFAULT_VOICE_ID),
+            timeout=WARM_UP_TIMEOUT_SECONDS
+        ),
+        return_exceptions=True
+    )
+    yield
+    expiry.cancel()
+
+
+app = FastAPI(title="AI Agent Backend", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware to allow requests from frontend
 app.add_middleware(
@@ -24,21 +89,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read the per-stage timings
+    expose_headers=["Server-Timing"],
 )
 
-# Global state storage (in production, use proper state management)
-current_state: Optional[AgentState] = None
 
-
-def generate_audio_for_text(text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM") -> Optional[str]:
-    """Generate audio for the given text using TTS service."""
-    try:
-        result = tts_service.text_to_speech(text, voice_id=voice_id)
-        if "error" not in result:
-            return result.get("audio_base64")
-    except Exception as e:
-        print(f"TTS error: {e}")
-    return None
+@app.middleware("http")
+async def record_timings(request: Request, call_next):
+    """Time every request and report its stage timings in a Server-Timing header."""
+    timings = metrics.start_request_timings()
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    
+    # Label by route template so session ids and unknown paths don't create new series
+    route = request.scope.get("route")
+    metrics.REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        path=route.path if route is not None else "unmatched",
+        status=response.status_code,
+    )
+    response.headers["Server-Timing"] = metrics.server_timing(timings, total=elapsed)
+    return response
 
 
 class InitialRequest(BaseModel):
@@ -47,6 +120,7 @@ class InitialRequest(BaseModel):
 
 
 class CoordinateResponse(BaseModel):
+    session_id: str
     x: int
     y: int
     task: str
@@ -57,135 +131,471 @@ class CoordinateResponse(BaseModel):
 
 class UpdateScreenshotRequest(BaseModel):
     screenshot_base64: str
+    session_id: Optional[str] = None
 
 
-@app.post("/initialize", response_model=CoordinateResponse)
-async def initialize_session(request: InitialRequest):
+async def step_response(session: Session, current_state: AgentState, audio_base64: Optional[str]) -> CoordinateResponse:
     """
-    Initialize a new session with user query and screenshot.
-    Returns the first task and coordinates.
-    """
-    global current_state
+    Build the response for a finished step and store it with the step's state.
     
-    try:
-        # Decode base64 image
-        image_data = base64.b64decode(request.screenshot_base64)
+    Args:
+        session: Session the step ran for
+        current_state: State after the workflow step
+        audio_base64: Audio for the task, or for the completion message
         
-        # Create initial state
-        current_state = create_initial_state(image_data, request.user_query)
-        
-        # Run orchestration agent to get first task
-        current_state = orchestration_agent_node(current_state)
-        
-        # Run coordinate agent to get coordinates
-        current_state = coordinate_agent_node(current_state)
-        
-        # Generate audio for the task description
-        audio_base64 = generate_audio_for_text(current_state["current_task"])
-        
-        return CoordinateResponse(
+    Returns:
+        CoordinateResponse: The next task and coordinates, or the completion message
+    """
+    if current_state["is_task_completed"]:
+        response = CoordinateResponse(
+            session_id=session.session_id,
+            x=0,
+            y=0,
+            task="Task completed",
+            task_description=COMPLETION_MESSAGE,
+            is_completed=True,
+            audio_base64=audio_base64
+        )
+    else:
+        response = CoordinateResponse(
+            session_id=session.session_id,
             x=current_state["coordinates"][0],
             y=current_state["coordinates"][1],
             task=current_state["current_task"],
             task_description=current_state["task_description"],
-            is_completed=current_state["is_task_completed"],
+            is_completed=False,
             audio_base64=audio_base64
         )
+    await save_step_result(session, current_state, response)
+    return response
+
+
+async def save_step_result(session: Session, current_state: AgentState, response: CoordinateResponse) -> None:
+    """Store the step's state and response so an unchanged screenshot can reuse it."""
+    current_state = current_state.copy()
+    current_state["last_step_result"] = response.model_dump(exclude={"session_id"})
+    # Off the event loop: with a session database this writes the screenshot to disk
+    with timed("save"):
+        await asyncio.to_thread(session_store.save, session, current_state)
+
+
+@asynccontextmanager
+async def metered_step(session: Session):
+    """
+    Collect the usage of a step's model calls.
     
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+    A step that does not finish has still spent tokens (failed calls,
+    retries, escalations): its usage is then added to the session's last
+    saved state, so sessions whose steps keep failing still hit their budget.
+    
+    Args:
+        session: Session the step runs for (its lock must be held)
+        
+    Yields:
+        StepUsage: Usage to pass to add_step_usage() once the step finished
+    """
+    with track_step_usage() as step_usage:
+        try:
+            yield step_usage
+        finally:
+            if not step_usage.charged and step_usage.calls:
+                await asyncio.to_thread(session_store.save, session, add_step_usage(session.state, step_usage))
 
 
-@app.post("/update_screenshot", response_model=CoordinateResponse)
-async def update_screenshot_and_continue(request: UpdateScreenshotRequest):
+async def run_metered_step(session: Session, state: AgentState):
     """
-    Update the screenshot and continue the workflow.
-    Returns the next task and coordinates.
+    Run a workflow step and add the usage of its model calls to the session's totals.
+    
+    Args:
+        session: Session the step runs for
+        state: State with the step's screenshot
+        
+    Returns:
+        Tuple[AgentState, Optional[str]]: State after the step, and its audio
+    """
+    async with metered_step(session) as step_usage:
+        current_state, audio_base64 = await run_step(state, session.session_id, STEP_MODE)
+        return add_step_usage(current_state, step_usage), audio_base64
+
+
+async def start_session(image_data: bytes, user_query: str) -> CoordinateResponse:
     """
-    global current_state
+    Create a session for a new query and run the first workflow step.
     
-    if current_state is None:
-        raise HTTPException(status_code=400, detail="No active session. Please initialize first.")
+    Args:
+        image_data: Raw screenshot bytes
+        user_query: The user's query
+        
+    Returns:
+        CoordinateResponse: Session id, first task and coordinates
+    """
+    if not image_data:
+        raise HTTPException(status_code=400, detail="Screenshot is empty")
     
     try:
-        # Decode base64 image
-        image_data = base64.b64decode(request.screenshot_base64)
+        # Create initial state (fingerprinting the screenshot off the event loop) and register the session
+        with timed("prepare"):
+            initial_state = await asyncio.to_thread(create_initial_state, image_data, user_query)
+        session = session_store.create(initial_state)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+    
+    async with session.lock:
+        try:
+            # Run the workflow to get the first task, its coordinates and its audio
+            current_state, audio_base64 = await run_metered_step(session, session.state)
+            return await step_response(session, current_state, audio_base64)
         
-        # Update screenshot in state
-        current_state = update_screenshot(current_state, image_data)
+        except Exception as e:
+            await asyncio.to_thread(session_store.delete, session.session_id)
+            await discard_checkpoints(session.session_id)
+            raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+
+async def active_session(session_id: Optional[str]) -> Session:
+    """
+    Look up a session before its screenshot is read or decoded.
+    
+    Args:
+        session_id: Session returned by one of the initialize endpoints
         
-        # Run orchestration agent to get next task
-        current_state = orchestration_agent_node(current_state)
+    Returns:
+        Session: The active session
         
-        # Check if task is completed
-        if current_state["is_task_completed"]:
-            completion_message = "All tasks have been completed successfully."
-            audio_base64 = generate_audio_for_text(completion_message)
-            return CoordinateResponse(
-                x=0,
-                y=0,
-                task="Task completed",
-                task_description=completion_message,
-                is_completed=True,
-                audio_base64=audio_base64
-            )
+    Raises:
+        HTTPException: 400 if there is no such session
+    """
+    session = await session_store.aget(session_id)
+    if session is None:
+        raise HTTPException(status_code=400, detail="No active session. Please initialize first.")
+    return session
+
+
+async def continue_session(session: Session, image_data: bytes) -> CoordinateResponse:
+    """
+    Update a session's screenshot and run the next workflow step.
+    
+    Args:
+        session: Session from active_session
+        image_data: Raw screenshot bytes
         
-        # Run coordinate agent to get coordinates for new task
-        current_state = coordinate_agent_node(current_state)
+    Returns:
+        CoordinateResponse: Next task and coordinates
+    """
+    if not image_data:
+        raise HTTPException(status_code=400, detail="Screenshot is empty")
+    
+    async with session.lock:
+        # Sessions over their token or cost budget get no further model calls
+        budget_exceeded = over_budget(session.state.get("usage"))
+        if budget_exceeded:
+            raise HTTPException(status_code=429, detail=budget_exceeded)
         
-        # Generate audio for the task description
-        audio_base64 = generate_audio_for_text(current_state["current_task"])
+        try:
+            # Update screenshot in state (fingerprinting it off the event loop)
+            with timed("prepare"):
+                current_state = await asyncio.to_thread(update_screenshot, session.state, image_data)
+            
+            # Nothing changed on screen since the last step: reuse its result
+            if current_state["screen_unchanged"] and current_state["last_step_result"]:
+                return CoordinateResponse(session_id=session.session_id, **current_state["last_step_result"])
+            
+            # Run the workflow to get the next task, its coordinates and its audio
+            # (a retry of a step that failed on this screenshot resumes from its checkpoint)
+            current_state, audio_base64 = await run_metered_step(session, current_state)
+            return await step_response(session, current_state, audio_base64)
         
-        return CoordinateResponse(
-            x=current_state["coordinates"][0],
-            y=current_state["coordinates"][1],
-            task=current_state["current_task"],
-            task_description=current_state["task_description"],
-            is_completed=current_state["is_task_completed"],
-            audio_base64=audio_base64
-        )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def task_payload(state: dict) -> Optional[dict]:
+    """The task event for a state, or None while the step has no task yet."""
+    if state.get("is_task_completed"):
+        return {"task": "Task completed", "task_description": COMPLETION_MESSAGE, "is_completed": True}
+    if state.get("current_task"):
+        return {"task": state["current_task"], "task_description": state.get("task_description"), "is_completed": False}
+    return None
+
+
+def response_events(response: CoordinateResponse) -> Dict[str, dict]:
+    """The task, coordinates and audio events of a finished step's response."""
+    events = {"task": {"task": response.task, "task_description": response.task_description, "is_completed": response.is_completed}}
+    if not response.is_completed:
+        events["coordinates"] = {"x": response.x, "y": response.y}
+    events["audio"] = {"audio_base64": response.audio_base64}
+    return events
+
+
+async def stream_step_events(session: Session, state: AgentState) -> AsyncIterator[str]:
+    """
+    Run a workflow step and yield its results as Server-Sent Events as soon as each stage finishes.
+    
+    Events: "task" (task, description, is_completed), "coordinates" (x, y) and
+    "audio" (audio_base64, null if synthesis failed), in the order they become
+    available, then "done" with the full response minus the audio. A replan
+    in STEP_MODE=plan can send a second "task" and "coordinates" that replace
+    the first. The step is saved like a non-streaming step before "done".
+    
+    Args:
+        session: Session the step runs for (its lock must be held)
+        state: State with the step's screenshot
+        
+    Yields:
+        str: Formatted events
+    """
+    current = dict(state)
+    sent: Dict[str, dict] = {}
+    
+    def changed(event: str, payload: Optional[dict]) -> bool:
+        if payload is None or sent.get(event) == payload:
+            return False
+        sent[event] = payload
+        return True
     
+    async with metered_step(session) as step_usage:
+        async for node, update in stream_step(state, session.session_id, STEP_MODE):
+            if node == STEP_RESULT:
+                current_state = add_step_usage(update["state"], step_usage)
+                audio_base64 = update["audio_base64"]
+                break
+            current.update(update)
+            # "advance" leaves the task unchanged when there is no plan yet
+            has_task = node in TASK_NODES and (node != "advance" or "current_task" in update)
+            if has_task and changed("task", task_payload(current)):
+                yield sse_event("task", sent["task"])
+            if node in COORDINATE_NODES and not current.get("is_task_completed") and current.get("coordinates"):
+                x, y = current["coordinates"]
+                if changed("coordinates", {"x": x, "y": y}):
+                    yield sse_event("coordinates", sent["coordinates"])
+            if node in AUDIO_NODES and changed("audio", {"audio_base64": update.get("audio_base64")}):
+                yield sse_event("audio", sent["audio"])
+    
+    response = await step_response(session, current_state, audio_base64)
+    # A step resumed from its checkpoint skips the nodes that already ran
+    for event, payload in response_events(response).items():
+        if event not in sent:
+            yield sse_event(event, payload)
+    yield sse_event("done", response.model_dump(exclude={"audio_base64"}))
+
+
+async def stream_start_session(initial_state: AgentState) -> AsyncIterator[str]:
+    """
+    Register a new session and stream its first step; a failed first step removes the session.
+
+    The session is created here, when the response starts, and its lock is
+    taken before anything is awaited, so LRU eviction never drops it before
+    its first step runs.
+    """
+    session = session_store.create(initial_state)
+    async with session.lock:
+        yield sse_event("session", {"session_id": session.session_id})
+        try:
+            async for event in stream_step_events(session, session.state):
+                yield event
+        except Exception as e:
+            await asyncio.to_thread(session_store.delete, session.session_id)
+            await discard_checkpoints(session.session_id)
+            yield sse_event("error", {"status_code": 500, "detail": f"Error processing request: {str(e)}"})
+
+
+async def stream_continue_session(session: Session, image_data: bytes) -> AsyncIterator[str]:
+    """Stream the next step of a session, or replay the last one if the screen did not change."""
+    async with session.lock:
+        # Checked again under the lock: another step may have used up the budget meanwhile
+        budget_exceeded = over_budget(session.state.get("usage"))
+        if budget_exceeded:
+            yield sse_event("error", {"status_code": 429, "detail": budget_exceeded})
+            return
+        try:
+            with timed("prepare"):
+                current_state = await asyncio.to_thread(update_screenshot, session.state, image_data)
+            
+            # Nothing changed on screen since the last step: replay its result
+            if current_state["screen_unchanged"] and current_state["last_step_result"]:
+                response = CoordinateResponse(session_id=session.session_id, **current_state["last_step_result"])
+                for event, payload in response_events(response).items():
+                    yield sse_event(event, payload)
+                yield sse_event("done", response.model_dump(exclude={"audio_base64"}))
+                return
+            
+            async for event in stream_step_events(session, current_state):
+                yield event
+        except Exception as e:
+            yield sse_event("error", {"status_code": 500, "detail": f"Error processing request: {str(e)}"})
+
+
+def event_stream(events: AsyncIterator[str]) -> StreamingResponse:
+    """Serve events as a text/event-stream response that proxies do not buffer."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def decode_screenshot(screenshot_base64: str) -> bytes:
+    """Decode a base64 screenshot off the event loop."""
+    try:
+        with timed("decode"):
+            return await asyncio.to_thread(base64.b64decode, screenshot_base64)
+    except ValueError as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+
+@app.post("/initialize", response_model=CoordinateResponse)
+async def initialize_session(request: InitialRequest):
+    """
+    Initialize a new session with user query and base64 screenshot.
+    Returns the session id, the first task and coordinates.
+    """
+    image_data = await decode_screenshot(request.screenshot_base64)
+    return await start_session(image_data, request.user_query)
+
+
+@app.post("/initialize/upload", response_model=CoordinateResponse)
+async def initialize_session_upload(user_query: str = Form(...), screenshot: UploadFile = File(...)):
+    """
+    Initialize a new session with a multipart screenshot upload.
+    Returns the session id, the first task and coordinates.
+    """
+    image_data = await screenshot.read()
+    return await start_session(image_data, user_query)
+
+
+@app.post("/initialize/raw", response_model=CoordinateResponse)
+async def initialize_session_raw(request: Request, user_query: str):
+    """
+    Initialize a new session with the screenshot as the raw request body
+    (application/octet-stream) and the query as a query parameter.
+    Returns the session id, the first task and coordinates.
+    """
+    image_data = await request.body()
+    return await start_session(image_data, user_query)
+
+
+@app.post("/update_screenshot", response_model=CoordinateResponse)
+async def update_screenshot_and_continue(request: UpdateScreenshotRequest):
+    """
+    Update the screenshot (base64) and continue the workflow.
+    Returns the next task and coordinates.
+    """
+    session = await active_session(request.session_id)
+    image_data = await decode_screenshot(request.screenshot_base64)
+    return await continue_session(session, image_data)
+
+
+@app.post("/update_screenshot/upload", response_model=CoordinateResponse)
+async def update_screenshot_upload(screenshot: UploadFile = File(...), session_id: Optional[str] = Form(None)):
+    """
+    Update the screenshot with a multipart upload and continue the workflow.
+    Returns the next task and coordinates.
+    """
+    session = await active_session(session_id)
+    image_data = await screenshot.read()
+    return await continue_session(session, image_data)
+
+
+@app.post("/update_screenshot/raw", response_model=CoordinateResponse)
+async def update_screenshot_raw(request: Request, session_id: Optional[str] = None):
+    """
+    Update the screenshot with the raw request body (application/octet-stream)
+    and continue the workflow. Returns the next task and coordinates.
+    """
+    session = await active_session(session_id)
+    image_data = await request.body()
+    return await continue_session(session, image_data)
+
+
+@app.post("/initialize/stream")
+async def initialize_session_stream(request: InitialRequest):
+    """
+    Initialize a new session like /initialize, streaming the first step as Server-Sent Events:
+    "session", then "task", "coordinates" and "audio" as each is ready, then "done".
+    """
+    image_data = await decode_screenshot(request.screenshot_base64)
+    if not image_data:
+        raise HTTPException(status_code=400, detail="Screenshot is empty")
+    try:
+        with timed("prepare"):
+            initial_state = await asyncio.to_thread(create_initial_state, image_data, request.user_query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+    return event_stream(stream_start_session(initial_state))
+
+
+@app.post("/update_screenshot/stream")
+async def update_screenshot_stream(request: UpdateScreenshotRequest):
+    """
+    Update the screenshot like /update_screenshot, streaming the next step as Server-Sent Events:
+    "task", "coordinates" and "audio" as each is ready, then "done".
+    """
+    session = await active_session(request.session_id)
+    budget_exceeded = over_budget(session.state.get("usage"))
+    if budget_exceeded:
+        raise HTTPException(status_code=429, detail=budget_exceeded)
+    image_data = await decode_screenshot(request.screenshot_base64)
+    if not image_data:
+        raise HTTPException(status_code=400, detail="Screenshot is empty")
+    return event_stream(stream_continue_session(session, image_data))
 
 
 @app.get("/status")
-async def get_status():
+async def get_status(session_id: Optional[str] = None):
     """
     Get the current status of the session.
     """
-    global current_state
+    session = await session_store.aget(session_id)
     
-    if current_state is None:
+    if session is None:
         return {"status": "No active session"}
     
+    current_state = session.state
     return {
         "status": "Active session",
+        "session_id": session.session_id,
         "current_task": current_state.get("current_task"),
         "task_description": current_state.get("task_description"),
         "coordinates": current_state.get("coordinates"),
         "is_completed": current_state.get("is_task_completed", False),
-        "task_history_count": len(current_state.get("task_history", []))
+        "task_history_count": current_state["task_history"].total,
+        "plan_steps_remaining": max(len(current_state.get("plan") or []) - current_state.get("plan_index", 0) - 1, 0),
+        "locator": current_state.get("locator"),
+        "usage": {
+            "last_step": current_state.get("step_usage"),
+            "session": current_state.get("usage"),
+            "token_budget": SESSION_TOKEN_BUDGET or None,
+            "cost_budget_usd": SESSION_COST_BUDGET_USD or None,
+        },
+        "local_locator_stats": local_locator.stats(),
+        "prompt_cache_stats": prompt_cache_stats(),
+        "model_tier_stats": model_tier_stats(),
+        "call_policy_stats": call_policy.stats(),
     }
 
 
 @app.post("/reset")
-async def reset_session():
+async def reset_session(session_id: Optional[str] = None):
     """
-    Reset the current session.
+    Reset the given session.
     """
-    global current_state
-    current_state = None
+    await asyncio.to_thread(session_store.delete, session_id)
+    await discard_checkpoints(session_id)
     return {"message": "Session reset successfully"}
 
 
 @app.post("/tts/generate")
-async def generate_tts(text: str = Form(...), voice_id: str = Form("21m00Tcm4TlvDq8ikWAM")):
+async def generate_tts(text: str = Form(...), voice_id: str = Form(DEFAULT_VOICE_ID)):
     """
     Generate text-to-speech audio for the given text.
     """
     try:
-        result = tts_service.text_to_speech(text, voice_id=voice_id)
+        result = await tts_service.atext_to_speech(text, voice_id=voice_id)
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
         return result
@@ -193,13 +603,39 @@ async def generate_tts(text: str = Form(...), voice_id: str = Form("21m00Tcm4Tlv
         raise HTTPException(status_code=500, detail=f"TTS generation failed: {str(e)}")
 
 
+@app.post("/tts/stream")
+async def stream_tts(text: str = Form(...), voice_id: str = Form(DEFAULT_VOICE_ID)):
+    """
+    Stream text-to-speech audio (MP3) to the client as it is synthesized.
+    """
+    stream = tts_service.astream_speech(text, voice_id=voice_id)
+    
+    # Wait for the first chunk so configuration and API errors become HTTP errors
+    try:
+        first_chunk = await stream.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        metrics.TTS_FAILURES.inc(reason="error")
+        raise HTTPException(status_code=500, detail=f"TTS streaming failed: {str(e)}")
+    
+    async def audio_chunks():
+        yield first_chunk
+        async for chunk in stream:
+            yield chunk
+    
+    return StreamingResponse(audio_chunks(), media_type="audio/mpeg")
+
+
 @app.get("/tts/voices")
 async def get_tts_voices():
     """
     Get list of available TTS voices.
     """
     try:
-        result = tts_service.get_available_voices()
+        result = await asyncio.to_thread(tts_service.get_available_voices)
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
         return result
@@ -207,6 +643,14 @@ async def get_tts_voices():
         raise HTTPException(status_code=500, detail=f"Failed to get voices: {str(e)}")
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Stage latency histograms and event counters in the Prometheus text format.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health")
 async def health_check():
     """
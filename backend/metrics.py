@@ -0,0 +1,227 @@
+"""
+Process-wide latency histograms and event counters.
+
+Every stage of a step is timed with `timed(stage)`, which records the
+duration in the step_stage_seconds histogram and, while a request is being
+handled, in that request's Server-Timing header. Counters track cache hits,
+fallbacks to text parsing of coordinates and TTS failures. render() writes
+everything in the Prometheus text format served by /metrics.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple, Union
+
+# Upper bounds in seconds; model calls take seconds, local stages milliseconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Add to the counter for the given label values."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """Current value for the given label values."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram of durations in seconds, with optional labels."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # Per label values: [count per bucket..., count, sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation for the given label values."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        """Number of observations for the given label values."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            return series[-2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-2]}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_count{labels} {series[-2]}")
+                lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request.", ("method", "path", "status")
+)
+STAGE_SECONDS = Histogram(
+    "step_stage_seconds", "Time spent in each stage of a step.", ("stage",)
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total", "Cache lookups by cache and result (memory_hit, disk_hit, miss).", ("cache", "result")
+)
+COORDINATE_PARSE_FALLBACKS = Counter(
+    "coordinate_parse_fallbacks_total",
+    "Coordinates recovered from text because structured output failed, by reason.",
+    ("reason",),
+)
+TTS_FAILURES = Counter(
+    "tts_failures_total", "Speech generations that returned no audio, by reason.", ("reason",)
+)
+LOCATOR_RESOLUTIONS = Counter(
+    "locator_resolutions_total", "Targets located, by the locator that resolved them (llm when no local match).", ("source",)
+)
+LOCATOR_SECONDS = Histogram(
+    "locator_seconds", "Time to locate a target, by stage (local, total) and resolving locator.", ("stage", "source")
+)
+
+# Metrics served by /metrics; other modules add theirs with register()
+_registry: List[Union[Counter, Histogram]] = [
+    REQUEST_SECONDS, STAGE_SECONDS, CACHE_LOOKUPS, COORDINATE_PARSE_FALLBACKS, TTS_FAILURES,
+    LOCATOR_RESOLUTIONS, LOCATOR_SECONDS,
+]
+_registry_lock = threading.Lock()
+
+# Stage timings of the request being handled, for its Server-Timing header
+_request_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_timings", default=None)
+
+
+def register(metric: Union[Counter, Histogram]) -> Union[Counter, Histogram]:
+    """
+    Serve a metric defined elsewhere on /metrics.
+
+    Args:
+        metric: Counter or histogram
+
+    Returns:
+        The metric, so it can be registered where it is defined
+    """
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Time a stage of a step.
+
+    Works around awaits as well: `with timed("orchestrate"): await ...`.
+
+    Args:
+        stage: Stage name, used as the histogram label and Server-Timing metric name
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((stage, elapsed))
+
+
+def start_request_timings() -> List[Tuple[str, float]]:
+    """
+    Collect the stage timings of the current request.
+
+    Tasks and threads started by the request inherit the collection, so
+    stages timed in parallel workflow branches are included.
+
+    Returns:
+        List[Tuple[str, float]]: (stage, seconds) pairs, filled in as stages finish
+    """
+    timings: List[Tuple[str, float]] = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing(timings: List[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """
+    Format stage timings as a Server-Timing header value.
+
+    Args:
+        timings: (stage, seconds) pairs from start_request_timings()
+        total: Whole request duration in seconds, if known
+
+    Returns:
+        str: e.g. "decode;dur=3.1, orchestrate;dur=2140.7, total;dur=2301.4"
+    """
+    entries = list(timings) + ([("total", total)] if total is not None else [])
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in entries)
+
+
+def render() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    with _registry_lock:
+        registered = list(_registry)
+    lines = []
+    for metric in registered:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,220 @@
+"""
+Model tiers for the agents' calls, with escalation of rejected answers.
+
+Every agent sends its calls to a configurable tier: "fast" (FAST_MODEL) or
+"strong" (STRONG_MODEL). An agent on the fast tier checks each answer, and
+when it fails validation (the call raised, structured output did not parse,
+coordinates fall outside the screenshot) the same prompt is sent once more to
+the strong tier. Agents on the strong tier never escalate.
+
+Calls, latency and escalations are counted per agent and tier, on /metrics
+and in model_tier_stats() (served by /status), which also estimates how much
+latency the fast tier saves per call once both tiers have answered.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage
+
+from call_policy import CallPolicy, call_policy
+from metrics import Counter, Histogram, register
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+FAST_MODEL = os.getenv("FAST_MODEL", "claude-3-5-haiku-20241022")
+STRONG_MODEL = os.getenv("STRONG_MODEL", "claude-sonnet-4-20250514")
+TIER_MODELS = {"fast": FAST_MODEL, "strong": STRONG_MODEL}
+
+# Tier rejected answers are retried on
+ESCALATION_TIER = "strong"
+
+# Tier each agent's calls go to first, e.g. COORDINATE_TIER=fast
+AGENT_TIERS = {
+    "orchestration": os.getenv("ORCHESTRATION_TIER", "strong").lower(),
+    "coordinate": os.getenv("COORDINATE_TIER", "strong").lower(),
+    "fused": os.getenv("FUSED_TIER", "strong").lower(),
+}
+
+MODEL_TIER_CALLS = register(Counter("model_tier_calls_total", "Model calls by agent and tier.", ("agent", "tier")))
+MODEL_TIER_ESCALATIONS = register(Counter(
+    "model_tier_escalations_total",
+    "Answers rejected on a tier and retried on the escalation tier, by agent, tier and reason.",
+    ("agent", "tier", "reason"),
+))
+MODEL_TIER_SECONDS = register(
+    Histogram("model_tier_call_seconds", "Time per model call by agent and tier.", ("agent", "tier"))
+)
+
+# Per (agent, tier): calls, escalations and total call seconds since startup
+_stats: Dict[tuple, Dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+def _record(agent: str, tier: str, elapsed: float, escalated: bool = False) -> None:
+    MODEL_TIER_CALLS.inc(agent=agent, tier=tier)
+    MODEL_TIER_SECONDS.observe(elapsed, agent=agent, tier=tier)
+    with _stats_lock:
+        stats = _stats.setdefault((agent, tier), {"calls": 0, "escalations": 0, "seconds": 0.0})
+        stats["calls"] += 1
+        stats["seconds"] += elapsed
+        stats["escalations"] += escalated
+
+
+class ModelTiers:
+    """
+    Routing of one agent's calls: its tier's model first, then the escalation
+    tier's model for answers that fail validation.
+
+    The agent builds its chat models from `model` and `escalation_model` and
+    passes the structured runnables of both to invoke()/ainvoke(). Each tier's
+    call is made under `policy` (deadline, retries, hedging).
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        tier: Optional[str] = None,
+        model_name: Optional[str] = None,
+        policy: Optional[CallPolicy] = None,
+    ):
+        """
+        Args:
+            agent: Agent name used in metrics and stats
+            tier: "fast" or "strong"; AGENT_TIERS when omitted
+            model_name: Model for the first attempt; the tier's model when omitted
+            policy: Deadline, retry and hedging policy; the shared call_policy when omitted
+        """
+        self.agent = agent
+        self.policy = policy or call_policy
+        self.tier = (tier or AGENT_TIERS.get(agent, ESCALATION_TIER)).lower()
+        if self.tier not in TIER_MODELS:
+            raise ValueError(f"Unknown model tier '{self.tier}' for {agent}. Use one of: {', '.join(TIER_MODELS)}")
+        self.model = model_name or TIER_MODELS[self.tier]
+        self.escalation_model = TIER_MODELS[ESCALATION_TIER] if self.tier != ESCALATION_TIER else None
+
+    def _escalate(self, reason: str) -> None:
+        MODEL_TIER_ESCALATIONS.inc(agent=self.agent, tier=self.tier, reason=reason)
+        logger.info("%s: %s tier answer rejected (%s), escalating to %s", self.agent, self.tier, reason, self.escalation_model)
+
+    def invoke(
+        self,
+        runnable: Any,
+        escalation: Optional[Any],
+        messages: List[BaseMessage],
+        reject: Optional[Callable[[Any], Optional[str]]] = None,
+    ) -> Any:
+        """
+        Call the first tier, and the escalation tier if its answer is rejected.
+
+        Args:
+            runnable: Structured output runnable of the agent's tier
+            escalation: The same runnable on the escalation tier, or None to never escalate
+            messages: Prompt, sent unchanged to both tiers
+            reject: Returns why an answer fails validation, or None to accept it
+
+        Returns:
+            The accepted answer, or the escalation tier's answer. Errors of the
+            escalation call (or of the only call, without escalation) are raised.
+        """
+        start = time.perf_counter()
+        try:
+            response = self.policy.invoke(runnable, messages, self.agent, self.tier)
+            reason = reject(response) if reject and escalation is not None else None
+        except Exception as e:
+            if escalation is None:
+                _record(self.agent, self.tier, time.perf_counter() - start)
+                raise
+            logger.warning("%s: call on the %s tier failed: %r", self.agent, self.tier, e)
+            reason = "call_error"
+        _record(self.agent, self.tier, time.perf_counter() - start, escalated=reason is not None)
+        if reason is None:
+            return response
+
+        self._escalate(reason)
+        start = time.perf_counter()
+        try:
+            return self.policy.invoke(escalation, messages, self.agent, ESCALATION_TIER)
+        finally:
+            _record(self.agent, ESCALATION_TIER, time.perf_counter() - start)
+
+    async def ainvoke(
+        self,
+        runnable: Any,
+        escalation: Optional[Any],
+        messages: List[BaseMessage],
+        reject: Optional[Callable[[Any], Optional[str]]] = None,
+    ) -> Any:
+        """
+        Async version of invoke that does not block the event loop.
+
+        Args:
+            runnable: Structured output runnable of the agent's tier
+            escalation: The same runnable on the escalation tier, or None to never escalate
+            messages: Prompt, sent unchanged to both tiers
+            reject: Returns why an answer fails validation, or None to accept it
+
+        Returns:
+            The accepted answer, or the escalation tier's answer
+        """
+        start = time.perf_counter()
+        try:
+            response = await self.policy.ainvoke(runnable, messages, self.agent, self.tier)
+            reason = reject(response) if reject and escalation is not None else None
+        except Exception as e:
+            if escalation is None:
+                _record(self.agent, self.tier, time.perf_counter() - start)
+                raise
+            logger.warning("%s: call on the %s tier failed: %r", self.agent, self.tier, e)
+            reason = "call_error"
+        _record(self.agent, self.tier, time.perf_counter() - start, escalated=reason is not None)
+        if reason is None:
+            return response
+
+        self._escalate(reason)
+        start = time.perf_counter()
+        try:
+            return await self.policy.ainvoke(escalation, messages, self.agent, ESCALATION_TIER)
+        finally:
+            _record(self.agent, ESCALATION_TIER, time.perf_counter() - start)
+
+
+def model_tier_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Calls, escalation rate and latency per agent and tier since startup.
+
+    For an agent whose fast tier and escalation tier have both answered, the
+    fast tier also reports `est_saved_ms_per_call`: the escalation tier's
+    average latency minus what a fast tier call costs on average, including
+    the escalations it triggers. Negative values mean escalations cost more
+    than the fast tier saves.
+    """
+    with _stats_lock:
+        snapshot = {key: dict(stats) for key, stats in _stats.items()}
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for (agent, tier), stats in sorted(snapshot.items()):
+        calls = stats["calls"]
+        report.setdefault(agent, {})[tier] = {
+            "model": TIER_MODELS.get(tier),
+            "calls": int(calls),
+            "escalations": int(stats["escalations"]),
+            "escalation_rate": stats["escalations"] / calls if calls else 0.0,
+            "avg_ms": stats["seconds"] * 1000 / calls if calls else 0.0,
+        }
+
+    for tiers in report.values():
+        strong = tiers.get(ESCALATION_TIER)
+        for tier, stats in tiers.items():
+            if tier == ESCALATION_TIER or not strong or not stats["calls"]:
+                continue
+            cost_ms = stats["avg_ms"] + stats["escalation_rate"] * strong["avg_ms"]
+            stats["est_saved_ms_per_call"] = strong["avg_ms"] - cost_ms
+    return report
@@ -1,20 +1,91 @@
-import base64
+import asyncio
 import os
-from typing import List
+import threading
+from typing import List, Optional
 from dotenv import load_dotenv
 from langchain_anthropic import ChatAnthropic
-from langchain_core.messages import HumanMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from state import AgentState
+from image_processing import DEFAULT_IMAGE_SETTINGS, PreparedImage, prepare_screenshot
+from cache import cache_key, response_cache
+from history import chat_label, render_progress
+from call_policy import CLIENT_OPTIONS, awarm_up_model
+from model_tiers import ModelTiers
+from prompt_cache import prompt_cache_usage
 from pydantic import BaseModel, Field
 
 class Task_and_Description(BaseModel):
     task: str = Field(..., description="The task to be executed")
     description: str = Field(..., description="Detailed description of the current state of the interface")
 
+
+class Plan(BaseModel):
+    steps: List[Task_and_Description] = Field(
+        ...,
+        description="Ordered remaining tasks from the current screen to the user's goal. Empty if the goal is already accomplished."
+    )
+
 # Load environment variables from .env file
 load_dotenv()
 
+# Instructions are constant across calls;
+# the user query, progress and screenshot follow in the user message
+TASK_SYSTEM_PROMPT = """You are an AI orchestration agent that analyzes screenshots and user requests to break them down into specific, actionable tasks.
+
+Your job is to:
+1. Analyze the provided screenshot to understand the current state of the interface, and provide a detailed description of the current state of the interface.
+2. Understand what the user wants to accomplish, given as the user request.
+3. Break down the user's request into a specific, actionable task from the user's current state. You MUST generate **ONE** task from the current state.
+4. Each task should be a clear action that can be performed on the interface.
+
+The tasks already completed are listed after the user request.
+
+Guidelines:
+- Be specific about UI elements (buttons, fields, menus, etc.)
+- task should be atomic and actionable
+- Focus on what needs to be clicked, typed, or interacted with
+- Consider the current state shown in the screenshot
+
+Example:
+User query: "I want to send an email to someone on gmail, how can i do this?"
+Screeenshot: [screenshot of a browser window]
+
+Task: "Click on the search bar and type 'gmail.com' and press enter"
+Description: "The user is currently on the home page of the browser, they want to send an email to someone on gmail.com"
+
+
+
+Return your response as a simple list of task strings, one per line, without numbering or bullet points."""
+
+PLAN_SYSTEM_PROMPT = """You are an AI orchestration agent that analyzes screenshots and user requests to plan the specific, actionable tasks needed to fulfill them.
+
+Your job is to:
+1. Analyze the provided screenshot to understand the current state of the interface.
+2. Understand what the user wants to accomplish, given as the user request.
+3. Plan the ordered list of ALL remaining tasks, starting from the current state, that accomplish the user's goal.
+4. For each task, give a description of the state of the interface the task is performed on.
+
+The tasks already completed are listed after the user request.
+
+Guidelines:
+- Be specific about UI elements (buttons, fields, menus, etc.)
+- Each task should be atomic and actionable, one interaction per task
+- Focus on what needs to be clicked, typed, or interacted with
+- The first task must be performable on the current screenshot
+- Return an empty list if the goal is already accomplished
+
+Example:
+User query: "I want to send an email to someone on gmail, how can i do this?"
+Screeenshot: [screenshot of a browser window]
+
+Steps:
+1. Task: "Click on the search bar and type 'gmail.com' and press enter"
+   Description: "The user is currently on the home page of the browser"
+2. Task: "Click the Compose button"
+   Description: "The Gmail inbox is open"
+"""
+
 
 class OrchestrationAgent:
     """
@@ -22,76 +93,240 @@ class OrchestrationAgent:
     a sequence of tasks that need to be executed to fulfill the user's request.
     """
     
-    def __init__(self, model_name: str = "claude-sonnet-4-20250514"):
+    def __init__(self, model_name: Optional[str] = None, tier: Optional[str] = None):
         # Verify Anthropic API key is available
         if not os.getenv("ANTHROPIC_API_KEY"):
             raise ValueError("ANTHROPIC_API_KEY environment variable is required. Please add it to your .env file.")
         
-        self.llm = ChatAnthropic(model=model_name).with_structured_output(Task_and_Description)
+        self.tiers = ModelTiers("orchestration", tier, model_name)
+        self.chat_model = ChatAnthropic(model=self.tiers.model, callbacks=[prompt_cache_usage("orchestration")], **CLIENT_OPTIONS)
+        self.llm = self.chat_model.with_structured_output(Task_and_Description)
+        self.planner = self.chat_model.with_structured_output(Plan)
+        
+        # Stronger model for answers of a cheaper tier that fail validation
+        self.escalation_model = self.escalation_llm = self.escalation_planner = None
+        if self.tiers.escalation_model:
+            self.escalation_model = ChatAnthropic(model=self.tiers.escalation_model, callbacks=[prompt_cache_usage("orchestration")], **CLIENT_OPTIONS)
+            self.escalation_llm = self.escalation_model.with_structured_output(Task_and_Description)
+            self.escalation_planner = self.escalation_model.with_structured_output(Plan)
 
-    def generate_tasks(self, state: AgentState) -> List[str]:
+    async def awarm_up(self) -> None:
+        """Check the API key and connect to the Anthropic API ahead of the first request."""
+        await awarm_up_model(self.chat_model.model)
+
+    def _build_request(self, state: AgentState, image: PreparedImage) -> HumanMessage:
         """
-        Generate a list of tasks based on the user query and screenshot.
+        Build the per-step part of a prompt: user query, progress and screenshot.
         
         Args:
-            state: Current agent state containing screenshot and user query
+            state: Current agent state containing screenshot, user query and task history
+            image: Preprocessed screenshot to attach
             
         Returns:
-            List[str]: List of task strings
+            HumanMessage: Message with the dynamic inputs and the screenshot
         """
-        if not state["screenshot_image"] or not state["user_query"]:
-            return []
-        
-        # Convert image bytes to base64 for the LLM
-        image_base64 = base64.b64encode(state["screenshot_image"]).decode('utf-8')
-        
         # Create the message with multimodal content
-        message = HumanMessage(
+        return HumanMessage(
             content=[
                 {
                     "type": "text",
-                    "text": f"""You are an AI orchestration agent that analyzes screenshots and user requests to break them down into specific, actionable tasks.
-
-Your job is to:
-1. Analyze the provided screenshot to understand the current state of the interface, and provide a detailed description of the current state of the interface.
-2. Understand what the user wants to accomplish: "{state["user_query"]}"
-3. Break down the user's request into a specific, actionable task from the user's current state. You MUST generate **ONE** task from the current state.
-4. Each task should be a clear action that can be performed on the interface.
-
-Guidelines:
-- Be specific about UI elements (buttons, fields, menus, etc.)
-- task should be atomic and actionable
-- Focus on what needs to be clicked, typed, or interacted with
-- Consider the current state shown in the screenshot
-
-Example:
-User query: "I want to send an email to someone on gmail, how can i do this?"
-Screeenshot: [screenshot of a browser window]
-
-Task: "Click on the search bar and type 'gmail.com' and press enter"
-Description: "The user is currently on the home page of the browser, they want to send an email to someone on gmail.com"
-
-
+                    "text": f"""User request: "{state["user_query"]}"
 
-Return your response as a simple list of task strings, one per line, without numbering or bullet points."""
+Tasks already completed:
+{render_progress(state["task_history"])}"""
                 },
                 {
                     "type": "image",
                     "source_type": "base64",
-                    "data": image_base64,
-                    "mime_type": "image/png"
+                    "data": image.data_base64,
+                    "mime_type": image.mime_type
                 }
             ]
         )
+
+    def _build_messages(self, state: AgentState, image: PreparedImage) -> List[BaseMessage]:
+        """
+        Build the prompt for the next task: cached instructions, then the per-step inputs.
+        
+        Args:
+            state: Current agent state containing screenshot and user query
+            image: Preprocessed screenshot to attach
+            
+        Returns:
+            List[BaseMessage]: System prompt and user message
+        """
+        return [SystemMessage(content=TASK_SYSTEM_PROMPT), self._build_request(state, image)]
+
+    def _cache_key(self, state: AgentState, image: PreparedImage) -> str:
+        """Key identifying a task generation call by everything its answer depends on."""
+        return cache_key(
+            "orchestration",
+            self.chat_model.model,
+            TASK_SYSTEM_PROMPT,
+            repr(DEFAULT_IMAGE_SETTINGS),
+            image.digest,
+            state["user_query"],
+            render_progress(state["task_history"]),
+        )
+
+    @staticmethod
+    def _rejection(response: Task_and_Description) -> Optional[str]:
+        """Why a next-step answer should be escalated, or None to accept it."""
+        return None if response.task.strip() else "empty_task"
+
+    def generate_tasks(self, state: AgentState) -> List[str]:
+        """
+        Generate a list of tasks based on the user query and screenshot.
+        
+        Args:
+            state: Current agent state containing screenshot and user query
+            
+        Returns:
+            List[str]: List of task strings
+        """
+        if not state["screenshot_image"] or not state["user_query"]:
+            return []
+        
+        # Reuse the screenshot prepared once for this step
+        image = state.get("prepared_image") or prepare_screenshot(state["screenshot_image"])
+        
+        # Identical calls are answered from the response cache
+        key = self._cache_key(state, image)
+        cached = response_cache.get_json(key) if response_cache else None
+        if cached:
+            return tuple(cached)
         
         # Generate response
-        response = self.llm.invoke([message])
+        response = self.tiers.invoke(
+            self.llm, self.escalation_llm, self._build_messages(state, image), self._rejection
+        )
         
+        if response_cache:
+            response_cache.set_json(key, [response.task, response.description])
+        return (response.task, response.description)
 
+    async def agenerate_tasks(self, state: AgentState) -> List[str]:
+        """
+        Async version of generate_tasks that does not block the event loop.
+        
+        Args:
+            state: Current agent state containing screenshot and user query
+            
+        Returns:
+            List[str]: List of task strings
+        """
+        if not state["screenshot_image"] or not state["user_query"]:
+            return []
+        
+        # Reuse the screenshot prepared once for this step (prepared off the event loop otherwise)
+        image = state.get("prepared_image") or await asyncio.to_thread(prepare_screenshot, state["screenshot_image"])
+        
+        # Identical calls are answered from the response cache
+        key = self._cache_key(state, image)
+        cached = await response_cache.aget_json(key) if response_cache else None
+        if cached:
+            return tuple(cached)
         
+        # Generate response
+        response = await self.tiers.ainvoke(
+            self.llm, self.escalation_llm, self._build_messages(state, image), self._rejection
+        )
+        
+        if response_cache:
+            await response_cache.aset_json(key, [response.task, response.description])
         return (response.task, response.description)
 
 
+    def _build_plan_messages(self, state: AgentState, image: PreparedImage) -> List[BaseMessage]:
+        """
+        Build the prompt asking for every remaining step at once.
+        
+        Args:
+            state: Current agent state containing screenshot, user query and task history
+            image: Preprocessed screenshot to attach
+            
+        Returns:
+            List[BaseMessage]: System prompt and user message
+        """
+        return [SystemMessage(content=PLAN_SYSTEM_PROMPT), self._build_request(state, image)]
+
+    def _plan_cache_key(self, state: AgentState, image: PreparedImage) -> str:
+        """Key identifying a planning call by everything its answer depends on."""
+        return cache_key(
+            "plan",
+            self.chat_model.model,
+            PLAN_SYSTEM_PROMPT,
+            repr(DEFAULT_IMAGE_SETTINGS),
+            image.digest,
+            state["user_query"],
+            render_progress(state["task_history"]),
+        )
+
+    async def agenerate_plan(self, state: AgentState) -> List[dict]:
+        """
+        Generate the ordered list of remaining tasks based on the user query and screenshot.
+        
+        Args:
+            state: Current agent state containing screenshot, user query and task history
+            
+        Returns:
+            List[dict]: Steps with "task" and "description" keys; empty if the goal is accomplished
+        """
+        # Reuse the screenshot prepared once for this step (prepared off the event loop otherwise)
+        image = state.get("prepared_image") or await asyncio.to_thread(prepare_screenshot, state["screenshot_image"])
+        
+        # Identical calls are answered from the response cache
+        key = self._plan_cache_key(state, image)
+        cached = await response_cache.aget_json(key) if response_cache else None
+        if cached is not None:
+            return cached
+        
+        # Generate response
+        response = await self.tiers.ainvoke(self.planner, self.escalation_planner, self._build_plan_messages(state, image))
+        steps = [step.model_dump() for step in response.steps]
+        
+        if response_cache:
+            await response_cache.aset_json(key, steps)
+        return steps
+
+# Process-wide agent instance, shared so its HTTP connection pool is reused
+_shared_agent: Optional[OrchestrationAgent] = None
+_shared_agent_lock = threading.Lock()
+
+
+def get_orchestration_agent() -> OrchestrationAgent:
+    """
+    Return the process-wide OrchestrationAgent, creating it on first use.
+    
+    The underlying ChatAnthropic client is thread-safe and keeps its
+    connections alive, so every request shares one instance.
+    
+    Returns:
+        OrchestrationAgent: Shared agent instance
+    """
+    global _shared_agent
+    if _shared_agent is None:
+        with _shared_agent_lock:
+            if _shared_agent is None:
+                _shared_agent = OrchestrationAgent()
+    return _shared_agent
+
+
+def _apply_task(state: AgentState, task: str, description: str) -> AgentState:
+    """Return a copy of the state with the generated task and description recorded."""
+    updated_state = state.copy()
+    updated_state["current_task"] = task
+    updated_state["task_description"] = description
+    
+    # Add to chat history
+    updated_state["chat_history"] = state["chat_history"].append({
+        "role": "orchestration_agent",
+        "content": f"Generated task: {task} with description: {description}"
+    }, chat_label)
+    
+    return updated_state
+
+
 def orchestration_agent_node(state: AgentState) -> AgentState:
     """
     LangGraph node that runs the orchestration agent to generate tasks.
@@ -102,18 +337,59 @@ def orchestration_agent_node(state: AgentState) -> AgentState:
     Returns:
         AgentState: Updated state with generated task and description
     """
-    agent = OrchestrationAgent()
+    agent = get_orchestration_agent()
     task, description = agent.generate_tasks(state)
+    return _apply_task(state, task, description)
+
+
+async def aorchestration_agent_node(state: AgentState) -> AgentState:
+    """
+    Async LangGraph node that runs the orchestration agent to generate tasks.
     
-    # Update state with generated task and description
+    Args:
+        state: Current agent state
+        
+    Returns:
+        AgentState: Updated state with generated task and description
+    """
+    agent = get_orchestration_agent()
+    task, description = await agent.agenerate_tasks(state)
+    return _apply_task(state, task, description)
+
+
+def _apply_plan(state: AgentState, steps: List[dict]) -> AgentState:
+    """Return a copy of the state following a new plan from its first step."""
     updated_state = state.copy()
-    updated_state["current_task"] = task
-    updated_state["task_description"] = description
+    updated_state["plan"] = steps
+    updated_state["plan_index"] = 0
+    
+    if steps:
+        updated_state["current_task"] = steps[0]["task"]
+        updated_state["task_description"] = steps[0]["description"]
+    else:
+        # Nothing left to do: the goal has been accomplished
+        updated_state["current_task"] = None
+        updated_state["task_description"] = None
+        updated_state["is_task_completed"] = True
     
     # Add to chat history
-    updated_state["chat_history"].append({
+    updated_state["chat_history"] = state["chat_history"].append({
         "role": "orchestration_agent",
-        "content": f"Generated task: {task} with description: {description}"
-    })
+        "content": f"Generated plan: {[step['task'] for step in steps]}"
+    }, chat_label)
+    
+    return updated_state
+
+
+async def aplan_agent_node(state: AgentState) -> AgentState:
+    """
+    Async LangGraph node that runs the orchestration agent to plan all remaining tasks.
     
-    return updated_state
\ No newline at end of file
+    Args:
+        state: Current agent state
+        
+    Returns:
+        AgentState: Updated state with the plan and its first task
+    """
+    agent = get_orchestration_agent()
+    return _apply_plan(state, await agent.agenerate_plan(state))
@@ -0,0 +1,143 @@
+"""
+Cached vs uncached input token reporting for the agents' model calls.
+
+Every agent sends its instructions as a constant system prompt and only the
+per-step inputs (user query, task, progress, screenshot) in the user message.
+The prompts carry no cache_control markers: Anthropic only caches prefixes of
+at least 1024 tokens (Sonnet), and the agents' system prompts (roughly 250-350
+tokens each) plus their tool schemas stay well below that, so a marker would
+never take effect.
+
+Each agent's chat model reports cached, written and uncached input tokens per
+call through a PromptCacheUsage callback, which also passes every call's full
+usage on to usage.record_call().
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from usage import CallUsage, image_bytes, record_call
+
+logger = logging.getLogger(__name__)
+
+
+class PromptCacheUsage(BaseCallbackHandler):
+    """
+    Callback recording cached vs uncached input tokens and latency for every model call.
+
+    Attach it to a chat model with ChatAnthropic(callbacks=[...]); runnables
+    built on the model (structured output) report through it as well.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.latency_ms = 0.0
+        # Per running call: start time, image bytes sent and model name
+        self._started: Dict[UUID, Tuple[float, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        model = (kwargs.get("invocation_params") or {}).get("model", "")
+        sent = sum(image_bytes(batch) for batch in messages)
+        self._started[run_id] = (time.perf_counter(), sent, model)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started, sent, model = self._started.pop(run_id, None) or (None, 0, "")
+        elapsed_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    self.record(usage, elapsed_ms, sent, model)
+
+    def record(self, usage: Dict[str, Any], elapsed_ms: float, sent_image_bytes: int = 0, model: str = "") -> None:
+        """
+        Add one call's usage to the totals and log it at debug level.
+
+        Args:
+            usage: LangChain usage metadata of the response
+            elapsed_ms: Time from request to full response
+            sent_image_bytes: Decoded size of the images in the prompt
+            model: Model that answered
+        """
+        details = usage.get("input_token_details") or {}
+        read = details.get("cache_read") or 0
+        written = (
+            (details.get("ephemeral_5m_input_tokens") or 0)
+            + (details.get("ephemeral_1h_input_tokens") or 0)
+        ) or (details.get("cache_creation") or 0)
+        total = usage.get("input_tokens", 0)
+
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += total
+            self.cache_read_tokens += read
+            self.cache_write_tokens += written
+            self.latency_ms += elapsed_ms
+        record_call(CallUsage(
+            agent=self.name,
+            model=model,
+            input_tokens=total,
+            output_tokens=usage.get("output_tokens", 0),
+            cache_read_tokens=read,
+            cache_write_tokens=written,
+            image_bytes=sent_image_bytes,
+            latency_ms=elapsed_ms,
+        ))
+        logger.debug(
+            "%s: %d input tokens (%d cached, %d written, %d uncached) in %.0f ms",
+            self.name, total, read, written, total - read - written, elapsed_ms,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Totals since startup and the share of input tokens read from the cache."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "cache_read_tokens": self.cache_read_tokens,
+                "cache_write_tokens": self.cache_write_tokens,
+                "cached_ratio": self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0,
+                "avg_latency_ms": self.latency_ms / self.calls if self.calls else 0.0,
+            }
+
+
+# One usage recorder per agent, shared by every instance of that agent
+_usage: Dict[str, PromptCacheUsage] = {}
+_usage_lock = threading.Lock()
+
+
+def prompt_cache_usage(name: str) -> PromptCacheUsage:
+    """
+    Get the usage recorder for an agent, creating it on first use.
+
+    Args:
+        name: Agent name shown in logs and stats
+
+    Returns:
+        PromptCacheUsage: Callback to attach to the agent's chat model
+    """
+    with _usage_lock:
+        if name not in _usage:
+            _usage[name] = PromptCacheUsage(name)
+        return _usage[name]
+
+
+def prompt_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Cached vs uncached input token totals for every agent that made a call."""
+    with _usage_lock:
+        recorders = list(_usage.values())
+    return {recorder.name: recorder.stats() for recorder in recorders}
@@ -0,0 +1,432 @@
+"""
+Session store for concurrent guided workflows.
+
+Each session owns one AgentState plus an asyncio lock so that two requests for
+the same session never run a step at the same time. Idle sessions expire after
+a TTL, and the least recently used sessions are evicted whenever the store goes
+over its session count or memory budget (screenshots dominate the footprint).
+
+With a session database configured, every finished step is also written to
+SQLite (without its screenshot). Sessions then only keep the frame of a
+running step in memory, evicted sessions are loaded back from disk on their
+next request, and sessions survive restarts.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+from state import AgentState, release_screenshot, state_from_record, state_to_record
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Rough per-session overhead for everything that is not a screenshot
+SESSION_BASE_OVERHEAD_BYTES = 4 * 1024
+
+# Seconds between background sweeps of expired sessions
+SESSION_EXPIRY_INTERVAL_SECONDS = float(os.getenv("SESSION_EXPIRY_INTERVAL_SECONDS", "60"))
+
+
+def estimate_state_size(state: AgentState) -> int:
+    """
+    Estimate the memory held by an AgentState, in bytes.
+
+    Args:
+        state: Agent state to measure
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    size = SESSION_BASE_OVERHEAD_BYTES
+    if state.get("screenshot_image"):
+        size += len(state["screenshot_image"])
+    prepared = state.get("prepared_image")
+    if prepared:
+        size += len(prepared.data_base64)
+        if prepared.data is not state.get("screenshot_image"):
+            size += len(prepared.data)
+    for key in ("user_query", "current_task", "task_description"):
+        if state.get(key):
+            size += len(state[key])
+    if state.get("task_history"):
+        size += len(state["task_history"].summary)
+        size += sum(len(task) for task in state["task_history"])
+    if state.get("chat_history"):
+        size += len(state["chat_history"].summary)
+        size += sum(len(str(entry.get("content", ""))) for entry in state["chat_history"])
+    size += sum(len(step["task"]) + len(step["description"]) for step in state.get("plan") or [])
+    if state.get("last_step_result"):
+        size += len(state["last_step_result"].get("audio_base64") or "")
+    return size
+
+
+class Session:
+    """A single user session: the agent state plus its lock and bookkeeping."""
+
+    def __init__(self, session_id: str, state: AgentState):
+        self.session_id = session_id
+        self.state = state
+        self.lock = asyncio.Lock()
+        self.created_at = time.monotonic()
+        self.last_access = self.created_at
+        self.size_bytes = estimate_state_size(state)
+
+
+class SessionDatabase:
+    """
+    SQLite persistence for sessions.
+
+    Each session is one row holding its state as JSON. The screenshot itself
+    is not stored: the next step always brings its own frame, and the state
+    keeps the fingerprint that change detection compares it with.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions "
+            "(session_id TEXT PRIMARY KEY, state TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access)")
+        self._db.commit()
+
+    def save(self, session_id: str, state: AgentState) -> None:
+        """
+        Write a session's state.
+
+        Args:
+            session_id: Session to write
+            state: State after a finished step
+        """
+        record = json.dumps(state_to_record(state))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, state, last_access) VALUES (?, ?, ?)",
+                (session_id, record, time.time()),
+            )
+            self._db.commit()
+
+    def load(self, session_id: str, written_after: float = 0.0) -> Optional[AgentState]:
+        """
+        Read a session's state.
+
+        Args:
+            session_id: Session to read
+            written_after: time.time() value; sessions last written earlier are treated as expired
+
+        Returns:
+            Optional[AgentState]: The state (without a screenshot), or None if the session is not stored
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT state FROM sessions WHERE session_id = ? AND last_access >= ?",
+                (session_id, written_after),
+            ).fetchone()
+        if row is None:
+            return None
+        return state_from_record(json.loads(row[0]))
+
+    def delete(self, session_id: str) -> bool:
+        """
+        Remove a session.
+
+        Args:
+            session_id: Session to remove
+
+        Returns:
+            bool: True if a session was removed
+        """
+        with self._lock:
+            removed = self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+            self._db.commit()
+        return removed > 0
+
+    def delete_idle(self, cutoff: float, keep: Iterable[str] = ()) -> int:
+        """
+        Remove sessions last written before a wall-clock time.
+
+        Args:
+            cutoff: time.time() value; sessions written earlier are removed
+            keep: Session ids to keep regardless (e.g. sessions still active in memory)
+
+        Returns:
+            int: Number of sessions removed
+        """
+        keep = set(keep)
+        with self._lock:
+            rows = self._db.execute("SELECT session_id FROM sessions WHERE last_access < ?", (cutoff,)).fetchall()
+            idle = [(session_id,) for (session_id,) in rows if session_id not in keep]
+            self._db.executemany("DELETE FROM sessions WHERE session_id = ?", idle)
+            self._db.commit()
+        return len(idle)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of stored sessions."""
+        with self._lock:
+            sessions = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {"stored_sessions": sessions}
+
+
+class SessionStore:
+    """
+    Session store keyed by session id with TTL expiry and LRU eviction.
+
+    Sessions whose lock is currently held (a step is running) are never
+    evicted, so the budget can be exceeded temporarily under heavy load.
+
+    Expired sessions are removed by expire(), which run_expiry() calls in the
+    background; lookups only skip them, so they never touch the disk or wait
+    for a sweep. Each sweep also passes the sessions expired or evicted since
+    the last one to its on_discard hook (e.g. to drop workflow checkpoints).
+
+    With a database, saved sessions drop their screenshot from memory, sessions
+    evicted for the budget stay on disk and are loaded back by get()/aget(), and
+    expired sessions are removed from disk as well.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 500,
+        max_memory_bytes: int = 512 * 1024 * 1024,
+        ttl_seconds: float = 30 * 60,
+        database: Optional[SessionDatabase] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.max_memory_bytes = max_memory_bytes
+        self.ttl_seconds = ttl_seconds
+        self.database = database
+        # Sessions evicted from memory since the last sweep, for run_expiry's on_discard hook
+        self._evicted: Deque[str] = deque(maxlen=max_sessions)
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._memory_bytes = 0
+        self._mutex = threading.Lock()
+
+    def create(self, state: AgentState) -> Session:
+        """
+        Register a new session for the given state.
+
+        Args:
+            state: Initial agent state
+
+        Returns:
+            Session: The newly created session
+        """
+        session = Session(uuid.uuid4().hex, state)
+        with self._mutex:
+            self._sessions[session.session_id] = session
+            self._memory_bytes += session.size_bytes
+            self._evict_locked(keep=session.session_id)
+        return session
+
+    def get(self, session_id: Optional[str]) -> Optional[Session]:
+        """
+        Look up a session and mark it as recently used, loading it from disk if needed.
+
+        Args:
+            session_id: Id returned by create()
+
+        Returns:
+            Optional[Session]: The session, or None if unknown or expired
+        """
+        if not session_id:
+            return None
+        session = self._lookup(session_id)
+        if session is None and self.database is not None:
+            session = self._adopt(session_id, self.database.load(session_id, written_after=time.time() - self.ttl_seconds))
+        return session
+
+    async def aget(self, session_id: Optional[str]) -> Optional[Session]:
+        """
+        Async version of get; a session that has to be loaded from disk is read
+        in a worker thread, so the event loop and the store's mutex are never
+        held during disk I/O.
+
+        Args:
+            session_id: Id returned by create()
+
+        Returns:
+            Optional[Session]: The session, or None if unknown or expired
+        """
+        if not session_id:
+            return None
+        session = self._lookup(session_id)
+        if session is None and self.database is not None:
+            state = await asyncio.to_thread(
+                self.database.load, session_id, written_after=time.time() - self.ttl_seconds
+            )
+            session = self._adopt(session_id, state)
+        return session
+
+    def save(self, session: Session, state: AgentState) -> None:
+        """
+        Store the updated state for a session and re-account its size.
+
+        Args:
+            session: Session being updated
+            state: New agent state
+        """
+        if self.database is not None:
+            self.database.save(session.session_id, state)
+            # Only a running step needs the frame; the next step brings its own
+            state = release_screenshot(state)
+        new_size = estimate_state_size(state)
+        with self._mutex:
+            session.state = state
+            session.last_access = time.monotonic()
+            if self._sessions.get(session.session_id) is session:
+                self._memory_bytes += new_size - session.size_bytes
+                self._sessions.move_to_end(session.session_id)
+            session.size_bytes = new_size
+            self._evict_locked(keep=session.session_id)
+
+    def delete(self, session_id: Optional[str]) -> bool:
+        """
+        Remove a session.
+
+        Args:
+            session_id: Id of the session to remove
+
+        Returns:
+            bool: True if a session was removed
+        """
+        with self._mutex:
+            session = self._sessions.pop(session_id, None) if session_id else None
+            if session is not None:
+                self._memory_bytes -= session.size_bytes
+        stored = bool(session_id) and self.database is not None and self.database.delete(session_id)
+        return session is not None or stored
+
+    def stats(self) -> Dict[str, int]:
+        """Return the current session count and memory usage."""
+        with self._mutex:
+            stats = {
+                "sessions": len(self._sessions),
+                "memory_bytes": self._memory_bytes,
+                "max_sessions": self.max_sessions,
+                "max_memory_bytes": self.max_memory_bytes,
+            }
+        if self.database is not None:
+            stats.update(self.database.stats())
+        return stats
+
+    def expire(self) -> List[str]:
+        """
+        Remove sessions that have been idle for longer than the TTL, from memory and disk.
+
+        Returns:
+            List[str]: Ids of the expired sessions that were in memory
+        """
+        cutoff = time.monotonic() - self.ttl_seconds
+        with self._mutex:
+            expired = []
+            # Sessions are kept in access order, so stop at the first fresh one
+            for session_id, session in self._sessions.items():
+                if session.last_access >= cutoff:
+                    break
+                if not session.lock.locked():
+                    expired.append(session_id)
+            for session_id in expired:
+                self._memory_bytes -= self._sessions.pop(session_id).size_bytes
+            active = list(self._sessions)
+
+        if self.database is not None:
+            for session_id in expired:
+                self.database.delete(session_id)
+            # Sessions that are only on disk expire by the time of their last saved step
+            self.database.delete_idle(time.time() - self.ttl_seconds, keep=active)
+        return expired
+
+    async def run_expiry(
+        self,
+        interval: float = SESSION_EXPIRY_INTERVAL_SECONDS,
+        on_discard: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> None:
+        """
+        Expire idle sessions every `interval` seconds until cancelled.
+
+        Each sweep runs in a worker thread, so its disk work never blocks the event loop.
+
+        Args:
+            interval: Seconds between sweeps
+            on_discard: Called with the id of every session expired or evicted from memory
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                expired = await asyncio.to_thread(self.expire)
+                with self._mutex:
+                    # Evicted sessions loaded back from disk since are live again
+                    discarded = expired + [session_id for session_id in self._evicted if session_id not in self._sessions]
+                    self._evicted.clear()
+                if on_discard is not None:
+                    for session_id in discarded:
+                        await on_discard(session_id)
+            except Exception as e:
+                print(f"Session expiry failed: {e}")
+
+    def _lookup(self, session_id: str) -> Optional[Session]:
+        """Return a live in-memory session and mark it as recently used; sessions past their TTL count as gone."""
+        with self._mutex:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if session.last_access < time.monotonic() - self.ttl_seconds and not session.lock.locked():
+                # Removed by the next expire() sweep
+                return None
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def _adopt(self, session_id: str, state: Optional[AgentState]) -> Optional[Session]:
+        """Bring a session loaded from disk back into memory, unless another request already did."""
+        if state is None:
+            return None
+        with self._mutex:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = Session(session_id, state)
+                self._sessions[session_id] = session
+                self._memory_bytes += session.size_bytes
+                self._evict_locked(keep=session_id)
+            session.last_access = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def _evict_locked(self, keep: Optional[str] = None) -> None:
+        """Evict least recently used idle sessions (except `keep`) until within budget."""
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions and self._memory_bytes <= self.max_memory_bytes:
+                break
+            session = self._sessions[session_id]
+            if session_id == keep or session.lock.locked():
+                continue
+            # With a database the session stays on disk and is loaded back on its next request
+            del self._sessions[session_id]
+            self._memory_bytes -= session.size_bytes
+            self._evicted.append(session_id)
+
+
+def _env_session_database() -> Optional[SessionDatabase]:
+    """Open the session database configured by SESSION_DB_PATH, if any."""
+    path = os.getenv("SESSION_DB_PATH")
+    if not path:
+        return None
+    return SessionDatabase(path)
+
+
+# Global session store instance
+session_store = SessionStore(
+    max_sessions=int(os.getenv("SESSION_MAX_COUNT", "500")),
+    max_memory_bytes=int(os.getenv("SESSION_MAX_MEMORY_MB", "512")) * 1024 * 1024,
+    ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "1800")),
+    database=_env_session_database(),
+)
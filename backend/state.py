@@ -1,5 +1,9 @@
+import base64
 from typing import TypedDict, List, Optional, Any, Tuple
-from langgraph.graph import StateGraph
+from PIL import UnidentifiedImageError
+from history import HISTORY_WINDOW, History
+from usage import empty_usage
+from image_processing import PreparedImage, ScreenFingerprint, prepare_screenshot, screen_fingerprint, screens_match
 
 
 class AgentState(TypedDict):
@@ -9,18 +13,47 @@ class AgentState(TypedDict):
     """
     screenshot_image: Optional[bytes]
     user_query: str
-    chat_history: List[dict]
+    chat_history: History
     current_task: Optional[str]
     task_description: Optional[str]
-    task_history: List[str]
+    task_history: History
     coordinates: Optional[Tuple[int, int]]
     is_task_completed: bool
+    screenshot_fingerprint: Optional[ScreenFingerprint]
+    prepared_image: Optional[PreparedImage]
+    screen_unchanged: bool
+    last_step_result: Optional[dict]
+    plan: Optional[List[dict]]
+    plan_index: int
+    target_visible: Optional[bool]
+    locator: Optional[dict]
+    usage: dict
+    step_usage: Optional[dict]
+
+
+def _fingerprint_or_none(image_data: bytes) -> Optional[ScreenFingerprint]:
+    """Fingerprint a screenshot, or return None if it cannot be decoded."""
+    try:
+        return screen_fingerprint(image_data)
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+
+
+def _prepare_or_none(image_data: bytes) -> Optional[PreparedImage]:
+    """Prepare a screenshot for the agents, or return None if it cannot be decoded."""
+    try:
+        return prepare_screenshot(image_data)
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
 
 
 def create_initial_state(image_data: bytes, user_query: str) -> AgentState:
     """
     Initialize the AgentState with image data and user query.
     
+    The screenshot is fingerprinted and prepared for the agents here, once,
+    so both agents share the same encoded payload.
+    
     Args:
         image_data: Raw image data of the screenshot
         user_query: The user's request/instruction
@@ -31,12 +64,22 @@ def create_initial_state(image_data: bytes, user_query: str) -> AgentState:
     return AgentState(
         screenshot_image=image_data,
         user_query=user_query,
-        chat_history=[],
+        chat_history=History(capacity=2 * HISTORY_WINDOW),
         current_task=None,
         task_description=None,
-        task_history=[],
+        task_history=History(),
         coordinates=None,
-        is_task_completed=False
+        is_task_completed=False,
+        screenshot_fingerprint=_fingerprint_or_none(image_data),
+        prepared_image=_prepare_or_none(image_data),
+        screen_unchanged=False,
+        last_step_result=None,
+        plan=None,
+        plan_index=0,
+        target_visible=None,
+        locator=None,
+        usage=empty_usage(),
+        step_usage=None
     )
 
 
@@ -45,6 +88,10 @@ def update_screenshot(state: AgentState, new_image_data: bytes) -> AgentState:
     Update the state with a new screenshot after user completes a task.
     Also adds the previous task to task history.
     
+    If the new screenshot is visually identical to the one the last step was
+    computed on, the state is returned with `screen_unchanged` set and
+    nothing else modified, so the caller can reuse `last_step_result`.
+    
     Args:
         state: Current agent state
         new_image_data: New screenshot data
@@ -52,12 +99,125 @@ def update_screenshot(state: AgentState, new_image_data: bytes) -> AgentState:
     Returns:
         AgentState: Updated state with new screenshot and task history
     """
+    fingerprint = _fingerprint_or_none(new_image_data)
     updated_state = state.copy()
+    updated_state["screen_unchanged"] = (
+        fingerprint is not None and screens_match(state.get("screenshot_fingerprint"), fingerprint)
+    )
+    if updated_state["screen_unchanged"]:
+        if state["screenshot_image"] is None:
+            # The stored frame was released after the last step; keep this identical one
+            updated_state["screenshot_image"] = new_image_data
+        return updated_state
+    
     updated_state["screenshot_image"] = new_image_data
+    updated_state["screenshot_fingerprint"] = fingerprint
+    updated_state["prepared_image"] = _prepare_or_none(new_image_data)
     updated_state["coordinates"] = None  # Reset coordinates for next task
     
     # Add previous task to task history if it exists
     if state["current_task"]:
-        updated_state["task_history"] = state["task_history"] + [state["current_task"]]
+        updated_state["task_history"] = state["task_history"].append(state["current_task"])
+    
+    return updated_state
+
+def advance_plan(state: AgentState) -> AgentState:
+    """
+    Move to the next step of the stored plan after the user completed the current one.
+    
+    Args:
+        state: Current agent state with a plan
+        
+    Returns:
+        AgentState: Updated state whose current task is the next planned step,
+            or None if the plan is exhausted
+    """
+    updated_state = state.copy()
+    plan = state.get("plan") or []
+    updated_state["plan_index"] = state["plan_index"] + 1
+    
+    if updated_state["plan_index"] < len(plan):
+        step = plan[updated_state["plan_index"]]
+        updated_state["current_task"] = step["task"]
+        updated_state["task_description"] = step["description"]
+    else:
+        updated_state["current_task"] = None
+        updated_state["task_description"] = None
+    
+    return updated_state
+
+
+def release_screenshot(state: AgentState) -> AgentState:
+    """
+    Drop the screenshot and its prepared payload from a state whose step is done.
     
-    return updated_state
\ No newline at end of file
+    The next step always brings its own screenshot, and the fingerprint kept
+    in the state is enough to detect an unchanged screen.
+    
+    Args:
+        state: Agent state after a finished step
+        
+    Returns:
+        AgentState: Copy of the state without the screenshot bytes
+    """
+    released_state = state.copy()
+    released_state["screenshot_image"] = None
+    released_state["prepared_image"] = None
+    return released_state
+
+
+def state_to_record(state: AgentState) -> dict:
+    """
+    Convert a state to a JSON-serializable record for persistence.
+    
+    The screenshot and its prepared payload are not included; the fingerprint
+    is, so an unchanged screen is still recognized after a reload.
+    
+    Args:
+        state: Agent state to persist
+        
+    Returns:
+        dict: JSON-serializable record
+    """
+    record = {
+        key: value for key, value in state.items()
+        if key not in ("screenshot_image", "prepared_image", "screenshot_fingerprint", "chat_history", "task_history")
+    }
+    record["chat_history"] = state["chat_history"].to_dict()
+    record["task_history"] = state["task_history"].to_dict()
+    fingerprint = state.get("screenshot_fingerprint")
+    if fingerprint is not None:
+        record["screenshot_fingerprint"] = {
+            "phash": fingerprint.phash,
+            "thumbnail": base64.b64encode(fingerprint.thumbnail).decode("ascii"),
+            "width": fingerprint.width,
+            "height": fingerprint.height,
+        }
+    return record
+
+
+def state_from_record(record: dict) -> AgentState:
+    """
+    Rebuild a state saved with state_to_record(), without its screenshot.
+    
+    Args:
+        record: Persisted record
+        
+    Returns:
+        AgentState: Restored agent state
+    """
+    state = dict(record)
+    state["chat_history"] = History.from_dict(record["chat_history"])
+    state["task_history"] = History.from_dict(record["task_history"])
+    if record.get("coordinates") is not None:
+        state["coordinates"] = tuple(record["coordinates"])
+    fingerprint = record.get("screenshot_fingerprint")
+    state["screenshot_fingerprint"] = ScreenFingerprint(
+        phash=fingerprint["phash"],
+        thumbnail=base64.b64decode(fingerprint["thumbnail"]),
+        width=fingerprint["width"],
+        height=fingerprint["height"],
+    ) if fingerprint else None
+    state["screenshot_image"] = None
+    state["prepared_image"] = None
+    return AgentState(**state)
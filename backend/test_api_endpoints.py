@@ -99,10 +99,11 @@ def test_initialize_endpoint(image_base64: str, user_query: str):
     data = response.json()
     
     # Validate response structure
-    required_fields = ["x", "y", "task", "task_description", "is_completed"]
+    required_fields = ["session_id", "x", "y", "task", "task_description", "is_completed"]
     for field in required_fields:
         assert field in data, f"Missing field: {field}"
     
+    assert isinstance(data["session_id"], str), "session_id should be string"
     assert isinstance(data["x"], int), "x coordinate should be integer"
     assert isinstance(data["y"], int), "y coordinate should be integer"
     assert isinstance(data["task"], str), "task should be string"
@@ -110,6 +111,7 @@ def test_initialize_endpoint(image_base64: str, user_query: str):
     assert isinstance(data["is_completed"], bool), "is_completed should be boolean"
     
     print("✅ Initialize endpoint working correctly")
+    print(f"   Session: {data['session_id']}")
     print(f"   Task: {data['task']}")
     print(f"   Coordinates: ({data['x']}, {data['y']})")
     print(f"   Description: {data['task_description']}")
@@ -118,25 +120,27 @@ def test_initialize_endpoint(image_base64: str, user_query: str):
     return data
 
 
-def test_status_with_active_session():
+def test_status_with_active_session(session_id: str = None):
     """Test the status endpoint when a session is active."""
     print("🔍 Testing status endpoint (active session)...")
-    response = client.get("/status")
+    response = client.get("/status", params={"session_id": session_id})
     
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "Active session"
+    assert data["session_id"] == session_id
     assert "current_task" in data
     assert "coordinates" in data
     print("✅ Status endpoint with active session working correctly")
 
 
-def test_update_screenshot_endpoint(image_base64: str):
+def test_update_screenshot_endpoint(image_base64: str, session_id: str):
     """Test the update screenshot endpoint."""
     print("🔍 Testing update screenshot endpoint...")
     
     payload = {
-        "screenshot_base64": image_base64
+        "screenshot_base64": image_base64,
+        "session_id": session_id
     }
     
     response = client.post("/update_screenshot", json=payload)
@@ -223,10 +227,11 @@ def run_full_workflow_test(image_path: str, user_query: str):
             return False
             
         # Test status with active session
-        test_status_with_active_session()
+        session_id = init_result["session_id"]
+        test_status_with_active_session(session_id)
         
         # Test update screenshot (simulating user action completion)
-        update_result = test_update_screenshot_endpoint(image_base64)
+        update_result = test_update_screenshot_endpoint(image_base64, session_id)
         if not update_result:
             return False
         
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for the response and audio caches (no API keys required).
+
+Usage:
+    python test_cache.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from cache import TieredCache, cache_key
+from fake_backends import FakeAsyncElevenLabs
+from fixtures import CountingLLM, make_state
+
+
+def test_cache_key_is_unambiguous():
+    """Keys depend on every part and on where the parts are split."""
+    print("🔍 Testing cache key construction...")
+    assert cache_key("ab", "c") != cache_key("a", "bc")
+    assert cache_key(b"image", "query") == cache_key(b"image", "query")
+    assert cache_key(b"image", "query") != cache_key(b"image", "other query")
+    print("✅ Cache keys are unambiguous")
+
+
+def test_memory_tier_lru():
+    """The memory tier evicts least recently used entries over its byte budget."""
+    print("🔍 Testing memory tier LRU eviction...")
+    cache = TieredCache("test", max_memory_bytes=20)
+    cache.set("a", b"0123456789")
+    cache.set("b", b"0123456789")
+    assert cache.get("a") == b"0123456789"  # "b" is now least recently used
+    cache.set("c", b"0123456789")
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["evictions"] == 1
+    print("✅ Memory tier LRU eviction working correctly")
+
+
+def test_disk_tier_persists_and_evicts():
+    """The disk tier survives a new cache instance and stays within its budget."""
+    print("🔍 Testing disk tier persistence and eviction...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        cache = TieredCache("test", disk_path=path, max_disk_bytes=25)
+        cache.set_json("first", {"x": 1})
+        cache.set("big", b"x" * 20)
+
+        reopened = TieredCache("test", disk_path=path, max_disk_bytes=25)
+        assert reopened.get("big") == b"x" * 20
+        assert reopened.get("first") is None
+        assert reopened.stats()["disk_hits"] == 1
+        assert reopened.stats()["disk_bytes"] <= 25
+    print("✅ Disk tier persistence and eviction working correctly")
+
+
+def test_async_access_runs_disk_io_off_the_loop():
+    """aget/aset reach the disk tier from a worker thread, not the event loop's thread."""
+    print("🔍 Testing async cache access...")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TieredCache("test", disk_path=os.path.join(directory, "cache.sqlite3"))
+        threads = []
+        original_get = cache.get
+        cache.get = lambda key: threads.append(threading.get_ident()) or original_get(key)
+
+        async def scenario():
+            await cache.aset_json("point", [1, 2])
+            return await cache.aget_json("point"), await cache.aget("missing"), threading.get_ident()
+
+        point, missing, loop_thread = asyncio.run(scenario())
+        assert point == [1, 2] and missing is None
+        assert len(threads) == 2 and loop_thread not in threads
+    print("✅ Async cache access kept disk I/O off the event loop")
+
+
+def test_agents_use_the_cache():
+    """A repeated coordinate call is answered without invoking the model."""
+    print("🔍 Testing cached coordinate agent calls...")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+    from coordinate_agent import CoordinateAgent, Coordinates
+
+    state = make_state("Click the cache test button", size=(800, 600), color=(200, 10, 10))
+
+    agent = CoordinateAgent()
+    agent.llm = CountingLLM({"raw": None, "parsed": Coordinates(x=12, y=34), "parsing_error": None})
+
+    assert agent.generate_coordinates(state) == (12, 34)
+    assert agent.generate_coordinates(state) == (12, 34)
+    assert agent.llm.calls == 1
+    print("✅ Coordinate agent served the repeated call from cache")
+
+
+def test_tts_audio_is_cached():
+    """Pre-warmed and repeated phrases are served from the audio cache."""
+    print("🔍 Testing TTS audio cache and pre-warming...")
+    from tts_service import TTSService
+
+    service = TTSService()
+    service.async_client = FakeAsyncElevenLabs()
+    speech = service.async_client.text_to_speech
+
+    async def scenario():
+        warmed = await service.prewarm(["Audio cache test phrase."], voice_id="voice-a")
+        assert warmed == 1
+        cached = await service.atext_to_speech("Audio cache test phrase.", voice_id="voice-a")
+        assert cached.get("cached") and cached["audio_size_bytes"] > 0
+        assert speech.calls == 1
+
+        # A different voice is a different cache entry
+        await service.atext_to_speech("Audio cache test phrase.", voice_id="voice-b")
+        assert speech.calls == 2
+
+    asyncio.run(scenario())
+    print("✅ TTS audio served from cache after pre-warming")
+
+
+def main():
+    """Run all cache tests."""
+    try:
+        test_cache_key_is_unambiguous()
+        test_memory_tier_lru()
+        test_disk_tier_persists_and_evicts()
+        test_async_access_runs_disk_io_off_the_loop()
+        test_agents_use_the_cache()
+        test_tts_audio_is_cached()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All cache tests passed!")
+
+
+if __name__ == "__main__":
+    main()
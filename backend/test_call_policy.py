@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test script for model call deadlines, retries and hedging (no API keys required).
+
+Usage:
+    python test_call_policy.py
+"""
+
+import asyncio
+import sys
+
+from call_policy import LLM_HEDGES, CallPolicy, retry_reason
+
+
+class Overloaded(Exception):
+    """Stands in for an Anthropic 529 response."""
+    status_code = 529
+
+
+class ScriptedModel:
+    """Answers with (delay, answer-or-exception) pairs in order, tracking cancelled requests."""
+
+    def __init__(self, *script):
+        self.script = list(script)
+        self.requests = 0
+        self.cancelled = 0
+
+    def invoke(self, messages):
+        self.requests += 1
+        _, answer = self.script.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    async def ainvoke(self, messages):
+        self.requests += 1
+        delay, answer = self.script.pop(0)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def test_retry_classification():
+    """Timeouts, connection and overload errors are retried; bad requests and parse errors are not."""
+    print("🔍 Testing retry classification...")
+    assert retry_reason(asyncio.TimeoutError()) == "timeout"
+    assert retry_reason(Overloaded()) == "status_529"
+    assert retry_reason(ValueError("bad JSON")) is None
+    print("✅ Errors classified correctly")
+
+
+def test_retries_with_backoff():
+    """Retryable errors are retried within the budget, others are raised at once."""
+    print("🔍 Testing retries...")
+    policy = CallPolicy(timeout=5, max_retries=2, backoff=0.001, hedge=False)
+    model = ScriptedModel((0, Overloaded()), (0, Overloaded()), (0, "answer"))
+    assert policy.invoke(model, [], "test", "fast") == "answer"
+    assert model.requests == 3
+
+    model = ScriptedModel((0, Overloaded()), (0, Overloaded()), (0, Overloaded()))
+    try:
+        asyncio.run(policy.ainvoke(model, [], "test", "fast"))
+        assert False, "retry budget exceeded without raising"
+    except Overloaded:
+        pass
+    assert model.requests == 3
+
+    model = ScriptedModel((0, ValueError("bad request")), (0, "answer"))
+    try:
+        policy.invoke(model, [], "test", "fast")
+        assert False, "non-retryable error was retried"
+    except ValueError:
+        pass
+    assert model.requests == 1
+    assert policy.stats()["retries"] == 4
+    print("✅ Retries bounded and limited to transient errors")
+
+
+def test_deadline_cancels_and_retries():
+    """An attempt past its deadline is cancelled and retried."""
+    print("🔍 Testing deadlines...")
+    policy = CallPolicy(timeout=0.05, max_retries=1, backoff=0.001, hedge=False)
+    model = ScriptedModel((5, "too late"), (0, "answer"))
+    assert asyncio.run(policy.ainvoke(model, [], "test", "fast")) == "answer"
+    assert model.cancelled == 1
+    assert policy.stats()["deadlines_exceeded"] == 1
+    print("✅ Slow attempt cancelled at its deadline")
+
+
+def test_hedged_request_wins():
+    """A call still running after the p95 delay is hedged, the first answer wins and the loser is cancelled."""
+    print("🔍 Testing hedged requests...")
+    policy = CallPolicy(timeout=5, max_retries=0, hedge=True, hedge_min_samples=5, hedge_budget=1.0)
+    assert policy.hedge_delay("test", "fast") is None
+
+    warm_up = ScriptedModel(*[(0.01, "fast answer")] * 5)
+    for _ in range(5):
+        asyncio.run(policy.ainvoke(warm_up, [], "test", "fast"))
+    assert policy.hedge_delay("test", "fast") is not None
+
+    won_before = LLM_HEDGES.value(agent="test", tier="fast", outcome="won")
+    model = ScriptedModel((5, "stalled answer"), (0.01, "hedged answer"))
+    assert asyncio.run(policy.ainvoke(model, [], "test", "fast")) == "hedged answer"
+    assert model.requests == 2 and model.cancelled == 1
+    assert LLM_HEDGES.value(agent="test", tier="fast", outcome="won") == won_before + 1
+    print(f"✅ Hedge won: {policy.stats()}")
+
+
+def test_hedge_budget():
+    """No more than the hedge budget's share of calls is hedged."""
+    print("🔍 Testing hedge budget...")
+    policy = CallPolicy(timeout=5, max_retries=0, hedge=True, hedge_min_samples=1, hedge_budget=0.0)
+    asyncio.run(policy.ainvoke(ScriptedModel((0.01, "answer")), [], "test", "fast"))
+    model = ScriptedModel((0.2, "slow answer"), (0, "unused"))
+    assert asyncio.run(policy.ainvoke(model, [], "test", "fast")) == "slow answer"
+    assert model.requests == 1
+    print("✅ Hedging stops at its budget")
+
+
+def main_tests():
+    """Run all call policy tests."""
+    try:
+        test_retry_classification()
+        test_retries_with_backoff()
+        test_deadline_cancels_and_retries()
+        test_hedged_request_wins()
+        test_hedge_budget()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All call policy tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
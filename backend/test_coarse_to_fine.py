@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for coarse-to-fine coordinate localization (no API keys required).
+
+Usage:
+    python test_coarse_to_fine.py
+"""
+
+import asyncio
+import io
+import os
+import sys
+from PIL import Image
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+from coordinate_agent import CoordinateAgent, Coordinates
+from fixtures import ScriptedLLM, make_state
+
+
+def target_screenshot(width: int = 3840, height: int = 2160) -> bytes:
+    """Encode a screenshot with a small target square near (3000, 1500)."""
+    image = Image.new("RGB", (width, height), (250, 250, 250))
+    image.paste((200, 30, 30), (2980, 1480, 3020, 1520))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_two_stage_localization():
+    """The coarse point picks the crop and the crop point is mapped back to screen space."""
+    print("🔍 Testing coarse-to-fine localization...")
+    agent = CoordinateAgent(mode="coarse_to_fine")
+    # 768 / 3840 = 0.2: the square's center (3000, 1500) is at (600, 300) on the coarse image
+    agent.llm = ScriptedLLM(Coordinates(x=598, y=302), Coordinates(x=255, y=256), include_raw=True)
+
+    state = make_state("Click the red two-stage square", screenshot=target_screenshot())
+    x, y = asyncio.run(agent.agenerate_coordinates(state))
+    coarse_size, fine_size = agent.llm.image_sizes
+    assert coarse_size == (768, 432)
+    assert fine_size == (512, 512)
+    # Crop is centered on the coarse point (2990, 1510): left 2734, top 1254
+    assert (x, y) == (2734 + 255, 1254 + 256)
+    print("✅ Two-stage localization mapped back correctly")
+
+
+def test_failed_refinement_keeps_coarse_point():
+    """If the second stage fails, the coarse point is still returned."""
+    print("🔍 Testing coarse fallback when refinement fails...")
+    agent = CoordinateAgent(mode="coarse_to_fine")
+    agent.llm = ScriptedLLM(Coordinates(x=600, y=300), RuntimeError("overloaded"), include_raw=True)
+
+    state = make_state("Click the red fallback square", screenshot=target_screenshot())
+    assert asyncio.run(agent.agenerate_coordinates(state)) == (3000, 1500)
+    print("✅ Coarse point used when refinement fails")
+
+
+def test_small_screens_use_one_pass():
+    """Screens already within the coarse size need no second pass."""
+    print("🔍 Testing single pass on small screens...")
+    agent = CoordinateAgent(mode="coarse_to_fine")
+    agent.llm = ScriptedLLM(Coordinates(x=100, y=200), include_raw=True)
+
+    state = make_state("Click the small screen target", screenshot=target_screenshot(640, 400))
+    assert asyncio.run(agent.agenerate_coordinates(state)) == (100, 200)
+    assert len(agent.llm.image_sizes) == 1
+    print("✅ Small screens located in one pass")
+
+
+def test_sync_calls_are_rejected():
+    """The two dependent calls only run on the async path."""
+    print("🔍 Testing sync coarse-to-fine calls...")
+    agent = CoordinateAgent(mode="coarse_to_fine")
+    agent.llm = ScriptedLLM(include_raw=True)
+    try:
+        agent.generate_coordinates(make_state("Click the sync target", screenshot=target_screenshot()))
+        assert False, "sync coarse-to-fine call accepted"
+    except ValueError:
+        pass
+    assert agent.llm.calls == 0
+    print("✅ Sync coarse-to-fine calls rejected")
+
+
+def main():
+    """Run all coarse-to-fine tests."""
+    try:
+        test_two_stage_localization()
+        test_failed_refinement_keeps_coarse_point()
+        test_small_screens_use_one_pass()
+        test_sync_calls_are_rejected()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All coarse-to-fine tests passed!")
+
+
+if __name__ == "__main__":
+    main()
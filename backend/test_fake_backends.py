@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test script for the fake LLM and TTS backends (no API keys required).
+
+Drives the real endpoints end to end with the fakes in place of the
+Anthropic and ElevenLabs clients.
+
+Usage:
+    python test_fake_backends.py
+"""
+
+import asyncio
+import base64
+import os
+import sys
+import time
+from langchain_core.messages import HumanMessage
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+import main
+from fake_backends import FAKE_TASKS, use_fake_backends
+from fixtures import make_screenshot_base64
+from orchestration_agent import get_orchestration_agent
+
+# Create test client
+client = TestClient(main.app)
+
+
+def test_endpoints_run_offline():
+    """A session runs through /initialize and /update_screenshot on the fakes."""
+    print("🔍 Testing endpoints against the fake backends...")
+    with use_fake_backends(audio_bytes=1000) as fakes:
+        response = client.post("/initialize", json={
+            "user_query": "Send an email",
+            "screenshot_base64": make_screenshot_base64((250, 250, 250)),
+        })
+        assert response.status_code == 200, response.text
+        first = response.json()
+        assert first["task"] in FAKE_TASKS
+        assert len(base64.b64decode(first["audio_base64"])) == 1000
+
+        response = client.post("/update_screenshot", json={
+            "session_id": first["session_id"],
+            "screenshot_base64": make_screenshot_base64((20, 20, 20)),
+        })
+        assert response.status_code == 200, response.text
+        assert response.json()["task"] in FAKE_TASKS
+        client.post("/reset", params={"session_id": first["session_id"]})
+
+    assert fakes["orchestration"].calls == 2
+    assert fakes["coordinate"].calls >= 1
+    print("✅ Steps completed without API keys")
+
+
+def test_latency_and_payload():
+    """The fakes wait for the configured latency and return payloads of the configured size."""
+    print("🔍 Testing fake latency and payload size...")
+    with use_fake_backends(llm_latency=0.2, payload_chars=500) as fakes:
+        start = time.perf_counter()
+        response = asyncio.run(fakes["orchestration"].ainvoke([HumanMessage(content="User request")]))
+        elapsed = time.perf_counter() - start
+        # Identical requests get identical answers
+        assert fakes["orchestration"].invoke([HumanMessage(content="User request")]) == response
+
+    assert elapsed >= 0.2
+    assert len(response.description) == 500
+    print(f"✅ Fake model answered in {elapsed:.2f}s")
+
+
+def test_originals_restored():
+    """Leaving the context puts the real clients back."""
+    print("🔍 Testing that the real clients are restored...")
+    agent = get_orchestration_agent()
+    original = agent.llm
+    with use_fake_backends():
+        assert agent.llm is not original
+    assert agent.llm is original
+    assert "awarm_up" not in agent.__dict__
+    print("✅ Real clients restored")
+
+
+def main_tests():
+    """Run all fake backend tests."""
+    try:
+        test_endpoints_run_offline()
+        test_latency_and_payload()
+        test_originals_restored()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All fake backend tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
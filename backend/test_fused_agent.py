@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test script for the fused single-call step mode (no API keys required).
+
+Usage:
+    python test_fused_agent.py
+"""
+
+import asyncio
+import os
+import sys
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+import workflow
+from fixtures import CountingLLM, make_state
+from fused_agent import Task_Description_and_Coordinates, afused_agent_node, get_fused_agent
+
+
+def test_fused_step_maps_coordinates():
+    """One call yields the task and coordinates in original screen space."""
+    print("🔍 Testing fused step generation...")
+    state = make_state(query="Open the settings page", size=(3840, 2160), color=(10, 200, 30))
+    scale = state["prepared_image"].scale
+    agent = get_fused_agent()
+    agent.llm = CountingLLM(Task_Description_and_Coordinates(
+        task="Click the gear icon", description="Home screen", x=round(100 * scale), y=round(50 * scale)
+    ))
+
+    updated_state = asyncio.run(afused_agent_node(state))
+    assert updated_state["current_task"] == "Click the gear icon"
+    assert updated_state["task_description"] == "Home screen"
+    assert abs(updated_state["coordinates"][0] - 100) <= 1 and abs(updated_state["coordinates"][1] - 50) <= 1
+    assert updated_state["chat_history"][-1]["role"] == "fused_agent"
+    assert len(state["chat_history"]) == 0
+
+    # The identical step is answered from the response cache
+    asyncio.run(afused_agent_node(state))
+    assert agent.llm.calls == 1
+    print("✅ Fused step generated and mapped back correctly")
+
+
+def test_fused_prompt_includes_progress():
+    """Completed tasks are in the fused prompt and cache key, so progress changes the answer."""
+    print("🔍 Testing fused prompt progress...")
+    state = make_state(query="Open the settings page", size=(3840, 2160), color=(30, 60, 90))
+    agent = get_fused_agent()
+    image = state["prepared_image"]
+    before_key = agent._cache_key(state, image)
+
+    progressed = state.copy()
+    progressed["task_history"] = state["task_history"].append("Click the gear icon")
+    prompt = agent._build_messages(progressed, image)[-1].content[0]["text"]
+    assert "Tasks already completed:" in prompt and "- Click the gear icon" in prompt
+    assert agent._cache_key(progressed, image) != before_key
+    print("✅ Fused prompt and cache key follow progress")
+
+
+def test_step_mode_uses_one_call():
+    """In fused mode a step makes one model call and still synthesizes audio."""
+    print("🔍 Testing STEP_MODE=fused in the workflow...")
+    state = make_state(query="Open the settings page", size=(3840, 2160), color=(200, 10, 30))
+    agent = get_fused_agent()
+    agent.llm = CountingLLM(Task_Description_and_Coordinates(task="Click OK", description="Dialog", x=5, y=6))
+
+    spoken = []
+
+    async def fake_audio(text, voice_id=workflow.DEFAULT_VOICE_ID):
+        spoken.append(text)
+        return None
+
+    original = workflow.generate_audio_for_text
+    workflow.generate_audio_for_text = fake_audio
+    try:
+        updated_state, _ = asyncio.run(workflow.run_step(state, mode="fused"))
+    finally:
+        workflow.generate_audio_for_text = original
+
+    assert agent.llm.calls == 1
+    assert updated_state["current_task"] == "Click OK"
+    assert updated_state["coordinates"] is not None
+    assert spoken == ["Click OK"]
+    print("✅ Fused mode ran one model call per step")
+
+
+def main_tests():
+    """Run all fused step mode tests."""
+    try:
+        test_fused_step_maps_coordinates()
+        test_fused_prompt_includes_progress()
+        test_step_mode_uses_one_call()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All fused step mode tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for bounded session history (no API keys required).
+
+Usage:
+    python test_history.py
+"""
+
+import os
+import sys
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+from fixtures import make_step_screenshot
+from history import History, render_progress
+from state import create_initial_state, update_screenshot
+
+
+def test_history_is_bounded():
+    """Entries beyond the capacity are folded into the summary."""
+    print("🔍 Testing bounded history...")
+    history = History(capacity=3)
+    for step in range(10):
+        history = history.append(f"Step {step}")
+
+    assert list(history) == ["Step 7", "Step 8", "Step 9"]
+    assert history.total == 10
+    assert history.summary == "7 earlier steps completed, most recently: Step 4; Step 5; Step 6"
+    assert render_progress(history).splitlines() == [history.summary, "- Step 7", "- Step 8", "- Step 9"]
+    assert render_progress(History()) == "None"
+    print("✅ History bounded with a rolling summary")
+
+
+def test_append_does_not_change_earlier_history():
+    """Appending returns a new history; the old one keeps its entries."""
+    print("🔍 Testing structural sharing...")
+    before = History(capacity=2).append("a").append("b")
+    after = before.append("c")
+
+    assert list(before) == ["a", "b"] and before.total == 2
+    assert list(after) == ["b", "c"] and after.total == 3
+    assert after.entries[0] is before.entries[1]
+    print("✅ Earlier history unchanged")
+
+
+def test_update_screenshot_records_tasks():
+    """Completed tasks are added to a bounded task history on every screen change."""
+    print("🔍 Testing task history across steps...")
+    state = create_initial_state(make_step_screenshot(0), "Test query")
+    states = [state]
+    for step in range(1, 30):
+        state["current_task"] = f"Step {step}"
+        state = update_screenshot(state, make_step_screenshot(step * 5))
+        states.append(state)
+
+    assert state["task_history"].total == 29
+    assert len(state["task_history"]) == state["task_history"].capacity
+    assert states[1]["task_history"].total == 1
+    assert len(states[0]["task_history"]) == 0
+    print("✅ Task history bounded across steps")
+
+
+def main():
+    """Run all history tests."""
+    try:
+        test_history_is_bounded()
+        test_append_does_not_change_earlier_history()
+        test_update_screenshot_records_tasks()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All history tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for screenshot preprocessing (no API keys required).
+
+Usage:
+    python test_image_processing.py
+"""
+
+import base64
+import hashlib
+import io
+import sys
+from PIL import Image, ImageDraw
+from fixtures import make_screenshot
+from image_processing import ImageSettings, prepare_screenshot, screen_fingerprint, screens_match
+from state import create_initial_state, update_screenshot
+
+
+def test_small_png_passes_through():
+    """An image within budget is sent untouched in auto mode."""
+    print("🔍 Testing pass-through of small screenshots...")
+    data = make_screenshot((1280, 720))
+    prepared = prepare_screenshot(data, ImageSettings())
+
+    assert prepared.data is data
+    assert prepared.mime_type == "image/png"
+    assert prepared.scale == 1.0
+    assert prepared.to_original(100, 200) == (100, 200)
+    print("✅ Small screenshots pass through unchanged")
+
+
+def test_mime_type_follows_source_format():
+    """The MIME type reflects the actual upload format instead of always PNG."""
+    print("🔍 Testing MIME type detection...")
+    prepared = prepare_screenshot(make_screenshot((800, 600), image_format="JPEG"), ImageSettings())
+
+    assert prepared.mime_type == "image/jpeg"
+    print("✅ MIME type detected from the upload")
+
+
+def test_4k_is_downscaled_and_mapped_back():
+    """A 4K capture is resized to the long edge and coordinates map back."""
+    print("🔍 Testing 4K downscale and coordinate back-mapping...")
+    prepared = prepare_screenshot(make_screenshot((3840, 2160)), ImageSettings(max_long_edge=1920, max_pixels=None))
+
+    assert (prepared.width, prepared.height) == (1920, 1080)
+    assert prepared.scale == 0.5
+    # Resized frames are re-encoded lossy in auto mode
+    assert prepared.mime_type == "image/jpeg"
+    assert prepared.to_original(960, 540) == (1920, 1080)
+    assert prepared.to_original(5000, 5000) == (3839, 2159)
+    print("✅ 4K screenshot downscaled and mapped back correctly")
+
+
+def test_pixel_budget_and_lossy_format():
+    """The pixel budget applies and lossy formats are re-encoded."""
+    print("🔍 Testing pixel budget with JPEG re-encoding...")
+    settings = ImageSettings(max_long_edge=None, max_pixels=1_000_000, format="jpeg", quality=70)
+    prepared = prepare_screenshot(make_screenshot((2560, 1440)), settings)
+
+    assert prepared.width * prepared.height <= 1_000_000
+    assert prepared.mime_type == "image/jpeg"
+    assert Image.open(io.BytesIO(prepared.data)).format == "JPEG"
+    print("✅ Pixel budget and JPEG re-encoding working correctly")
+
+
+def test_crop_offsets_are_mapped_back():
+    """Coordinates inside a crop map back to the full screenshot."""
+    print("🔍 Testing crop offset back-mapping...")
+    prepared = prepare_screenshot(make_screenshot((1920, 1080)), ImageSettings(), crop=(1000, 500, 1400, 800))
+
+    assert (prepared.width, prepared.height) == (400, 300)
+    assert prepared.to_original(200, 150) == (1200, 650)
+    print("✅ Crop offsets mapped back correctly")
+
+
+def test_identical_frames_match():
+    """Re-encoded copies of the same frame are detected as unchanged."""
+    print("🔍 Testing change detection on identical frames...")
+    original = screen_fingerprint(make_screenshot((1920, 1080)))
+    reencoded = screen_fingerprint(make_screenshot((1920, 1080), image_format="JPEG"))
+
+    assert screens_match(original, reencoded)
+    print("✅ Identical frames detected as unchanged")
+
+
+def test_local_change_is_detected():
+    """A dialog appearing in one region counts as a new screen."""
+    print("🔍 Testing change detection on a local change...")
+    image = Image.new("RGB", (1920, 1080), (30, 120, 200))
+    before = io.BytesIO()
+    image.save(before, format="PNG")
+    ImageDraw.Draw(image).rectangle((700, 400, 1100, 650), fill=(255, 255, 255))
+    after = io.BytesIO()
+    image.save(after, format="PNG")
+
+    assert not screens_match(screen_fingerprint(before.getvalue()), screen_fingerprint(after.getvalue()))
+    print("✅ Local change detected")
+
+
+def test_small_local_change_is_detected():
+    """A toggled checkbox or a typed word is too small to move any tile average, but still a new screen."""
+    print("🔍 Testing change detection on a small local change...")
+    image = Image.new("RGB", (1920, 1080), (240, 240, 240))
+    before = io.BytesIO()
+    image.save(before, format="PNG")
+    previous = screen_fingerprint(before.getvalue())
+
+    checked = image.copy()
+    ImageDraw.Draw(checked).rectangle((900, 500, 914, 514), fill=(20, 20, 20))
+    typed = image.copy()
+    ImageDraw.Draw(typed).text((600, 300), "hello", fill=(0, 0, 0))
+    for changed in (checked, typed):
+        after = io.BytesIO()
+        changed.save(after, format="PNG")
+        assert not screens_match(previous, screen_fingerprint(after.getvalue()))
+    print("✅ Small local change detected")
+
+
+def test_resolution_change_is_detected():
+    """Frames of different sizes never match."""
+    print("🔍 Testing change detection across resolutions...")
+    assert not screens_match(
+        screen_fingerprint(make_screenshot((1920, 1080))),
+        screen_fingerprint(make_screenshot((1280, 720)))
+    )
+    assert not screens_match(None, screen_fingerprint(make_screenshot((1280, 720))))
+    print("✅ Resolution change detected")
+
+
+def test_state_prepares_screenshot_once():
+    """The state carries one prepared payload per screenshot for both agents."""
+    print("🔍 Testing shared prepared screenshot in state...")
+    data = make_screenshot((3840, 2160))
+    state = create_initial_state(data, "Test query")
+    prepared = state["prepared_image"]
+
+    assert base64.b64decode(prepared.data_base64) == prepared.data
+    assert prepared.digest == hashlib.sha256(data).hexdigest()
+    assert update_screenshot(state, data)["prepared_image"] is prepared
+
+    changed = update_screenshot(state, make_screenshot((1280, 720)))
+    assert changed["prepared_image"].original_width == 1280
+    print("✅ Screenshot prepared once and shared through the state")
+
+
+def main():
+    """Run all image processing tests."""
+    try:
+        test_small_png_passes_through()
+        test_mime_type_follows_source_format()
+        test_4k_is_downscaled_and_mapped_back()
+        test_pixel_budget_and_lossy_format()
+        test_crop_offsets_are_mapped_back()
+        test_identical_frames_match()
+        test_local_change_is_detected()
+        test_small_local_change_is_detected()
+        test_resolution_change_is_detected()
+        test_state_prepares_screenshot_once()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All image processing tests passed!")
+
+
+if __name__ == "__main__":
+    main()
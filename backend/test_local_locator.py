@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test script for the local locator fast path (no API keys, tesseract or OpenCV required).
+
+The OCR backend is replaced with a stand-in that returns fixed word boxes.
+
+Usage:
+    python test_local_locator.py
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+from PIL import Image
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+import coordinate_agent
+import local_locator
+from coordinate_agent import Coordinates, acoordinate_agent_node, get_coordinate_agent
+from fixtures import make_state
+from local_locator import LocatorChain, LocatorMatch, OcrLocator, quoted_labels
+from metrics import LOCATOR_RESOLUTIONS, LOCATOR_SECONDS
+
+
+class FakeTesseract:
+    """Stand-in for pytesseract returning fixed words: "Compose" once, "Send" twice."""
+
+    Output = SimpleNamespace(DICT="dict")
+
+    @staticmethod
+    def get_tesseract_version():
+        return "5.0"
+
+    @staticmethod
+    def image_to_data(image, output_type=None):
+        words = [
+            ("Compose", 96, 1, 100, 200, 80, 20),
+            ("Sign", 95, 2, 400, 50, 40, 20),
+            ("in", 91, 2, 445, 50, 20, 20),
+            ("Send", 97, 3, 600, 700, 40, 20),
+            ("Send", 97, 4, 900, 700, 40, 20),
+            ("Inbox", 40, 5, 20, 300, 60, 20),
+        ]
+        return {
+            "text": [word[0] for word in words],
+            "conf": [word[1] for word in words],
+            "block_num": [1] * len(words),
+            "par_num": [1] * len(words),
+            "line_num": [word[2] for word in words],
+            "left": [word[3] for word in words],
+            "top": [word[4] for word in words],
+            "width": [word[5] for word in words],
+            "height": [word[6] for word in words],
+        }
+
+
+class FixedLocator:
+    """Locator stand-in that always finds its target at one point."""
+
+    name = "fixed"
+
+    def available(self):
+        return True
+
+    def __init__(self):
+        self.sizes = []
+
+    def locate(self, image, task, scale=1.0):
+        self.sizes.append(image.size)
+        return LocatorMatch(x=11, y=22, confidence=1.0, source=self.name, label=task)
+
+
+class FailingLLM:
+    """Structured output stand-in that fails the test if the LLM is reached."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return {"raw": None, "parsed": Coordinates(x=1, y=2), "parsing_error": None}
+
+
+def test_quoted_labels():
+    """Quoted labels are extracted, apostrophes inside words are ignored."""
+    print("🔍 Testing label extraction...")
+    assert quoted_labels("Click the 'Compose' button") == ["Compose"]
+    assert quoted_labels("Click “Next” then ‘Send’") == ["Next", "Send"]
+    assert quoted_labels("Open the user's profile menu") == []
+    print("✅ Labels extracted correctly")
+
+
+def test_ocr_locator_matches_unique_confident_labels():
+    """Unique, confident labels are located; ambiguous or unclear ones are not."""
+    print("🔍 Testing OCR label matching...")
+    original = local_locator.pytesseract
+    local_locator.pytesseract = FakeTesseract
+    try:
+        locator = OcrLocator(min_confidence=0.8)
+        image = Image.new("RGB", (1280, 800))
+        match = locator.locate(image, "Click the 'Compose' button")
+        assert (match.x, match.y) == (140, 210) and match.source == "ocr"
+
+        match = locator.locate(image, "Click 'Sign in'")
+        assert (match.x, match.y) == (432, 60)
+
+        assert locator.locate(image, "Click 'Send'") is None
+        assert locator.locate(image, "Click 'Inbox'") is None
+        assert locator.locate(image, "Click the search bar") is None
+    finally:
+        local_locator.pytesseract = original
+    print("✅ OCR labels matched correctly")
+
+
+def test_node_uses_local_match_before_llm():
+    """A local match skips the coordinate agent and is recorded on the step."""
+    print("🔍 Testing local fast path in the coordinate node...")
+    agent = get_coordinate_agent()
+    original = (coordinate_agent.local_locator, agent.llm)
+    coordinate_agent.local_locator = LocatorChain([FixedLocator()])
+    agent.llm = FailingLLM()
+    resolved_before = LOCATOR_RESOLUTIONS.value(source="fixed")
+    timed_before = LOCATOR_SECONDS.count(stage="total", source="fixed")
+    try:
+        state = asyncio.run(acoordinate_agent_node(make_state("Click 'Compose'", size=(1280, 800))))
+        assert state["coordinates"] == (11, 22)
+        assert state["locator"]["source"] == "fixed"
+        assert agent.llm.calls == 0
+        assert LOCATOR_RESOLUTIONS.value(source="fixed") == resolved_before + 1
+        assert LOCATOR_SECONDS.count(stage="total", source="fixed") == timed_before + 1
+
+        stats = coordinate_agent.local_locator.stats()
+        assert stats["attempts"] == 1 and stats["hit_rate"] == 1.0
+    finally:
+        coordinate_agent.local_locator, agent.llm = original
+    print("✅ Local match used without calling the LLM and counted in metrics")
+
+
+def test_locators_run_on_prepared_image():
+    """Locators scan the downscaled prepared screenshot and matches are mapped back to screen space."""
+    print("🔍 Testing locators on the prepared screenshot...")
+    locator = FixedLocator()
+    chain = LocatorChain([locator])
+    state = make_state("Click 'Compose'", size=(3840, 2160))
+    image = state["prepared_image"]
+    assert image.scale < 1.0
+
+    match, _ = chain.locate(image, state["current_task"])
+    assert locator.sizes == [(image.width, image.height)]
+    assert (match.x, match.y) == image.to_original(11, 22) != (11, 22)
+    print("✅ Locators ran on the prepared screenshot")
+
+
+def test_node_falls_back_to_llm():
+    """Without a local match the coordinate agent is called."""
+    print("🔍 Testing LLM fallback in the coordinate node...")
+    agent = get_coordinate_agent()
+    original = (coordinate_agent.local_locator, agent.llm)
+    coordinate_agent.local_locator = LocatorChain([])
+    agent.llm = FailingLLM()
+    try:
+        state = asyncio.run(acoordinate_agent_node(make_state("Click the blue fallback button", size=(1280, 800))))
+        assert state["locator"]["source"] == "llm"
+        assert agent.llm.calls == 1
+    finally:
+        coordinate_agent.local_locator, agent.llm = original
+    print("✅ LLM fallback working correctly")
+
+
+def main():
+    """Run all local locator tests."""
+    try:
+        test_quoted_labels()
+        test_ocr_locator_matches_unique_confident_labels()
+        test_node_uses_local_match_before_llm()
+        test_locators_run_on_prepared_image()
+        test_node_falls_back_to_llm()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All local locator tests passed!")
+
+
+if __name__ == "__main__":
+    main()
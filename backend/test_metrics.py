@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Test script for stage timings, counters and the /metrics endpoint (no API keys required).
+
+Steps run on the fake LLM and TTS backends.
+
+Usage:
+    python test_metrics.py
+"""
+
+import os
+import sys
+from langchain_core.messages import AIMessage
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+import main
+import metrics
+from cache import TieredCache
+from coordinate_agent import get_coordinate_agent
+from fake_backends import use_fake_backends
+from fixtures import make_screenshot_base64
+
+# Create test client
+client = TestClient(main.app)
+
+
+def test_histogram_and_counter_format():
+    """Histograms are cumulative and both types render in the Prometheus text format."""
+    print("🔍 Testing Prometheus text format...")
+    histogram = metrics.Histogram("test_seconds", "Test durations.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="a")
+    histogram.observe(0.5, stage="a")
+    histogram.observe(5.0, stage="a")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="a"} 3' in lines
+    assert 'test_seconds_sum{stage="a"} 5.55' in lines
+
+    counter = metrics.Counter("test_total", "Test events.", ("reason",))
+    counter.inc(reason='say "hi"')
+    counter.inc(2, reason='say "hi"')
+    assert counter.render()[-1] == 'test_total{reason="say \\"hi\\""} 3'
+    print("✅ Metrics rendered correctly")
+
+
+def test_server_timing_header():
+    """Step responses report every stage in Server-Timing, and /metrics exposes the histograms."""
+    print("🔍 Testing Server-Timing header and /metrics...")
+    with use_fake_backends():
+        response = client.post("/initialize", json={
+            "user_query": "Send an email",
+            "screenshot_base64": make_screenshot_base64((200, 220, 240)),
+        })
+    assert response.status_code == 200, response.text
+    client.post("/reset", params={"session_id": response.json()["session_id"]})
+
+    header = response.headers["Server-Timing"]
+    stages = [entry.split(";")[0] for entry in header.split(", ")]
+    for stage in ("decode", "prepare", "orchestrate", "locate", "speak", "save"):
+        assert stage in stages, f"{stage} missing from {header}"
+    assert stages[-1] == "total"
+
+    body = client.get("/metrics").text
+    assert 'step_stage_seconds_count{stage="orchestrate"}' in body
+    assert 'http_request_duration_seconds_count{method="POST",path="/initialize",status="200"}' in body
+    assert "# TYPE tts_failures_total counter" in body
+    print(f"✅ Server-Timing: {header}")
+
+
+def test_event_counters():
+    """Cache lookups and coordinate parse fallbacks are counted."""
+    print("🔍 Testing event counters...")
+    cache = TieredCache(name="metrics_test", max_memory_bytes=1024)
+    cache.get("missing")
+    cache.set("key", b"value")
+    cache.get("key")
+    assert metrics.CACHE_LOOKUPS.value(cache="metrics_test", result="miss") == 1
+    assert metrics.CACHE_LOOKUPS.value(cache="metrics_test", result="memory_hit") == 1
+
+    before = metrics.COORDINATE_PARSE_FALLBACKS.value(reason="parsing_error")
+    coordinates = get_coordinate_agent()._coordinates_from_response({
+        "raw": AIMessage(content="The button is at 120, 245"),
+        "parsed": None,
+        "parsing_error": ValueError("not JSON"),
+    })
+    assert coordinates == (120, 245)
+    assert metrics.COORDINATE_PARSE_FALLBACKS.value(reason="parsing_error") == before + 1
+    print("✅ Event counters working correctly")
+
+
+def main_tests():
+    """Run all metrics tests."""
+    try:
+        test_histogram_and_counter_format()
+        test_server_timing_header()
+        test_event_counters()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All metrics tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
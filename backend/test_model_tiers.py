@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test script for model tier routing and escalation (no API keys required).
+
+Usage:
+    python test_model_tiers.py
+"""
+
+import asyncio
+import os
+import sys
+from langchain_core.messages import AIMessage
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+import model_tiers
+from coordinate_agent import CoordinateAgent, Coordinates
+from fixtures import ScriptedLLM, make_state
+from fused_agent import FusedAgent, Task_Description_and_Coordinates
+from model_tiers import ModelTiers, model_tier_stats
+
+
+def coordinates(x: int, y: int) -> dict:
+    """A structured output response with include_raw=True."""
+    return {"raw": AIMessage(content=f"{x}, {y}"), "parsed": Coordinates(x=x, y=y), "parsing_error": None}
+
+
+def test_tier_configuration():
+    """Agents use their tier's model and only cheaper tiers get an escalation model."""
+    print("🔍 Testing tier configuration...")
+    fast = CoordinateAgent(tier="fast")
+    assert fast.chat_model.model == model_tiers.FAST_MODEL
+    assert fast.escalation_model.model == model_tiers.STRONG_MODEL
+    strong = CoordinateAgent(tier="strong")
+    assert strong.chat_model.model == model_tiers.STRONG_MODEL
+    assert strong.escalation_model is None and strong.escalation_llm is None
+    assert CoordinateAgent(model_name="claude-3-7-sonnet-latest", tier="strong").chat_model.model == "claude-3-7-sonnet-latest"
+    try:
+        ModelTiers("coordinate", tier="medium")
+        assert False, "unknown tier accepted"
+    except ValueError:
+        pass
+    print("✅ Tiers configured correctly")
+
+
+def test_valid_answer_is_not_escalated():
+    """An in-bounds parsed answer from the fast tier is used as is."""
+    print("🔍 Testing accepted fast tier answers...")
+    agent = CoordinateAgent(tier="fast", mode="single")
+    agent.llm, agent.escalation_llm = ScriptedLLM(coordinates(100, 200)), ScriptedLLM()
+    result = asyncio.run(agent.agenerate_coordinates(make_state("Tier test: click the accepted button", size=(1280, 800))))
+    assert result == (100, 200)
+    assert agent.llm.calls == 1 and agent.escalation_llm.calls == 0
+    print("✅ Valid answer kept on the fast tier")
+
+
+def test_escalation_reasons():
+    """Out-of-bounds, unparsed and failed fast tier answers are retried on the strong tier."""
+    print("🔍 Testing escalation...")
+    before = model_tiers.MODEL_TIER_ESCALATIONS.value(agent="coordinate", tier="fast", reason="out_of_bounds")
+    cases = [
+        ("out_of_bounds", coordinates(5000, 200)),
+        ("parsing_error", {"raw": AIMessage(content="no idea"), "parsed": None, "parsing_error": ValueError("not JSON")}),
+        ("call_error", RuntimeError("overloaded")),
+    ]
+    for index, (reason, answer) in enumerate(cases):
+        agent = CoordinateAgent(tier="fast", mode="single")
+        agent.llm, agent.escalation_llm = ScriptedLLM(answer), ScriptedLLM(coordinates(300, 150))
+        state = make_state(f"Tier test: escalate on {reason}", size=(1280, 800), color=(10 * index, 80, 120))
+        assert agent.generate_coordinates(state) == (300, 150), reason
+        assert agent.escalation_llm.calls == 1, reason
+    assert model_tiers.MODEL_TIER_ESCALATIONS.value(agent="coordinate", tier="fast", reason="out_of_bounds") == before + 1
+    print("✅ Rejected answers escalated")
+
+
+def test_strong_tier_keeps_fallbacks():
+    """Without an escalation tier, failed calls still fall back to the screen center."""
+    print("🔍 Testing the strong tier without escalation...")
+    agent = CoordinateAgent(tier="strong", mode="single")
+    agent.llm = ScriptedLLM(RuntimeError("overloaded"))
+    result = agent.generate_coordinates(make_state("Tier test: strong tier failure", size=(1280, 800), color=(90, 90, 200)))
+    assert result == (640, 360)
+    print("✅ Strong tier failures fall back as before")
+
+
+def test_fused_escalation_and_stats():
+    """Fused answers outside the screenshot escalate, and stats report rates and savings per tier."""
+    print("🔍 Testing fused escalation and tier stats...")
+    agent = FusedAgent(tier="fast")
+    agent.llm = ScriptedLLM(Task_Description_and_Coordinates(task="Click OK", description="Dialog", x=-5, y=10))
+    agent.escalation_llm = ScriptedLLM(Task_Description_and_Coordinates(task="Click OK", description="Dialog", x=50, y=10))
+    task, _, point = asyncio.run(agent.agenerate_step(make_state(query="Tier test: fused escalation", size=(1280, 800), color=(200, 30, 30))))
+    assert task == "Click OK" and point == (50, 10)
+
+    stats = model_tier_stats()["fused"]
+    assert stats["fast"]["escalations"] >= 1 and stats["strong"]["calls"] >= 1
+    assert 0 < stats["fast"]["escalation_rate"] <= 1
+    assert "est_saved_ms_per_call" in stats["fast"]
+    print(f"✅ Tier stats: {stats}")
+
+
+def main_tests():
+    """Run all model tier tests."""
+    try:
+        test_tier_configuration()
+        test_valid_answer_is_not_escalated()
+        test_escalation_reasons()
+        test_strong_tier_keeps_fallbacks()
+        test_fused_escalation_and_stats()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All model tier tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test script for the plan-ahead step mode (no API keys required).
+
+The planner and locator models are replaced with scripted stand-ins, and the
+workflow is driven through the API like the frontend does.
+
+Usage:
+    python test_plan_mode.py
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+import main
+import workflow
+from coordinate_agent import Located_Element, get_coordinate_agent
+from fixtures import ScriptedLLM, make_step_screenshot
+from orchestration_agent import Plan, Task_and_Description, get_orchestration_agent
+
+# Create test client
+client = TestClient(main.app)
+
+
+def plan_of(*tasks) -> Plan:
+    """Build a plan response for the given task names."""
+    return Plan(steps=[Task_and_Description(task=task, description=f"Before {task}") for task in tasks])
+
+
+def located(visible=True, x=10, y=20) -> Located_Element:
+    """Build a locator response."""
+    return Located_Element(visible=visible, x=x, y=y)
+
+
+@contextmanager
+def plan_mode(plans, locations):
+    """Run the server in plan mode with scripted planner and locator responses."""
+    orchestrator, locator = get_orchestration_agent(), get_coordinate_agent()
+    originals = (main.STEP_MODE, workflow.generate_audio_for_text, orchestrator.planner, locator.locator)
+
+    async def fake_audio(text, voice_id=workflow.DEFAULT_VOICE_ID):
+        return None
+
+    main.STEP_MODE, workflow.generate_audio_for_text = "plan", fake_audio
+    orchestrator.planner, locator.locator = ScriptedLLM(*plans), ScriptedLLM(*locations)
+    try:
+        yield orchestrator.planner, locator.locator
+    finally:
+        main.STEP_MODE, workflow.generate_audio_for_text, orchestrator.planner, locator.locator = originals
+
+
+def step(session_id, shade):
+    """Send one screenshot update and return the response data."""
+    response = client.post("/update_screenshot/raw", params={"session_id": session_id}, content=make_step_screenshot(shade, (640, 400)))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_plan_is_followed_without_orchestration():
+    """After planning, each update only calls the locator; an empty replan completes the workflow."""
+    print("🔍 Testing plan-ahead steps...")
+    plans = [plan_of("Open browser", "Go to gmail", "Click compose"), plan_of()]
+    locations = [located(), located(), located()]
+    with plan_mode(plans, locations) as (planner, locator):
+        response = client.post("/initialize/raw", params={"user_query": "Send an email"}, content=make_step_screenshot(0, (640, 400)))
+        data = response.json()
+        assert data["task"] == "Open browser"
+        session_id = data["session_id"]
+
+        assert step(session_id, 60)["task"] == "Go to gmail"
+        assert step(session_id, 120)["task"] == "Click compose"
+        assert planner.calls == 1 and locator.calls == 3
+
+        # Plan exhausted: the replan finds nothing left to do
+        assert step(session_id, 180)["is_completed"] is True
+        assert planner.calls == 2 and locator.calls == 3
+    print("✅ Plan followed with one orchestration call per plan")
+
+
+def test_divergence_triggers_replan():
+    """When the planned element is not on screen, the orchestration agent replans."""
+    print("🔍 Testing replanning on divergence...")
+    plans = [plan_of("Open settings", "Click privacy"), plan_of("Close popup", "Click privacy")]
+    locations = [located(), located(visible=False), located(x=30, y=40)]
+    with plan_mode(plans, locations) as (planner, locator):
+        response = client.post("/initialize/raw", params={"user_query": "Change privacy"}, content=make_step_screenshot(10, (640, 400)))
+        session_id = response.json()["session_id"]
+
+        data = step(session_id, 90)
+        assert data["task"] == "Close popup"
+        assert (data["x"], data["y"]) == (30, 40)
+        assert planner.calls == 2 and locator.calls == 3
+
+        status = client.get("/status", params={"session_id": session_id}).json()
+        assert status["plan_steps_remaining"] == 1
+    print("✅ Divergence replanned correctly")
+
+
+def test_locator_failure_falls_back():
+    """A failed locator call keeps the planned task and falls back to the default point."""
+    print("🔍 Testing locator failures...")
+    plans = [plan_of("Open downloads", "Click the file")]
+    locations = [located(), RuntimeError("overloaded")]
+    with plan_mode(plans, locations) as (planner, locator):
+        response = client.post("/initialize/raw", params={"user_query": "Open the download"}, content=make_step_screenshot(20, (640, 400)))
+        session_id = response.json()["session_id"]
+
+        data = step(session_id, 100)
+        assert data["task"] == "Click the file"
+        # The (640, 360) fallback, clamped to the 640 pixel wide screenshot
+        assert (data["x"], data["y"]) == (639, 360)
+        assert planner.calls == 1 and locator.calls == 2
+    print("✅ Locator failure fell back to the default point")
+
+
+def main_tests():
+    """Run all plan mode tests."""
+    try:
+        test_plan_is_followed_without_orchestration()
+        test_divergence_triggers_replan()
+        test_locator_failure_falls_back()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All plan mode tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
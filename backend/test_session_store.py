@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Test script for the session store (no API keys required).
+
+Usage:
+    python test_session_store.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from fixtures import make_state, make_step_screenshot
+from session_store import SessionDatabase, SessionStore
+from state import create_initial_state, update_screenshot
+
+
+def test_create_and_get():
+    """Sessions can be created, looked up and deleted."""
+    print("🔍 Testing session create/get/delete...")
+    store = SessionStore()
+    session = store.create(make_state())
+
+    assert store.get(session.session_id) is session
+    assert store.get("unknown") is None
+    assert store.get(None) is None
+    assert store.delete(session.session_id)
+    assert store.get(session.session_id) is None
+    assert store.stats()["memory_bytes"] == 0
+    print("✅ Session lifecycle working correctly")
+
+
+def test_lru_eviction_by_count():
+    """The least recently used session is evicted when over the count limit."""
+    print("🔍 Testing LRU eviction by session count...")
+    store = SessionStore(max_sessions=2)
+    first = store.create(make_state())
+    second = store.create(make_state())
+
+    # Touch the first session so the second becomes least recently used
+    store.get(first.session_id)
+    third = store.create(make_state())
+
+    assert store.get(first.session_id) is first
+    assert store.get(second.session_id) is None
+    assert store.get(third.session_id) is third
+    print("✅ LRU eviction by count working correctly")
+
+
+def test_eviction_by_memory_budget():
+    """Sessions are evicted when the memory budget is exceeded."""
+    print("🔍 Testing eviction by memory budget...")
+    store = SessionStore(max_memory_bytes=3 * 1024 * 1024)
+    sessions = [store.create(make_state(screenshot=bytes(1024 * 1024))) for _ in range(4)]
+
+    assert store.get(sessions[0].session_id) is None
+    assert store.get(sessions[-1].session_id) is sessions[-1]
+    assert store.stats()["memory_bytes"] <= store.max_memory_bytes
+
+    # Growing a session's screenshot is re-accounted on save
+    store.save(sessions[-1], make_state(screenshot=bytes(2 * 1024 * 1024)))
+    assert store.stats()["memory_bytes"] <= store.max_memory_bytes
+    print("✅ Memory budget eviction working correctly")
+
+
+def test_ttl_expiry():
+    """Idle sessions expire after the TTL."""
+    print("🔍 Testing TTL expiry...")
+    store = SessionStore(ttl_seconds=0.05)
+    session = store.create(make_state())
+    time.sleep(0.1)
+
+    # Lookups skip expired sessions right away; the sweep frees them
+    assert store.get(session.session_id) is None
+    assert store.expire() == [session.session_id]
+    assert store.stats()["sessions"] == 0
+    print("✅ TTL expiry working correctly")
+
+
+def test_background_expiry():
+    """run_expiry sweeps expired sessions periodically, and aget finds live ones without blocking."""
+    print("🔍 Testing background expiry...")
+
+    async def scenario():
+        store = SessionStore(ttl_seconds=0.05)
+        idle = store.create(make_state())
+        active = store.create(make_state())
+        sweeper = asyncio.create_task(store.run_expiry(interval=0.02))
+        try:
+            for _ in range(10):
+                await asyncio.sleep(0.02)
+                assert await store.aget(active.session_id) is active
+            assert store.stats()["sessions"] == 1
+            assert await store.aget(idle.session_id) is None
+        finally:
+            sweeper.cancel()
+
+    asyncio.run(scenario())
+    print("✅ Idle sessions expired in the background")
+
+
+def test_locked_sessions_are_not_evicted():
+    """A session with a running step is never evicted."""
+    print("🔍 Testing that locked sessions survive eviction...")
+
+    async def scenario():
+        store = SessionStore(max_sessions=1)
+        busy = store.create(make_state())
+        async with busy.lock:
+            other = store.create(make_state())
+            assert store.get(busy.session_id) is busy
+            assert store.get(other.session_id) is other
+        # Once released, the next eviction pass brings the store back in budget
+        store.create(make_state())
+        assert store.stats()["sessions"] == 1
+
+    asyncio.run(scenario())
+    print("✅ Locked sessions protected from eviction")
+
+
+def test_discard_hook():
+    """Sweeps report expired and evicted sessions, so their workflow checkpoints can be dropped."""
+    print("🔍 Testing the discard hook...")
+
+    async def scenario():
+        store = SessionStore(max_sessions=1, ttl_seconds=0.1)
+        discarded = []
+
+        async def on_discard(session_id):
+            discarded.append(session_id)
+
+        evicted = store.create(make_state())
+        idle = store.create(make_state())
+        sweeper = asyncio.create_task(store.run_expiry(interval=0.05, on_discard=on_discard))
+        try:
+            await asyncio.sleep(0.08)
+            assert discarded == [evicted.session_id]
+            await asyncio.sleep(0.15)
+            assert discarded == [evicted.session_id, idle.session_id]
+        finally:
+            sweeper.cancel()
+
+    asyncio.run(scenario())
+    print("✅ Expired and evicted sessions reported")
+
+
+def make_database(directory: str) -> SessionDatabase:
+    """Open a session database in a temporary directory."""
+    return SessionDatabase(os.path.join(directory, "sessions.db"))
+
+
+def test_sessions_survive_restart():
+    """Saved sessions are written to disk, keep no frame in memory and load back in a new store."""
+    print("🔍 Testing session persistence across restarts...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(database=make_database(directory))
+        state = create_initial_state(make_step_screenshot(10), "Test query")
+        session = store.create(state)
+        state = state.copy()
+        state["current_task"] = "Click OK"
+        state["coordinates"] = (10, 20)
+        state["task_history"] = state["task_history"].append("Open the app")
+        store.save(session, state)
+
+        # Only a running step needs the frame in memory
+        assert session.state["screenshot_image"] is None
+        assert session.state["prepared_image"] is None
+
+        restarted = SessionStore(database=make_database(directory))
+        restored = restarted.get(session.session_id)
+        assert restored is not None
+        assert restored.state["current_task"] == "Click OK"
+        assert restored.state["coordinates"] == (10, 20)
+        assert list(restored.state["task_history"]) == ["Open the app"]
+        assert restored.state["screenshot_fingerprint"] == state["screenshot_fingerprint"]
+        assert restored.state["screenshot_image"] is None
+        assert os.listdir(directory) == ["sessions.db"]
+
+        # The same screen is still recognized, and a new screen is taken as usual
+        assert update_screenshot(restored.state, make_step_screenshot(10))["screen_unchanged"]
+        changed = update_screenshot(restored.state, make_step_screenshot(200))
+        assert not changed["screen_unchanged"]
+        assert list(changed["task_history"]) == ["Open the app", "Click OK"]
+    print("✅ Sessions restored after a restart")
+
+
+def test_evicted_sessions_load_from_disk():
+    """With a database, budget eviction only drops a session from memory; expiry removes it from disk."""
+    print("🔍 Testing eviction and expiry with a database...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = SessionStore(max_sessions=1, ttl_seconds=0.2, database=make_database(directory))
+        first = store.create(make_state())
+        store.save(first, make_state())
+        second = store.create(make_state())
+        store.save(second, make_state())
+
+        assert store.stats()["sessions"] == 1
+        assert asyncio.run(store.aget(first.session_id)) is not None
+        assert store.stats()["stored_sessions"] == 2
+
+        time.sleep(0.3)
+        store.expire()
+        assert store.get(first.session_id) is None
+        assert store.get(second.session_id) is None
+        assert store.stats()["stored_sessions"] == 0
+    print("✅ Evicted sessions loaded back, expired sessions removed")
+
+
+def main():
+    """Run all session store tests."""
+    try:
+        test_create_and_get()
+        test_lru_eviction_by_count()
+        test_eviction_by_memory_budget()
+        test_ttl_expiry()
+        test_background_expiry()
+        test_locked_sessions_are_not_evicted()
+        test_discard_hook()
+        test_sessions_survive_restart()
+        test_evicted_sessions_load_from_disk()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All session store tests passed!")
+
+
+if __name__ == "__main__":
+    main()
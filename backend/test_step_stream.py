@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test script for the Server-Sent Events step endpoints (no API keys required).
+
+Steps run on the fake LLM and TTS backends.
+
+Usage:
+    python test_step_stream.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+import main
+from fake_backends import use_fake_backends
+from fixtures import make_screenshot_base64, make_step_screenshot
+from state import create_initial_state
+
+# Create test client
+client = TestClient(main.app)
+
+
+def read_events(path: str, body: dict) -> list:
+    """POST to a streaming endpoint and collect its (event, data) pairs."""
+    events = []
+    with client.stream("POST", path, json=body) as response:
+        assert response.status_code == 200, response.read()
+        assert response.headers["content-type"].startswith("text/event-stream")
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+def test_stream_step_events():
+    """The task arrives before the coordinates and the audio, and "done" matches the non-streaming response."""
+    print("🔍 Testing streamed steps...")
+    with use_fake_backends(llm_latency=0.05, tts_latency=0.2):
+        events = read_events("/initialize/stream", {
+            # A query no other test uses, so no answer comes from the response cache
+            "user_query": "Stream the steps to archive old invoices",
+            "screenshot_base64": make_screenshot_base64((220, 230, 210)),
+        })
+        names = [name for name, _ in events]
+        assert names == ["session", "task", "coordinates", "audio", "done"], names
+        data = dict(events)
+        session_id = data["session"]["session_id"]
+        assert data["task"]["task"] == data["done"]["task"]
+        assert (data["coordinates"]["x"], data["coordinates"]["y"]) == (data["done"]["x"], data["done"]["y"])
+        assert data["audio"]["audio_base64"]
+        assert "audio_base64" not in data["done"]
+
+        # The step was saved like a non-streaming step
+        status = client.get("/status", params={"session_id": session_id}).json()
+        assert status["current_task"] == data["task"]["task"]
+        assert status["usage"]["last_step"]["calls"] == 2
+
+        events = read_events("/update_screenshot/stream", {
+            "session_id": session_id,
+            "screenshot_base64": make_screenshot_base64((20, 30, 40)),
+        })
+        names = [name for name, _ in events]
+        # Audio for a task spoken before comes from the TTS cache, possibly ahead of the coordinates
+        assert names[0] == "task" and names[-1] == "done" and sorted(names[1:3]) == ["audio", "coordinates"], names
+        assert dict(events)["done"]["session_id"] == session_id
+        client.post("/reset", params={"session_id": session_id})
+    print("✅ Stream delivered task, coordinates, audio and done in order")
+
+
+def test_unchanged_screen_replays_last_step():
+    """An unchanged screenshot replays the stored result without another model call."""
+    print("🔍 Testing streamed replay of an unchanged screen...")
+    screenshot = make_screenshot_base64((90, 60, 30))
+    with use_fake_backends() as fakes:
+        events = read_events("/initialize/stream", {
+            "user_query": "Stream a replay of the unchanged screen",
+            "screenshot_base64": screenshot,
+        })
+        session_id = dict(events)["session"]["session_id"]
+        calls = fakes["orchestration"].calls
+        events = read_events("/update_screenshot/stream", {"session_id": session_id, "screenshot_base64": screenshot})
+        assert [name for name, _ in events] == ["task", "coordinates", "audio", "done"]
+        assert fakes["orchestration"].calls == calls
+        client.post("/reset", params={"session_id": session_id})
+    print("✅ Unchanged screen replayed")
+
+
+def test_stream_errors():
+    """Unknown sessions fail before the stream starts."""
+    print("🔍 Testing streaming errors...")
+    response = client.post("/update_screenshot/stream", json={
+        "session_id": "missing",
+        "screenshot_base64": make_screenshot_base64((0, 0, 0)),
+    })
+    assert response.status_code == 400
+    print("✅ Errors reported as HTTP errors")
+
+
+def test_new_session_survives_eviction():
+    """A streamed first step holds its session's lock from the "session" event on, so eviction skips it."""
+    print("🔍 Testing eviction during a streamed first step...")
+    store = main.session_store
+    original_limit = store.max_sessions
+    store.max_sessions = 1
+
+    async def scenario():
+        initial_state = create_initial_state(make_step_screenshot(70, (640, 400)), "Stream a step under eviction pressure")
+        events = main.stream_start_session(initial_state)
+        first = await events.__anext__()
+        session_id = json.loads(first.split("data: ", 1)[1])["session_id"]
+        # Other users start sessions before the first step runs
+        others = [store.create(create_initial_state(make_step_screenshot(90 + shade), "Other query")) for shade in range(3)]
+        assert store.get(session_id) is not None
+        rest = [event async for event in events]
+        for other in others:
+            store.delete(other.session_id)
+        return session_id, rest
+
+    try:
+        with use_fake_backends():
+            session_id, rest = asyncio.run(scenario())
+    finally:
+        store.max_sessions = original_limit
+    assert rest[-1].startswith("event: done"), rest
+    assert store.delete(session_id)
+    print("✅ New session kept until its first step finished")
+
+
+def main_tests():
+    """Run all streaming step tests."""
+    try:
+        test_stream_step_events()
+        test_unchanged_screen_replays_last_step()
+        test_stream_errors()
+        test_new_session_survives_eviction()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All streaming step tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script for the streaming TTS endpoint (no API keys required).
+
+Usage:
+    python test_tts_stream.py
+"""
+
+import sys
+from fastapi.testclient import TestClient
+from fake_backends import FakeAsyncElevenLabs
+from main import app
+from tts_service import tts_service
+
+# Create test client
+client = TestClient(app)
+
+
+def test_stream_without_api_key():
+    """Streaming without a configured API key is a client error."""
+    print("🔍 Testing /tts/stream without an API key...")
+    original = tts_service.async_client
+    tts_service.async_client = None
+    try:
+        response = client.post("/tts/stream", data={"text": "Streaming test without key"})
+    finally:
+        tts_service.async_client = original
+
+    assert response.status_code == 400
+    print("✅ Missing API key reported correctly")
+
+
+def test_stream_forwards_chunks_and_caches():
+    """Chunks are streamed through, and a repeat request is served from cache."""
+    print("🔍 Testing /tts/stream chunk forwarding...")
+    original = tts_service.async_client
+    tts_service.async_client = FakeAsyncElevenLabs(audio_bytes=10_000, chunk_bytes=4096)
+    speech = tts_service.async_client.text_to_speech
+    try:
+        first = client.post("/tts/stream", data={"text": "Streaming test phrase"})
+        second = client.post("/tts/stream", data={"text": "Streaming test phrase"})
+    finally:
+        tts_service.async_client = original
+
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "audio/mpeg"
+    assert first.content.startswith(b"\xff\xf3") and len(first.content) == 10_000
+    assert second.content == first.content
+    assert speech.calls == 1
+    print("✅ Audio chunks streamed and cached correctly")
+
+
+def main():
+    """Run all streaming TTS tests."""
+    try:
+        test_stream_without_api_key()
+        test_stream_forwards_chunks_and_caches()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All streaming TTS tests passed!")
+
+
+if __name__ == "__main__":
+    main()
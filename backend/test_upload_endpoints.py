@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script for the multipart and raw screenshot upload endpoints (no API keys required).
+
+The agents and TTS are replaced with local stand-ins, so only request parsing
+and session handling are exercised.
+
+Usage:
+    python test_upload_endpoints.py
+"""
+
+import base64
+import sys
+from contextlib import contextmanager
+from fastapi.testclient import TestClient
+import main
+import workflow
+from fixtures import make_screenshot
+
+# Create test client
+client = TestClient(main.app)
+
+
+async def fake_orchestration_node(state):
+    """Orchestration stand-in that records which screenshot it saw."""
+    state = state.copy()
+    state["current_task"] = f"Task for {len(state['screenshot_image'])} byte screenshot"
+    state["task_description"] = "Fake task"
+    state["is_task_completed"] = False
+    return state
+
+
+async def fake_coordinate_node(state):
+    """Coordinate agent stand-in that always points at the same spot."""
+    state = state.copy()
+    state["coordinates"] = (10, 20)
+    return state
+
+
+async def fake_audio(text, voice_id=main.DEFAULT_VOICE_ID):
+    """TTS stand-in that returns no audio."""
+    return None
+
+
+@contextmanager
+def fake_agents():
+    """Swap the agents and TTS in the workflow for the local stand-ins."""
+    originals = (workflow.aorchestration_agent_node, workflow.acoordinate_agent_node, workflow.generate_audio_for_text)
+    workflow.aorchestration_agent_node = fake_orchestration_node
+    workflow.acoordinate_agent_node = fake_coordinate_node
+    workflow.generate_audio_for_text = fake_audio
+    try:
+        yield
+    finally:
+        workflow.aorchestration_agent_node, workflow.acoordinate_agent_node, workflow.generate_audio_for_text = originals
+
+
+def test_multipart_upload_flow():
+    """A session can be started and continued with multipart uploads."""
+    print("🔍 Testing multipart upload endpoints...")
+    with fake_agents():
+        first = make_screenshot(color=(255, 0, 0))
+        response = client.post(
+            "/initialize/upload",
+            data={"user_query": "Upload test"},
+            files={"screenshot": ("screen.png", first, "image/png")},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["task"] == f"Task for {len(first)} byte screenshot"
+        assert (data["x"], data["y"]) == (10, 20)
+
+        second = make_screenshot(color=(0, 0, 255))
+        response = client.post(
+            "/update_screenshot/upload",
+            data={"session_id": data["session_id"]},
+            files={"screenshot": ("screen.png", second, "image/png")},
+        )
+        assert response.status_code == 200
+        assert response.json()["task"] == f"Task for {len(second)} byte screenshot"
+    print("✅ Multipart uploads working correctly")
+
+
+def test_raw_upload_flow():
+    """A session can be started and continued with raw octet-stream bodies."""
+    print("🔍 Testing raw upload endpoints...")
+    with fake_agents():
+        first = make_screenshot(color=(0, 255, 0))
+        response = client.post(
+            "/initialize/raw",
+            params={"user_query": "Raw test"},
+            content=first,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 200
+        session_id = response.json()["session_id"]
+
+        second = make_screenshot(color=(255, 255, 0))
+        response = client.post(
+            "/update_screenshot/raw",
+            params={"session_id": session_id},
+            content=second,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        assert response.status_code == 200
+        assert response.json()["task"] == f"Task for {len(second)} byte screenshot"
+    print("✅ Raw uploads working correctly")
+
+
+def test_json_endpoints_still_work():
+    """The base64 JSON endpoints accept the same screenshots as before."""
+    print("🔍 Testing base64 JSON endpoints...")
+    with fake_agents():
+        screenshot = make_screenshot(color=(0, 255, 255))
+        response = client.post(
+            "/initialize",
+            json={"user_query": "JSON test", "screenshot_base64": base64.b64encode(screenshot).decode("utf-8")},
+        )
+        assert response.status_code == 200
+        assert response.json()["task"] == f"Task for {len(screenshot)} byte screenshot"
+    print("✅ Base64 JSON endpoints working correctly")
+
+
+def test_rejects_empty_and_unknown_sessions():
+    """Empty bodies and unknown sessions are client errors."""
+    print("🔍 Testing upload error handling...")
+    response = client.post("/initialize/raw", params={"user_query": "Empty"}, content=b"")
+    assert response.status_code == 400
+
+    response = client.post(
+        "/update_screenshot/raw",
+        params={"session_id": "missing"},
+        content=make_screenshot(color=(0, 0, 0)),
+    )
+    assert response.status_code == 400
+    print("✅ Upload errors reported correctly")
+
+
+def main_tests():
+    """Run all upload endpoint tests."""
+    try:
+        test_multipart_upload_flow()
+        test_raw_upload_flow()
+        test_json_endpoints_still_work()
+        test_rejects_empty_and_unknown_sessions()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All upload endpoint tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
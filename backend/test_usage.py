@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Test script for token, image and cost accounting (no API keys required).
+
+Usage:
+    python test_usage.py
+"""
+
+import base64
+import os
+import sys
+from uuid import uuid4
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+from fastapi.testclient import TestClient
+import main
+import usage
+import workflow
+from fake_backends import use_fake_backends
+from fixtures import make_screenshot_base64
+from prompt_cache import PromptCacheUsage
+from usage import CallUsage, track_step_usage
+
+# Create test client
+client = TestClient(main.app)
+
+
+def test_call_cost():
+    """Cost uses the model's uncached, cached, written and output token prices."""
+    print("🔍 Testing cost estimates...")
+    call = CallUsage(
+        agent="test",
+        model="claude-sonnet-4-20250514",
+        input_tokens=1_000_000,
+        output_tokens=100_000,
+        cache_read_tokens=500_000,
+        cache_write_tokens=100_000,
+    )
+    # 400k uncached * $3 + 100k output * $15 + 100k written * $3.75 + 500k read * $0.30, per million
+    assert abs(call.cost_usd - (1.2 + 1.5 + 0.375 + 0.15)) < 1e-9
+    assert CallUsage(agent="test", model="unknown-model", input_tokens=1000).cost_usd == 0.0
+    print("✅ Costs estimated correctly")
+
+
+def test_callback_records_step_usage():
+    """The agents' callback records tokens, image bytes and model for the running step."""
+    print("🔍 Testing callback usage recording...")
+    recorder = PromptCacheUsage("usage_test")
+    image_data = base64.b64encode(b"\x00" * 3000).decode("ascii")
+    prompt = [HumanMessage(content=[
+        {"type": "text", "text": "Locate the button"},
+        {"type": "image", "source_type": "base64", "data": image_data, "mime_type": "image/png"},
+    ])]
+    message = AIMessage(content="", usage_metadata={
+        "input_tokens": 1200,
+        "output_tokens": 40,
+        "total_tokens": 1240,
+        "input_token_details": {"cache_read": 1000},
+    })
+
+    with track_step_usage() as step:
+        run_id = uuid4()
+        recorder.on_chat_model_start({}, [prompt], run_id=run_id, invocation_params={"model": "claude-sonnet-4-20250514"})
+        recorder.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id=run_id)
+
+    totals = step.totals()
+    assert totals["calls"] == 1
+    assert totals["input_tokens"] == 1200
+    assert totals["output_tokens"] == 40
+    assert totals["cache_read_tokens"] == 1000
+    assert totals["image_bytes"] == 3000
+    assert totals["cost_usd"] > 0
+    assert usage.MODEL_TOKENS.value(agent="usage_test", kind="output") == 40
+    print("✅ Step usage recorded from the callback")
+
+
+def test_session_usage_and_budget():
+    """Step and session usage appear in /status, and a session over budget gets no further steps."""
+    print("🔍 Testing session usage and budget...")
+    original_budget = usage.SESSION_TOKEN_BUDGET
+    with use_fake_backends():
+        response = client.post("/initialize", json={
+            # A query no other test uses, so no answer comes from the response cache
+            "user_query": "Book a flight to Lisbon",
+            "screenshot_base64": make_screenshot_base64((250, 250, 250)),
+        })
+        assert response.status_code == 200, response.text
+        session_id = response.json()["session_id"]
+
+        status = client.get("/status", params={"session_id": session_id}).json()
+        first_step = status["usage"]["last_step"]
+        assert first_step["calls"] == 2
+        assert first_step["input_tokens"] > 0 and first_step["image_bytes"] > 0
+        assert status["usage"]["session"] == first_step
+
+        response = client.post("/update_screenshot", json={
+            "session_id": session_id,
+            "screenshot_base64": make_screenshot_base64((30, 30, 30)),
+        })
+        assert response.status_code == 200, response.text
+        session_usage = client.get("/status", params={"session_id": session_id}).json()["usage"]["session"]
+        assert session_usage["calls"] == 4
+        assert session_usage["input_tokens"] > first_step["input_tokens"]
+
+        usage.SESSION_TOKEN_BUDGET = session_usage["input_tokens"]
+        try:
+            response = client.post("/update_screenshot", json={
+                "session_id": session_id,
+                "screenshot_base64": make_screenshot_base64((250, 250, 250)),
+            })
+        finally:
+            usage.SESSION_TOKEN_BUDGET = original_budget
+        assert response.status_code == 429, response.text
+        assert "token budget" in response.json()["detail"]
+        client.post("/reset", params={"session_id": session_id})
+    print("✅ Session usage tracked and budget enforced")
+
+
+def test_failed_steps_are_charged():
+    """Model calls of a step that fails still count towards the session's usage."""
+    print("🔍 Testing usage of failed steps...")
+
+    async def failing_locate(state):
+        raise RuntimeError("locator down")
+
+    with use_fake_backends():
+        response = client.post("/initialize", json={
+            # A query no other test uses, so no answer comes from the response cache
+            "user_query": "Rename the quarterly report",
+            "screenshot_base64": make_screenshot_base64((240, 200, 160)),
+        })
+        assert response.status_code == 200, response.text
+        session_id = response.json()["session_id"]
+        before = client.get("/status", params={"session_id": session_id}).json()["usage"]["session"]
+
+        original = workflow.acoordinate_agent_node
+        workflow.acoordinate_agent_node = failing_locate
+        try:
+            response = client.post("/update_screenshot", json={
+                "session_id": session_id,
+                "screenshot_base64": make_screenshot_base64((160, 200, 240)),
+            })
+        finally:
+            workflow.acoordinate_agent_node = original
+        assert response.status_code == 500, response.text
+
+        # The orchestration call ran before the step failed
+        after = client.get("/status", params={"session_id": session_id}).json()["usage"]["session"]
+        assert after["calls"] == before["calls"] + 1
+        assert after["input_tokens"] > before["input_tokens"]
+        client.post("/reset", params={"session_id": session_id})
+    print("✅ Failed steps charged to the session")
+
+
+def main_tests():
+    """Run all usage accounting tests."""
+    try:
+        test_call_cost()
+        test_callback_records_step_usage()
+        test_session_usage_and_budget()
+        test_failed_steps_are_charged()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All usage accounting tests passed!")
+
+
+if __name__ == "__main__":
+    main_tests()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled step workflow (no API keys required).
+
+The agent nodes and TTS are replaced with local stand-ins.
+
+Usage:
+    python test_workflow.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "test-key")
+
+import workflow
+from fixtures import make_state
+
+
+class FakeAgents:
+    """Stand-ins for the orchestration node, coordinate node and TTS that record their calls."""
+
+    def __init__(self, delay=0.0, completed=False, locate_failures=0):
+        self.delay = delay
+        self.completed = completed
+        self.locate_failures = locate_failures
+        self.calls = []
+
+    async def orchestrate(self, state):
+        self.calls.append("orchestrate")
+        state = state.copy()
+        state["current_task"] = "Click OK"
+        state["task_description"] = "Dialog"
+        state["is_task_completed"] = self.completed
+        return state
+
+    async def locate(self, state):
+        self.calls.append("locate")
+        assert state["screenshot_image"] and state["prepared_image"], "node ran without the screenshot"
+        await asyncio.sleep(self.delay)
+        if self.locate_failures:
+            self.locate_failures -= 1
+            raise RuntimeError("coordinate call timed out")
+        state = state.copy()
+        state["coordinates"] = (10, 20)
+        return state
+
+    async def audio(self, text, voice_id=workflow.DEFAULT_VOICE_ID):
+        self.calls.append(f"speak:{text}")
+        await asyncio.sleep(self.delay)
+        return "audio"
+
+
+@contextmanager
+def fake_agents(agents: FakeAgents):
+    """Swap the workflow's agent nodes and TTS for the stand-ins."""
+    originals = (workflow.aorchestration_agent_node, workflow.acoordinate_agent_node, workflow.generate_audio_for_text)
+    workflow.aorchestration_agent_node = agents.orchestrate
+    workflow.acoordinate_agent_node = agents.locate
+    workflow.generate_audio_for_text = agents.audio
+    try:
+        yield
+    finally:
+        workflow.aorchestration_agent_node, workflow.acoordinate_agent_node, workflow.generate_audio_for_text = originals
+
+
+def test_locate_and_speak_run_in_parallel():
+    """Coordinates and audio are produced concurrently after the task is known."""
+    print("🔍 Testing parallel branches...")
+    agents = FakeAgents(delay=0.3)
+    with fake_agents(agents):
+        start = time.perf_counter()
+        state, audio = asyncio.run(workflow.run_step(make_state(), "parallel-thread"))
+        elapsed = time.perf_counter() - start
+
+    assert state["coordinates"] == (10, 20)
+    assert audio == "audio"
+    assert "audio_base64" not in state
+    assert agents.calls[0] == "orchestrate"
+    assert elapsed < 0.55, f"branches ran one after another ({elapsed:.2f}s)"
+    print(f"✅ Branches ran in parallel ({elapsed:.2f}s)")
+
+
+def test_completion_edge():
+    """A completed workflow skips locating and speaks the completion message."""
+    print("🔍 Testing completion edge...")
+    agents = FakeAgents(completed=True)
+    with fake_agents(agents):
+        state, audio = asyncio.run(workflow.run_step(make_state(), "completion-thread"))
+
+    assert state["is_task_completed"]
+    assert agents.calls == ["orchestrate", f"speak:{workflow.COMPLETION_MESSAGE}"]
+    assert audio == "audio"
+    print("✅ Completion announced without locating")
+
+
+def test_failed_step_resumes_from_checkpoint():
+    """Retrying a failed step on the same screenshot only reruns the nodes that did not finish."""
+    print("🔍 Testing resume from checkpoint...")
+    agents = FakeAgents(locate_failures=1)
+    state = make_state()
+
+    async def fail_then_retry():
+        try:
+            await workflow.run_step(state, "resume-thread")
+            raise AssertionError("the first attempt should fail")
+        except RuntimeError:
+            pass
+        # The checkpoint keeps the frame's digest, not the frame
+        snapshot = await workflow.get_workflow().aget_state({"configurable": {"thread_id": "resume-thread"}})
+        assert snapshot.values["screenshot_image"] is None and snapshot.values["prepared_image"] is None
+        assert snapshot.values["frame_digest"] == state["prepared_image"].digest
+        assert not workflow._frames
+        return await workflow.run_step(state, "resume-thread")
+
+    with fake_agents(agents):
+        result, audio = asyncio.run(fail_then_retry())
+
+    assert result["coordinates"] == (10, 20)
+    assert result["screenshot_image"] == state["screenshot_image"] and "frame_digest" not in result
+    assert agents.calls.count("orchestrate") == 1
+    assert agents.calls.count("speak:Click OK") == 1
+    assert agents.calls.count("locate") == 2
+    assert audio == "audio"
+    # Checkpoints of finished steps are dropped
+    assert "resume-thread" not in workflow._pending_threads
+    print("✅ Failed step resumed without repeating finished nodes or checkpointing the screenshot")
+
+
+def main():
+    """Run all workflow tests."""
+    try:
+        test_locate_and_speak_run_in_parallel()
+        test_completion_edge()
+        test_failed_step_resumes_from_checkpoint()
+    except AssertionError as e:
+        print(f"❌ TEST FAILED: {e}")
+        sys.exit(1)
+    print("\n🎉 All workflow tests passed!")
+
+
+if __name__ == "__main__":
+    main()
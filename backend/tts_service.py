@@ -1,9 +1,12 @@
 import os
+import asyncio
 import base64
 import tempfile
-from elevenlabs import ElevenLabs
+from elevenlabs import AsyncElevenLabs, ElevenLabs
 from dotenv import load_dotenv
 import logging
+from cache import audio_cache, cache_key
+from metrics import TTS_FAILURES
 
 # Load environment variables
 load_dotenv()
@@ -19,9 +22,11 @@ class TTSService:
         if not self.api_key:
             logger.warning("ELEVENLABS_API_KEY not found in environment variables")
             self.client = None
+            self.async_client = None
             return
         
         self.client = ElevenLabs(api_key=self.api_key)
+        self.async_client = AsyncElevenLabs(api_key=self.api_key)
         logger.info("ElevenLabs TTS service initialized")
     
     def text_to_speech(self, text, voice_id="EXAVITQu4vr4xnSDxMaL", model_id="eleven_monolingual_v1"):
@@ -36,7 +41,12 @@ class TTSService:
         Returns:
             dict: Contains base64 audio data and metadata
         """
+        cached = self._cached_result(text, voice_id, model_id)
+        if cached:
+            return cached
+        
         if not self.client:
+            TTS_FAILURES.inc(reason="not_configured")
             return {
                 "error": "ElevenLabs API key not configured",
                 "audio_base64": None
@@ -52,31 +62,173 @@ class TTSService:
                 model_id=model_id
             )
             
-            # Collect audio bytes
-            audio_bytes = b""
+            # Collect audio bytes into a single growable buffer
+            audio_buffer = bytearray()
             for chunk in audio:
-                audio_bytes += chunk
+                audio_buffer += chunk
+            audio_bytes = bytes(audio_buffer)
             
-            # Convert audio to base64
-            audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+            if audio_cache:
+                audio_cache.set(self._cache_key(text, voice_id, model_id), audio_bytes)
+            return self._build_result(audio_bytes, text, voice_id, model_id)
             
-            logger.info("Speech generation completed successfully")
+        except Exception as e:
+            logger.error(f"Error generating speech: {str(e)}")
+            TTS_FAILURES.inc(reason="error")
+            return {
+                "error": f"Speech generation failed: {str(e)}",
+                "audio_base64": None
+            }
+    
+    async def atext_to_speech(self, text, voice_id="EXAVITQu4vr4xnSDxMaL", model_id="eleven_monolingual_v1"):
+        """
+        Async version of text_to_speech that does not block the event loop.
+        
+        Args:
+            text (str): The text to convert to speech
+            voice_id (str): ElevenLabs voice ID (default: Rachel voice)
+            model_id (str): ElevenLabs model ID
             
+        Returns:
+            dict: Contains base64 audio data and metadata
+        """
+        cached = await self._acached_result(text, voice_id, model_id)
+        if cached:
+            return cached
+        
+        if not self.async_client:
+            TTS_FAILURES.inc(reason="not_configured")
             return {
-                "audio_base64": audio_base64,
-                "text": text,
-                "voice_id": voice_id,
-                "model_id": model_id,
-                "audio_size_bytes": len(audio_bytes)
+                "error": "ElevenLabs API key not configured",
+                "audio_base64": None
             }
+        
+        try:
+            logger.info(f"Generating speech for text: {text[:50]}...")
+            
+            # Generate audio using the async ElevenLabs client
+            audio = self.async_client.text_to_speech.convert(
+                voice_id=voice_id,
+                text=text,
+                model_id=model_id
+            )
+            
+            # Collect audio bytes into a single growable buffer
+            audio_buffer = bytearray()
+            async for chunk in audio:
+                audio_buffer += chunk
+            audio_bytes = bytes(audio_buffer)
+            
+            if audio_cache:
+                await audio_cache.aset(self._cache_key(text, voice_id, model_id), audio_bytes)
+            return self._build_result(audio_bytes, text, voice_id, model_id)
             
         except Exception as e:
             logger.error(f"Error generating speech: {str(e)}")
+            TTS_FAILURES.inc(reason="error")
             return {
                 "error": f"Speech generation failed: {str(e)}",
                 "audio_base64": None
             }
     
+    async def astream_speech(self, text, voice_id="EXAVITQu4vr4xnSDxMaL", model_id="eleven_monolingual_v1"):
+        """
+        Stream speech audio chunks as ElevenLabs produces them.
+        
+        Args:
+            text (str): The text to convert to speech
+            voice_id (str): ElevenLabs voice ID (default: Rachel voice)
+            model_id (str): ElevenLabs model ID
+            
+        Yields:
+            bytes: Audio chunks (MP3)
+            
+        Raises:
+            ValueError: If the ElevenLabs API key is not configured
+        """
+        key = self._cache_key(text, voice_id, model_id)
+        cached = await audio_cache.aget(key) if audio_cache else None
+        if cached is not None:
+            yield cached
+            return
+        
+        if not self.async_client:
+            TTS_FAILURES.inc(reason="not_configured")
+            raise ValueError("ElevenLabs API key not configured")
+        
+        logger.info(f"Streaming speech for text: {text[:50]}...")
+        audio_buffer = bytearray()
+        async for chunk in self.async_client.text_to_speech.stream(voice_id=voice_id, text=text, model_id=model_id):
+            audio_buffer += chunk
+            yield chunk
+        
+        # Only complete clips are cached
+        if audio_cache:
+            await audio_cache.aset(key, bytes(audio_buffer))
+    
+    async def prewarm(self, phrases, voice_id="EXAVITQu4vr4xnSDxMaL", model_id="eleven_monolingual_v1"):
+        """
+        Synthesize fixed phrases ahead of time so they are served from the audio cache.
+        
+        Args:
+            phrases (list): Texts to synthesize
+            voice_id (str): ElevenLabs voice ID the phrases will be requested with
+            model_id (str): ElevenLabs model ID
+            
+        Returns:
+            int: Number of phrases available in the cache
+        """
+        if not audio_cache or not self.async_client:
+            return 0
+        
+        results = await asyncio.gather(*[
+            self.atext_to_speech(phrase, voice_id=voice_id, model_id=model_id)
+            for phrase in phrases
+        ])
+        warmed = sum(1 for result in results if "error" not in result)
+        logger.info(f"Pre-warmed {warmed}/{len(phrases)} TTS phrases")
+        return warmed
+    
+    def _cache_key(self, text, voice_id, model_id):
+        """Audio cache key for a text/voice/model combination."""
+        return cache_key("tts", text, voice_id, model_id)
+    
+    def _cached_result(self, text, voice_id, model_id):
+        """Return the result for previously synthesized audio, or None."""
+        if not audio_cache:
+            return None
+        return self._result_from_cache(audio_cache.get(self._cache_key(text, voice_id, model_id)), text, voice_id, model_id)
+    
+    async def _acached_result(self, text, voice_id, model_id):
+        """Async version of _cached_result that reads the disk tier off the event loop."""
+        if not audio_cache:
+            return None
+        audio_bytes = await audio_cache.aget(self._cache_key(text, voice_id, model_id))
+        return self._result_from_cache(audio_bytes, text, voice_id, model_id)
+    
+    def _result_from_cache(self, audio_bytes, text, voice_id, model_id):
+        """Build the result for cached audio, or None on a cache miss."""
+        if audio_bytes is None:
+            return None
+        result = self._build_result(audio_bytes, text, voice_id, model_id)
+        result["cached"] = True
+        return result
+    
+    def _build_result(self, audio_bytes, text, voice_id, model_id):
+        """Base64-encode the generated audio and attach its metadata."""
+        # Convert audio to base64
+        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+        
+        logger.info("Speech generation completed successfully")
+        
+        return {
+            "audio_base64": audio_base64,
+            "text": text,
+            "voice_id": voice_id,
+            "model_id": model_id,
+            "audio_size_bytes": len(audio_bytes)
+        }
+    
     def get_available_voices(self):
         """Get list of available voices from ElevenLabs."""
         if not self.client:
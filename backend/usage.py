@@ -0,0 +1,231 @@
+"""
+Token, image and cost accounting for model calls.
+
+Every model call is recorded once, by the agents' PromptCacheUsage callback
+(or by the fake backends), with its input, output and cached tokens, the
+image bytes it sent, its latency and its cost. Each call is added to:
+
+- the process-wide metrics (tokens, image bytes and cost per agent, latency histogram)
+- the usage of the step being run, collected with track_step_usage()
+
+main.py adds each step's usage to the session's totals in its state, also
+when the step fails, and refuses further steps once a session is over its budget
+(SESSION_TOKEN_BUDGET / SESSION_COST_BUDGET_USD).
+
+Hedged requests that lose are cancelled before they report usage, so their
+tokens are not counted (see call_policy).
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage
+
+from metrics import Counter, Histogram, register
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Per-session caps; a session over either one gets no further steps (0 = unlimited)
+SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "0"))
+SESSION_COST_BUDGET_USD = float(os.getenv("SESSION_COST_BUDGET_USD", "0"))
+
+# USD per million tokens: (uncached input, output, cache write, cache read), by model name prefix
+MODEL_PRICES = {
+    "claude-opus-4": (15.0, 75.0, 18.75, 1.50),
+    "claude-sonnet-4": (3.0, 15.0, 3.75, 0.30),
+    "claude-3-7-sonnet": (3.0, 15.0, 3.75, 0.30),
+    "claude-3-5-sonnet": (3.0, 15.0, 3.75, 0.30),
+    "claude-3-5-haiku": (0.80, 4.0, 1.0, 0.08),
+    "claude-haiku-4": (1.0, 5.0, 1.25, 0.10),
+}
+
+MODEL_TOKENS = register(Counter("model_tokens_total", "Model tokens by agent and kind.", ("agent", "kind")))
+MODEL_IMAGE_BYTES = register(Counter("model_image_bytes_total", "Image bytes sent to the model by agent.", ("agent",)))
+MODEL_COST = register(Counter("model_cost_usd_total", "Estimated model cost in USD by agent.", ("agent",)))
+MODEL_CALL_SECONDS = register(
+    Histogram("model_call_seconds", "Time from model request to full response.", ("agent",))
+)
+
+
+@dataclass(frozen=True)
+class CallUsage:
+    """Usage of one model call."""
+    agent: str
+    model: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    image_bytes: int = 0
+    latency_ms: float = 0.0
+
+    @property
+    def uncached_input_tokens(self) -> int:
+        return self.input_tokens - self.cache_read_tokens - self.cache_write_tokens
+
+    @property
+    def cost_usd(self) -> float:
+        """Estimated cost from MODEL_PRICES; 0 for models without a known price."""
+        prices = next((prices for prefix, prices in MODEL_PRICES.items() if self.model.startswith(prefix)), None)
+        if prices is None:
+            return 0.0
+        uncached, output, write, read = prices
+        return (
+            self.uncached_input_tokens * uncached
+            + self.output_tokens * output
+            + self.cache_write_tokens * write
+            + self.cache_read_tokens * read
+        ) / 1_000_000
+
+
+def empty_usage() -> Dict[str, Any]:
+    """Usage totals with nothing recorded, as stored in the state."""
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cache_read_tokens": 0,
+        "cache_write_tokens": 0,
+        "image_bytes": 0,
+        "latency_ms": 0.0,
+        "cost_usd": 0.0,
+    }
+
+
+def add_usage(totals: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sum two usage totals.
+
+    Args:
+        totals: Usage totals (e.g. a session's)
+        other: Usage totals to add (e.g. a step's)
+
+    Returns:
+        Dict[str, Any]: New totals; neither argument is modified
+    """
+    return {key: totals.get(key, 0) + other.get(key, 0) for key in empty_usage()}
+
+
+def image_bytes(messages: List[BaseMessage]) -> int:
+    """Decoded size of the base64 images attached to a prompt."""
+    size = 0
+    for message in messages:
+        if isinstance(message.content, list):
+            for part in message.content:
+                if isinstance(part, dict) and part.get("type") == "image" and part.get("data"):
+                    size += len(part["data"]) * 3 // 4
+    return size
+
+
+class StepUsage:
+    """Usage of the model calls made while running one step."""
+
+    def __init__(self):
+        self.calls: List[CallUsage] = []
+        # Set once the usage has been added to a state
+        self.charged = False
+        self._lock = threading.Lock()
+
+    def add(self, call: CallUsage) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def totals(self) -> Dict[str, Any]:
+        """Sum of the step's calls, in the format stored in the state."""
+        totals = empty_usage()
+        with self._lock:
+            calls = list(self.calls)
+        for call in calls:
+            totals["calls"] += 1
+            totals["input_tokens"] += call.input_tokens
+            totals["output_tokens"] += call.output_tokens
+            totals["cache_read_tokens"] += call.cache_read_tokens
+            totals["cache_write_tokens"] += call.cache_write_tokens
+            totals["image_bytes"] += call.image_bytes
+            totals["latency_ms"] += call.latency_ms
+            totals["cost_usd"] += call.cost_usd
+        return totals
+
+
+# Usage of the step being run; tasks and threads started by the step inherit it
+_step_usage: ContextVar[Optional[StepUsage]] = ContextVar("step_usage", default=None)
+
+
+@contextmanager
+def track_step_usage():
+    """
+    Collect the usage of every model call made inside the block.
+
+    Yields:
+        StepUsage: Filled in as calls finish
+    """
+    step = StepUsage()
+    token = _step_usage.set(step)
+    try:
+        yield step
+    finally:
+        _step_usage.reset(token)
+
+
+def record_call(call: CallUsage) -> None:
+    """
+    Record one model call in the metrics and in the current step's usage.
+
+    Args:
+        call: Usage of the finished call
+    """
+    MODEL_TOKENS.inc(call.uncached_input_tokens, agent=call.agent, kind="input")
+    MODEL_TOKENS.inc(call.cache_read_tokens, agent=call.agent, kind="cache_read")
+    MODEL_TOKENS.inc(call.cache_write_tokens, agent=call.agent, kind="cache_write")
+    MODEL_TOKENS.inc(call.output_tokens, agent=call.agent, kind="output")
+    MODEL_IMAGE_BYTES.inc(call.image_bytes, agent=call.agent)
+    MODEL_COST.inc(call.cost_usd, agent=call.agent)
+    MODEL_CALL_SECONDS.observe(call.latency_ms / 1000, agent=call.agent)
+    step = _step_usage.get()
+    if step is not None:
+        step.add(call)
+
+
+def add_step_usage(state: Dict[str, Any], step: StepUsage) -> Dict[str, Any]:
+    """
+    Record a step's usage in its state (or, for a failed step, in the session's last state).
+
+    Args:
+        state: Agent state after the step
+        step: Usage collected with track_step_usage()
+
+    Returns:
+        Dict[str, Any]: Copy of the state with `step_usage` set and added to the session's `usage`
+    """
+    totals = step.totals()
+    step.charged = True
+    updated_state = state.copy()
+    updated_state["step_usage"] = totals
+    updated_state["usage"] = add_usage(state.get("usage") or empty_usage(), totals)
+    return updated_state
+
+
+def over_budget(usage: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Check session usage against SESSION_TOKEN_BUDGET and SESSION_COST_BUDGET_USD.
+
+    Args:
+        usage: The session's usage totals
+
+    Returns:
+        Optional[str]: Why the session is over budget, or None if it may continue
+    """
+    if not usage:
+        return None
+    tokens = usage["input_tokens"] + usage["output_tokens"]
+    if SESSION_TOKEN_BUDGET and tokens >= SESSION_TOKEN_BUDGET:
+        return f"Session used {tokens} of its {SESSION_TOKEN_BUDGET} token budget"
+    if SESSION_COST_BUDGET_USD and usage["cost_usd"] >= SESSION_COST_BUDGET_USD:
+        return f"Session used ${usage['cost_usd']:.4f} of its ${SESSION_COST_BUDGET_USD:.2f} budget"
+    return None
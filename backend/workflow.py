@@ -0,0 +1,447 @@
+"""
+The per-step agent workflow as a compiled LangGraph graph.
+
+One graph per STEP_MODE decides the next task, then locates it and
+synthesizes its audio in parallel branches, and announces completion through
+a conditional edge when the goal is accomplished:
+
+    pipeline:  orchestrate -> (locate | speak)                 | announce_completion
+    fused:     fused -> speak                                  | announce_completion
+    plan:      advance -> [plan] -> (locate | speak) -> review -> [plan -> (locate | speak)]
+
+Graphs are compiled with a checkpointer and run with the session id as the
+thread id. A step that fails halfway (for example the coordinate call times
+out after the orchestration call succeeded) keeps its checkpoint, and
+retrying the same screenshot resumes from it instead of calling every agent
+again. Checkpoints of completed steps are dropped, since the session store
+keeps the resulting state.
+
+Checkpoints never hold the screenshot or its prepared payload: the graph
+state only carries the frame's digest, and the nodes read the frame from a
+registry that holds it while a step runs. A resumed step is given the same
+screenshot again by its retry, so nothing image-sized outlives a failed step.
+
+run_step() returns the finished step; stream_step() runs the same step and
+yields each node's update as it finishes, for the streaming step endpoints.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, START, StateGraph
+
+from coordinate_agent import acoordinate_agent_node, alocate_agent_node
+from fused_agent import afused_agent_node
+from metrics import TTS_FAILURES, timed
+from orchestration_agent import aorchestration_agent_node, aplan_agent_node
+from image_processing import PreparedImage
+from state import AgentState, advance_plan, release_screenshot
+from tts_service import tts_service
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Voice used for step instructions, and the phrase spoken when the goal is accomplished
+DEFAULT_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"
+COMPLETION_MESSAGE = "All tasks have been completed successfully."
+
+# Name stream_step() yields the finished step under, after the nodes' updates
+STEP_RESULT = "__result__"
+
+# "memory": keep checkpoints of unfinished steps in process; "none": no checkpoints
+WORKFLOW_CHECKPOINTER = os.getenv("WORKFLOW_CHECKPOINTER", "memory").lower()
+
+# Unfinished steps whose checkpoints are kept for a retry; older ones are dropped
+WORKFLOW_MAX_PENDING = int(os.getenv("WORKFLOW_MAX_PENDING", "100"))
+
+# Types stored in the state that checkpoints may restore
+CHECKPOINT_TYPES = [
+    ("history", "History"),
+    ("image_processing", "ScreenFingerprint"),
+]
+
+
+class WorkflowState(AgentState, total=False):
+    """Agent state plus the values a step produces for its response."""
+    audio_base64: Optional[str]
+    planned_now: bool
+    frame_digest: Optional[str]
+
+
+# Screenshots and prepared payloads of running steps by digest, with the number of steps using each
+_frames: Dict[str, Tuple[Optional[bytes], Optional[PreparedImage], int]] = {}
+
+
+def _frame_digest(state: AgentState) -> Optional[str]:
+    """Digest identifying a state's screenshot."""
+    if state.get("prepared_image") is not None:
+        return state["prepared_image"].digest
+    if state.get("screenshot_image"):
+        return hashlib.sha256(state["screenshot_image"]).hexdigest()
+    return None
+
+
+@contextmanager
+def _holding_frame(state: AgentState) -> Iterator[Optional[str]]:
+    """Make a step's screenshot available to the graph nodes by digest while the step runs."""
+    digest = _frame_digest(state)
+    if digest is not None:
+        screenshot, prepared, users = _frames.get(digest, (state["screenshot_image"], state.get("prepared_image"), 0))
+        _frames[digest] = (screenshot, prepared or state.get("prepared_image"), users + 1)
+    try:
+        yield digest
+    finally:
+        if digest is not None:
+            screenshot, prepared, users = _frames[digest]
+            if users > 1:
+                _frames[digest] = (screenshot, prepared, users - 1)
+            else:
+                del _frames[digest]
+
+
+def _with_frame(state: WorkflowState) -> WorkflowState:
+    """The graph state with its screenshot and prepared payload attached from the frame registry."""
+    screenshot, prepared, _ = _frames.get(state.get("frame_digest"), (None, None, 0))
+    return {**state, "screenshot_image": screenshot, "prepared_image": prepared}
+
+
+async def generate_audio_for_text(text: str, voice_id: str = DEFAULT_VOICE_ID) -> Optional[str]:
+    """Generate audio for the given text using TTS service."""
+    try:
+        result = await tts_service.atext_to_speech(text, voice_id=voice_id)
+        if "error" not in result:
+            return result.get("audio_base64")
+    except Exception as e:
+        logger.warning("TTS error: %s", e)
+        TTS_FAILURES.inc(reason="error")
+    return None
+
+
+def _changes(before: WorkflowState, after: WorkflowState) -> dict:
+    """
+    Keys an agent node changed, so parallel branches never write the same key.
+
+    Agent nodes return a full copy of the state; only values they replaced are
+    passed on as the branch's update.
+    """
+    return {key: value for key, value in after.items() if before.get(key) is not value}
+
+
+# Graph nodes
+
+async def orchestrate(state: WorkflowState) -> dict:
+    with timed("orchestrate"):
+        state = _with_frame(state)
+        return _changes(state, await aorchestration_agent_node(state))
+
+
+async def fused(state: WorkflowState) -> dict:
+    with timed("fused"):
+        state = _with_frame(state)
+        return _changes(state, await afused_agent_node(state))
+
+
+async def locate(state: WorkflowState) -> dict:
+    with timed("locate"):
+        state = _with_frame(state)
+        return _changes(state, await acoordinate_agent_node(state))
+
+
+async def locate_planned(state: WorkflowState) -> dict:
+    with timed("locate"):
+        state = _with_frame(state)
+        return _changes(state, await alocate_agent_node(state))
+
+
+async def speak(state: WorkflowState) -> dict:
+    with timed("speak"):
+        return {"audio_base64": await generate_audio_for_text(state["current_task"])}
+
+
+async def announce_completion(state: WorkflowState) -> dict:
+    with timed("speak"):
+        return {"audio_base64": await generate_audio_for_text(COMPLETION_MESSAGE)}
+
+
+async def advance(state: WorkflowState) -> dict:
+    """Move to the next planned task, if a plan was made on an earlier step."""
+    if state["plan"] is None:
+        return {"planned_now": False}
+    return {**_changes(state, advance_plan(state)), "planned_now": False}
+
+
+async def plan(state: WorkflowState) -> dict:
+    with timed("plan"):
+        state = _with_frame(state)
+        return {**_changes(state, await aplan_agent_node(state)), "planned_now": True}
+
+
+async def review(state: WorkflowState) -> dict:
+    """Join point of the locate and speak branches of a planned task."""
+    return {}
+
+
+# Routing
+
+def _route_task(speak_task: bool, locate_node: Optional[str] = None):
+    """Route to completion, or to locating the task and speaking it in parallel."""
+    def route(state: WorkflowState) -> Union[str, List[str]]:
+        if state["is_task_completed"]:
+            return "announce_completion" if speak_task else END
+        branches = ([locate_node] if locate_node else []) + (["speak"] if speak_task else [])
+        return branches or END
+    return route
+
+
+def _route_advanced(speak_task: bool):
+    """Plan when there is no planned task left, otherwise locate the next one."""
+    route_task = _route_task(speak_task, "locate")
+    def route(state: WorkflowState) -> Union[str, List[str]]:
+        return "plan" if state["current_task"] is None else route_task(state)
+    return route
+
+
+def _route_reviewed(state: WorkflowState) -> str:
+    """Replan once when the planned element is not on the new screen."""
+    if state["target_visible"] or state["planned_now"]:
+        return END
+    return "plan"
+
+
+def build_workflow(mode: str = "pipeline", speak_task: bool = True, checkpointer: Optional[BaseCheckpointSaver] = None):
+    """
+    Build and compile the step graph for a STEP_MODE.
+
+    Args:
+        mode: "pipeline", "fused" or "plan"
+        speak_task: Whether to synthesize audio for the task (and the completion message)
+        checkpointer: Saver for step checkpoints, or None to run without them
+
+    Returns:
+        CompiledStateGraph: Graph taking and returning a WorkflowState
+    """
+    builder = StateGraph(WorkflowState)
+    if speak_task:
+        builder.add_node("speak", speak)
+        builder.add_node("announce_completion", announce_completion)
+        if mode != "plan":
+            builder.add_edge("speak", END)
+        builder.add_edge("announce_completion", END)
+    branches = ["announce_completion", "speak"] if speak_task else []
+
+    if mode == "fused":
+        builder.add_node("fused", fused)
+        builder.add_edge(START, "fused")
+        # Coordinates come with the task, so only speech is left to do
+        builder.add_conditional_edges("fused", _route_task(speak_task), branches + [END])
+    elif mode == "plan":
+        builder.add_node("advance", advance)
+        builder.add_node("plan", plan)
+        builder.add_node("locate", locate_planned)
+        builder.add_node("review", review)
+        builder.add_edge(START, "advance")
+        builder.add_conditional_edges("advance", _route_advanced(speak_task), branches + ["plan", "locate", END])
+        builder.add_conditional_edges("plan", _route_task(speak_task, "locate"), branches + ["locate", END])
+        # Wait for both branches before deciding whether to replan
+        builder.add_edge(["locate", "speak"] if speak_task else "locate", "review")
+        builder.add_conditional_edges("review", _route_reviewed, ["plan", END])
+    else:
+        builder.add_node("orchestrate", orchestrate)
+        builder.add_node("locate", locate)
+        builder.add_edge(START, "orchestrate")
+        builder.add_conditional_edges("orchestrate", _route_task(speak_task, "locate"), branches + ["locate", END])
+        builder.add_edge("locate", END)
+
+    return builder.compile(checkpointer=checkpointer)
+
+
+def _env_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """Build the checkpointer selected by WORKFLOW_CHECKPOINTER."""
+    if WORKFLOW_CHECKPOINTER == "none":
+        return None
+    return InMemorySaver(serde=JsonPlusSerializer(allowed_msgpack_modules=CHECKPOINT_TYPES))
+
+
+# Process-wide checkpointer and compiled graphs, keyed by (mode, speak_task)
+checkpointer: Optional[BaseCheckpointSaver] = _env_checkpointer()
+_workflows: Dict[Tuple[str, bool], object] = {}
+_workflows_lock = threading.Lock()
+
+# Threads whose last step did not finish, oldest first
+_pending_threads: "OrderedDict[str, None]" = OrderedDict()
+
+
+def configure_checkpointer(saver: Optional[BaseCheckpointSaver]) -> None:
+    """
+    Replace the checkpointer used by every workflow (e.g. with a persistent saver).
+
+    Args:
+        saver: Checkpoint saver, or None to run without checkpoints
+    """
+    global checkpointer
+    with _workflows_lock:
+        checkpointer = saver
+        _workflows.clear()
+        _pending_threads.clear()
+
+
+def get_workflow(mode: str = "pipeline", speak_task: bool = True):
+    """
+    Get the compiled graph for a STEP_MODE, compiling it on first use.
+
+    Args:
+        mode: "pipeline", "fused" or "plan"
+        speak_task: Whether the graph synthesizes audio
+
+    Returns:
+        CompiledStateGraph: The shared compiled graph
+    """
+    key = (mode, speak_task)
+    workflow = _workflows.get(key)
+    if workflow is None:
+        with _workflows_lock:
+            workflow = _workflows.get(key)
+            if workflow is None:
+                workflow = build_workflow(mode, speak_task, checkpointer)
+                _workflows[key] = workflow
+    return workflow
+
+
+async def _forget_thread(thread_id: str) -> None:
+    """Drop a thread's checkpoints."""
+    _pending_threads.pop(thread_id, None)
+    await checkpointer.adelete_thread(thread_id)
+
+
+async def discard_checkpoints(thread_id: Optional[str]) -> None:
+    """
+    Drop the checkpoints of a session's unfinished step, if any.
+
+    Args:
+        thread_id: Session id the steps were run with
+    """
+    if checkpointer is not None and thread_id in _pending_threads:
+        await _forget_thread(thread_id)
+
+
+async def _begin_step(workflow, state: AgentState, digest: Optional[str], thread_id: str, config: dict) -> Optional[WorkflowState]:
+    """
+    Register a thread's step and decide where it starts.
+
+    Returns:
+        Optional[WorkflowState]: Input for the graph, with the screenshot
+            replaced by its digest, or None to resume the thread's failed step
+            on the same screenshot from its checkpoint
+    """
+    step_input = {**release_screenshot(state), "frame_digest": digest, "audio_base64": None, "planned_now": False}
+    if checkpointer is None:
+        return step_input
+
+    snapshot = await workflow.aget_state(config) if thread_id in _pending_threads else None
+    if snapshot and snapshot.next and snapshot.values.get("frame_digest") == digest:
+        logger.debug("Resuming step for %s at %s", thread_id, list(snapshot.next))
+        step_input = None
+    elif snapshot:
+        await _forget_thread(thread_id)
+
+    _pending_threads[thread_id] = None
+    _pending_threads.move_to_end(thread_id)
+    while len(_pending_threads) > WORKFLOW_MAX_PENDING:
+        await _forget_thread(next(iter(_pending_threads)))
+    return step_input
+
+
+async def _end_step(thread_id: str, result: WorkflowState) -> Tuple[AgentState, Optional[str]]:
+    """Drop a finished step's checkpoints, attach its screenshot again and split its audio from its state."""
+    if checkpointer is not None:
+        # The session store keeps the finished state; the checkpoints are no longer needed
+        await _forget_thread(thread_id)
+    result = dict(_with_frame(result))
+    audio_base64 = result.pop("audio_base64", None)
+    result.pop("planned_now", None)
+    result.pop("frame_digest", None)
+    return result, audio_base64
+
+
+async def run_step(
+    state: AgentState,
+    thread_id: Optional[str] = None,
+    mode: str = "pipeline",
+    speak_task: bool = True,
+) -> Tuple[AgentState, Optional[str]]:
+    """
+    Run one workflow step for a state with a new screenshot.
+
+    If the thread's previous step failed on the same screenshot, the step
+    resumes from its checkpoint and only runs the nodes that did not finish.
+
+    Args:
+        state: State with the step's screenshot
+        thread_id: Session id, so retries of a failed step can resume
+        mode: "pipeline", "fused" or "plan"
+        speak_task: Whether to synthesize audio for the task
+
+    Returns:
+        Tuple[AgentState, Optional[str]]: State with the task and coordinates, and
+            base64 audio if available (the completion message when the workflow is completed)
+    """
+    workflow = get_workflow(mode, speak_task)
+    thread_id = thread_id or uuid.uuid4().hex
+    config = {"configurable": {"thread_id": thread_id}}
+
+    with _holding_frame(state) as digest:
+        step_input = await _begin_step(workflow, state, digest, thread_id, config)
+        result = await workflow.ainvoke(step_input, config)
+        return await _end_step(thread_id, result)
+
+
+async def stream_step(
+    state: AgentState,
+    thread_id: Optional[str] = None,
+    mode: str = "pipeline",
+    speak_task: bool = True,
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Run one workflow step like run_step, yielding each node's update as soon as it finishes.
+
+    Nodes of parallel branches are yielded in the order they finish. A step
+    resumed from its checkpoint only yields the nodes that had not finished.
+
+    Args:
+        state: State with the step's screenshot
+        thread_id: Session id, so retries of a failed step can resume
+        mode: "pipeline", "fused" or "plan"
+        speak_task: Whether to synthesize audio for the task
+
+    Yields:
+        Tuple[str, dict]: (node name, the state keys it changed), then
+            (STEP_RESULT, {"state": ..., "audio_base64": ...}) with what run_step returns
+    """
+    workflow = get_workflow(mode, speak_task)
+    thread_id = thread_id or uuid.uuid4().hex
+    config = {"configurable": {"thread_id": thread_id}}
+
+    with _holding_frame(state) as digest:
+        step_input = await _begin_step(workflow, state, digest, thread_id, config)
+        result = None
+        async for stream_mode, chunk in workflow.astream(step_input, config, stream_mode=["updates", "values"]):
+            if stream_mode == "values":
+                result = chunk
+                continue
+            for node, update in chunk.items():
+                yield node, update or {}
+
+        final_state, audio_base64 = await _end_step(thread_id, result)
+    yield STEP_RESULT, {"state": final_state, "audio_base64": audio_base64}
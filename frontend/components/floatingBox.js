@@ -1,3 +1,18 @@
+// Query string identifying the backend session, if one has been started
+function sessionQuery() {
+    const sessionId = localStorage.getItem('sessionId');
+    return sessionId ? `?session_id=${encodeURIComponent(sessionId)}` : '';
+}
+
+// Reset the backend session and forget its id, even if the reset request fails
+async function resetSession() {
+    try {
+        await fetch(`http://localhost:8000/reset${sessionQuery()}`, { method: 'POST' });
+    } finally {
+        localStorage.removeItem('sessionId');
+    }
+}
+
 export function createFloatingBox(sendCallback, width = 300, height = 50) {
     const box = document.createElement('div');
     box.className = 'floating-box compact';
@@ -55,7 +70,7 @@ export function createFloatingBox(sendCallback, width = 300, height = 50) {
     // Add reload functionality
     reloadInputButton.addEventListener('click', async () => {
         try {
-            await fetch('http://localhost:8000/reset', { method: 'POST' });
+            await resetSession();
             window.location.reload();
         } catch (error) {
             console.error('Error resetting session:', error);
@@ -78,7 +93,7 @@ export function createFloatingBox(sendCallback, width = 300, height = 50) {
                 console.log('About to fetch from:', 'http://localhost:8000/status');
                 console.log('Window location:', window.location.href);
 
-                const response = await fetch('http://localhost:8000/status');
+                const response = await fetch(`http://localhost:8000/status${sessionQuery()}`);
 
                 if (!response.ok) {
                     throw new Error(`HTTP error! status: ${response.status}`);
@@ -250,7 +265,7 @@ function createConversationInterface(container, instruction) {
             if (window.electronAPI && window.electronAPI.sendToMainWindow) {
                 window.electronAPI.sendToMainWindow({ type: 'hide-hotspot' });
             }
-            await fetch('http://localhost:8000/reset', { method: 'POST' });
+            await resetSession();
             window.location.reload();
         } catch (error) {
             console.error('Error resetting session:', error);
@@ -294,7 +309,7 @@ function createConversationInterface(container, instruction) {
                 console.log('About to fetch from:', 'http://localhost:8000/status');
                 console.log('Window location:', window.location.href);
 
-                const response = await fetch('http://localhost:8000/status');
+                const response = await fetch(`http://localhost:8000/status${sessionQuery()}`);
 
                 if (!response.ok) {
                     throw new Error(`HTTP error! status: ${response.status}`);
@@ -382,23 +397,16 @@ function createConversationInterface(container, instruction) {
 
             // Capture screenshot and save it
             console.log('Capturing screenshot...');
-            const screenshotBase64 = await window.electronAPI.getScreenshot();
+            const screenshotPng = await window.electronAPI.getScreenshot();
 
-            let endpoint, requestBody;
+            let endpoint;
 
             if (isInitial) {
                 // First request - use initialize endpoint
-                endpoint = 'http://localhost:8000/initialize';
-                requestBody = {
-                    user_query: instruction,
-                    screenshot_base64: screenshotBase64
-                };
+                endpoint = `http://localhost:8000/initialize/raw?user_query=${encodeURIComponent(instruction)}`;
             } else {
                 // Subsequent requests - use update_screenshot endpoint
-                endpoint = 'http://localhost:8000/update_screenshot';
-                requestBody = {
-                    screenshot_base64: screenshotBase64
-                };
+                endpoint = `http://localhost:8000/update_screenshot/raw${sessionQuery()}`;
             }
 
             console.log(`Making fetch request to ${endpoint}`);
@@ -409,14 +417,21 @@ function createConversationInterface(container, instruction) {
             const response = await fetch(endpoint, {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json',
+                    'Content-Type': 'application/octet-stream',
                 },
-                body: JSON.stringify(requestBody)
+                body: screenshotPng
             });
 
             console.log('Response received:', { status: response.status, ok: response.ok });
 
             if (!response.ok) {
+                // The backend no longer knows this session (expired, evicted or restarted)
+                if (response.status === 400) {
+                    const body = await response.json().catch(() => ({}));
+                    if (String(body.detail || '').includes('No active session')) {
+                        localStorage.removeItem('sessionId');
+                    }
+                }
                 throw new Error(`HTTP error! status: ${response.status}`);
             }
 
@@ -426,6 +441,9 @@ function createConversationInterface(container, instruction) {
 
             // Store the current task data for future use
             window.currentTaskData = data;
+            if (data.session_id) {
+                localStorage.setItem('sessionId', data.session_id);
+            }
 
             // Update the message text with the task description
             console.log('Updating message text to:', data.task || 'Request completed');
@@ -483,7 +501,7 @@ function createConversationInterface(container, instruction) {
                 // Reset the session when clicking after completion
                 nextButton.onclick = async () => {
                     try {
-                        await fetch('http://localhost:8000/reset', { method: 'POST' });
+                        await resetSession();
                         // Reload the input interface
                         window.location.reload();
                     } catch (error) {
@@ -1,3 +1,18 @@
+// Query string identifying the backend session, if one has been started
+function sessionQuery() {
+    const sessionId = localStorage.getItem('sessionId');
+    return sessionId ? `?session_id=${encodeURIComponent(sessionId)}` : '';
+}
+
+// Reset the backend session and forget its id, even if the reset request fails
+async function resetSession() {
+    try {
+        await fetch(`http://localhost:8000/reset${sessionQuery()}`, { method: 'POST' });
+    } finally {
+        localStorage.removeItem('sessionId');
+    }
+}
+
 document.addEventListener('DOMContentLoaded', () => {
     console.log('Conversation window loaded');
 
@@ -35,7 +50,7 @@ document.addEventListener('DOMContentLoaded', () => {
             if (window.electronAPI && window.electronAPI.sendToMainWindow) {
                 window.electronAPI.sendToMainWindow({ type: 'hide-hotspot' });
             }
-            await fetch('http://localhost:8000/reset', { method: 'POST' });
+            await resetSession();
             window.location.reload();
         } catch (error) {
             console.error('Error resetting session:', error);
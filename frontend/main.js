@@ -129,8 +129,8 @@ ipcMain.handle('get-screenshot', async () => {
             thumbnailSize: { width: 1920, height: 1080 }
         });
         if (!sources.length) return null;
-        const png = sources[0].thumbnail.toPNG();
-        return png.toString('base64');
+        // Raw PNG bytes; the backend's /raw endpoints take them without base64 inflation
+        return sources[0].thumbnail.toPNG();
     } catch (err) {
         console.error('Error capturing screenshot:', err);
         throw err;